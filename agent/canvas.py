@@ -20,6 +20,7 @@ import binascii
 import json
 import logging
 import re
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
@@ -30,7 +31,7 @@ from agent.component import component_class
 from agent.component.base import ComponentBase
 from api.db.services.file_service import FileService
 from api.db.services.llm_service import LLMBundle
-from api.db.services.task_service import has_canceled
+from api.db.services.task_service import TaskCancellation, has_canceled
 from common.constants import LLMType
 from common.misc_utils import get_uuid, hash_str2int
 from common.exceptions import TaskCanceledException
@@ -166,7 +167,7 @@ class Graph:
             self.components[k]["obj"].reset()
         try:
             REDIS_CONN.delete(f"{self.task_id}-logs")
-            REDIS_CONN.delete(f"{self.task_id}-cancel")
+            TaskCancellation.clear(self.task_id)
         except Exception as e:
             logging.exception(e)
 
@@ -304,7 +305,7 @@ class Graph:
 
     def cancel_task(self) -> bool:
         try:
-            REDIS_CONN.set(f"{self.task_id}-cancel", "x")
+            TaskCancellation.cancel(self.task_id)
         except Exception as e:
             logging.exception(e)
             return False
@@ -323,6 +324,8 @@ class Canvas(Graph):
         self.variables = {}
         super().__init__(dsl, tenant_id, task_id)
         self._id = canvas_id
+        # Tool calls run in parallel threads; their trace updates are read-modify-write.
+        self._trace_lock = threading.Lock()
 
     def load(self):
         super().load()
@@ -769,22 +772,23 @@ class Canvas(Graph):
         agent_name = self.get_component_name(agent_ids[0])
         path = agent_name if len(agent_ids) < 2 else agent_name+"-->"+"-->".join(agent_ids[1:])
         try:
-            bin = REDIS_CONN.get(f"{self.task_id}-{self.message_id}-logs")
-            if bin:
-                obj = json.loads(bin.encode("utf-8"))
-                if obj[-1]["component_id"] == agent_ids[0]:
-                    obj[-1]["trace"].append({"path": path, "tool_name": func_name, "arguments": params, "result": result, "elapsed_time": elapsed_time})
+            with self._trace_lock:
+                bin = REDIS_CONN.get(f"{self.task_id}-{self.message_id}-logs")
+                if bin:
+                    obj = json.loads(bin.encode("utf-8"))
+                    if obj[-1]["component_id"] == agent_ids[0]:
+                        obj[-1]["trace"].append({"path": path, "tool_name": func_name, "arguments": params, "result": result, "elapsed_time": elapsed_time})
+                    else:
+                        obj.append({
+                        "component_id": agent_ids[0],
+                        "trace": [{"path": path, "tool_name": func_name, "arguments": params, "result": result, "elapsed_time": elapsed_time}]
+                    })
                 else:
-                    obj.append({
-                    "component_id": agent_ids[0],
-                    "trace": [{"path": path, "tool_name": func_name, "arguments": params, "result": result, "elapsed_time": elapsed_time}]
-                })
-            else:
-                obj = [{
-                    "component_id": agent_ids[0],
-                    "trace": [{"path": path, "tool_name": func_name, "arguments": params, "result": result, "elapsed_time": elapsed_time}]
-                }]
-            REDIS_CONN.set_obj(f"{self.task_id}-{self.message_id}-logs", obj, 60*10)
+                    obj = [{
+                        "component_id": agent_ids[0],
+                        "trace": [{"path": path, "tool_name": func_name, "arguments": params, "result": result, "elapsed_time": elapsed_time}]
+                    }]
+                REDIS_CONN.set_obj(f"{self.task_id}-{self.message_id}-logs", obj, 60*10)
         except Exception as e:
             logging.exception(e)
 
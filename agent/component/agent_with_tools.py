@@ -31,7 +31,7 @@ from api.db.services.mcp_server_service import MCPServerService
 from common.connection_utils import timeout
 from rag.prompts.generator import next_step_async, COMPLETE_TASK, \
     citation_prompt, kb_prompt, citation_plus, full_question, message_fit_in, structured_output_prompt
-from common.mcp_tool_call_conn import MCPToolCallSession, mcp_tool_metadata_to_openai_tool
+from common.mcp_tool_call_conn import MCP_SESSION_POOL, mcp_tool_metadata_to_openai_tool
 from agent.component.llm import LLMParam, LLM
 
 
@@ -105,7 +105,7 @@ class Agent(LLM, ToolBase):
 
         for mcp in self._param.mcp:
             _, mcp_server = MCPServerService.get_by_id(mcp["mcp_id"])
-            tool_call_session = MCPToolCallSession(mcp_server, mcp_server.variables)
+            tool_call_session = MCP_SESSION_POOL.get(mcp_server, mcp_server.variables)
             for tnm, meta in mcp["tools"].items():
                 self.tool_meta.append(mcp_tool_metadata_to_openai_tool(meta))
                 self.tools[tnm] = tool_call_session
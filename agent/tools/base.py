@@ -86,7 +86,7 @@ class LLMToolPluginCallSession(ToolCallSession):
         return resp
 
     def get_tool_obj(self, name):
-        return self.tools_map[name]
+        return self.tools_map[self._resolve_tool_name(name)]
 
 
 class ToolParamBase(ComponentParamBase):
@@ -16,13 +16,19 @@
 import json
 import os
 import re
+import uuid
 from abc import ABC
+from decimal import Decimal
 import pandas as pd
 import pymysql
 import psycopg2
 import pyodbc
 from agent.tools.base import ToolParamBase, ToolBase, ToolMeta
 from common.connection_utils import timeout
+from common.sql_conn_pool import DBAPI_DRIVER, SQL_CONNECTION_POOL, DBAPIDriver, FetchResult, fetch_capped, pool_key
+
+EXESQL_MAX_RESULT_BYTES = int(os.environ.get("EXESQL_MAX_RESULT_BYTES", 8 * 1024 * 1024))
+QUERY_STATEMENT = re.compile(r"^\s*(select|with|values|table)\b", re.IGNORECASE)
 
 
 class ExeSQLParam(ToolParamBase):
@@ -76,54 +82,54 @@ class ExeSQLParam(ToolParamBase):
         }
 
 
-class ExeSQL(ToolBase, ABC):
-    component_name = "ExeSQL"
+def convert_decimals(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)  # 或 str(obj)
+    elif isinstance(obj, dict):
+        return {k: convert_decimals(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [convert_decimals(item) for item in obj]
+    return obj
 
-    @timeout(int(os.environ.get("COMPONENT_EXEC_TIMEOUT", 60)))
-    def _invoke(self, **kwargs):
-        if self.check_if_canceled("ExeSQL processing"):
-            return
 
-        def convert_decimals(obj):
-            from decimal import Decimal
-            if isinstance(obj, Decimal):
-                return float(obj)  # 或 str(obj)
-            elif isinstance(obj, dict):
-                return {k: convert_decimals(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_decimals(item) for item in obj]
-            return obj
+class _TrinoDriver(DBAPIDriver):
+    def reset(self, conn):
+        # Trino connections run in autocommit mode; rollback() fails without a transaction.
+        pass
 
-        sql = kwargs.get("sql")
-        if not sql:
-            raise Exception("SQL for `ExeSQL` MUST not be empty.")
 
-        if self.check_if_canceled("ExeSQL processing"):
-            return
+class _IbmDbDriver(DBAPIDriver):
+    def ping(self, conn):
+        import ibm_db
+        ibm_db.exec_immediate(conn, "SELECT 1 FROM SYSIBM.SYSDUMMY1")
 
-        vars = self.get_input_elements_from_text(sql)
-        args = {}
-        for k, o in vars.items():
-            args[k] = o["value"]
-            if not isinstance(args[k], str):
-                try:
-                    args[k] = json.dumps(args[k], ensure_ascii=False)
-                except Exception:
-                    args[k] = str(args[k])
-            self.set_input_value(k, args[k])
-        sql = self.string_format(sql, args)
+    def reset(self, conn):
+        import ibm_db
+        ibm_db.rollback(conn)
 
-        if self.check_if_canceled("ExeSQL processing"):
-            return
+    def close(self, conn):
+        import ibm_db
+        ibm_db.close(conn)
 
-        sqls = sql.split(";")
+
+class ExeSQL(ToolBase, ABC):
+    component_name = "ExeSQL"
+
+    def _connector(self):
+        """The connect function and pool driver of the configured database."""
         if self._param.db_type in ["mysql", "mariadb"]:
-            db = pymysql.connect(db=self._param.database, user=self._param.username, host=self._param.host,
-                                 port=self._param.port, password=self._param.password)
-        elif self._param.db_type == 'postgres':
-            db = psycopg2.connect(dbname=self._param.database, user=self._param.username, host=self._param.host,
-                                  port=self._param.port, password=self._param.password)
-        elif self._param.db_type == 'mssql':
+            def connect():
+                return pymysql.connect(db=self._param.database, user=self._param.username, host=self._param.host,
+                                       port=self._param.port, password=self._param.password)
+            return connect, DBAPI_DRIVER
+
+        if self._param.db_type == 'postgres':
+            def connect():
+                return psycopg2.connect(dbname=self._param.database, user=self._param.username, host=self._param.host,
+                                        port=self._param.port, password=self._param.password)
+            return connect, DBAPI_DRIVER
+
+        if self._param.db_type == 'mssql':
             conn_str = (
                     r'DRIVER={ODBC Driver 17 for SQL Server};'
                     r'SERVER=' + self._param.host + ',' + str(self._param.port) + ';'
@@ -131,8 +137,9 @@ class ExeSQL(ToolBase, ABC):
                     r'UID=' + self._param.username + ';'
                     r'PWD=' + self._param.password
             )
-            db = pyodbc.connect(conn_str)
-        elif self._param.db_type == 'trino':
+            return lambda: pyodbc.connect(conn_str), DBAPI_DRIVER
+
+        if self._param.db_type == 'trino':
             try:
                 import trino
                 from trino.auth import BasicAuthentication
@@ -159,8 +166,8 @@ class ExeSQL(ToolBase, ABC):
             if http_scheme == "https" and self._param.password:
                 auth = BasicAuthentication(self._param.username, self._param.password)
 
-            try:
-                db = trino.dbapi.connect(
+            def connect():
+                return trino.dbapi.connect(
                     host=self._param.host,
                     port=int(self._param.port or 8080),
                     user=self._param.username or "ragflow",
@@ -169,28 +176,109 @@ class ExeSQL(ToolBase, ABC):
                     http_scheme=http_scheme,
                     auth=auth
                 )
-            except Exception as e:
-                raise Exception("Database Connection Failed! \n" + str(e))
-        elif self._param.db_type == 'IBM DB2':
+            return connect, _TrinoDriver()
+
+        # IBM DB2
+        import ibm_db
+        conn_str = (
+            f"DATABASE={self._param.database};"
+            f"HOSTNAME={self._param.host};"
+            f"PORT={self._param.port};"
+            f"PROTOCOL=TCPIP;"
+            f"UID={self._param.username};"
+            f"PWD={self._param.password};"
+        )
+        return lambda: ibm_db.connect(conn_str, "", ""), _IbmDbDriver()
+
+    def _cursor(self, conn, sql: str):
+        # Server-side cursors, so rows past the caps are never sent to us.
+        if self._param.db_type in ["mysql", "mariadb"]:
+            return conn.cursor(pymysql.cursors.SSCursor)
+        if self._param.db_type == 'postgres' and QUERY_STATEMENT.match(sql):
+            return conn.cursor(name=f"exesql_{uuid.uuid4().hex}")
+        return conn.cursor()
+
+    def _execute(self, lease, sql: str) -> tuple[list | None, FetchResult]:
+        """Run one statement and fetch at most `max_records` rows / EXESQL_MAX_RESULT_BYTES of its result."""
+        def canceled():
+            return self.check_if_canceled("ExeSQL processing")
+
+        if self._param.db_type == 'IBM DB2':
             import ibm_db
-            conn_str = (
-                f"DATABASE={self._param.database};"
-                f"HOSTNAME={self._param.host};"
-                f"PORT={self._param.port};"
-                f"PROTOCOL=TCPIP;"
-                f"UID={self._param.username};"
-                f"PWD={self._param.password};"
-            )
+            stmt = ibm_db.exec_immediate(lease.conn, sql)
+
+            def fetchmany(n):
+                rows = []
+                while len(rows) < n:
+                    row = ibm_db.fetch_assoc(stmt)
+                    if not row:
+                        break
+                    rows.append(row)
+                return rows
+
             try:
-                conn = ibm_db.connect(conn_str, "", "")
+                return None, fetch_capped(fetchmany, self._param.max_records, EXESQL_MAX_RESULT_BYTES, canceled=canceled)
+            finally:
+                ibm_db.free_result(stmt)
+
+        cursor = self._cursor(lease.conn, sql)
+        cursor.execute(sql)
+        # A named psycopg2 cursor only gets its description with the first fetch.
+        if cursor.description is None and not getattr(cursor, "name", None):
+            cursor.close()
+            return None, FetchResult([], True, False)
+        res = fetch_capped(cursor.fetchmany, self._param.max_records, EXESQL_MAX_RESULT_BYTES, canceled=canceled)
+        columns = [desc[0] for desc in cursor.description]
+        if not res.complete and self._param.db_type in ["mysql", "mariadb"]:
+            # Closing an unbuffered cursor would read the rest of the result; drop the connection instead.
+            lease.discard()
+        else:
+            cursor.close()
+        return columns, res
+
+    @timeout(int(os.environ.get("COMPONENT_EXEC_TIMEOUT", 60)))
+    def _invoke(self, **kwargs):
+        if self.check_if_canceled("ExeSQL processing"):
+            return
+
+        sql = kwargs.get("sql")
+        if not sql:
+            raise Exception("SQL for `ExeSQL` MUST not be empty.")
+
+        if self.check_if_canceled("ExeSQL processing"):
+            return
+
+        vars = self.get_input_elements_from_text(sql)
+        args = {}
+        for k, o in vars.items():
+            args[k] = o["value"]
+            if not isinstance(args[k], str):
+                try:
+                    args[k] = json.dumps(args[k], ensure_ascii=False)
+                except Exception:
+                    args[k] = str(args[k])
+            self.set_input_value(k, args[k])
+        sql = self.string_format(sql, args)
+
+        if self.check_if_canceled("ExeSQL processing"):
+            return
+
+        sqls = sql.split(";")
+        connect, driver = self._connector()
+
+        def open_connection():
+            try:
+                return connect()
             except Exception as e:
                 raise Exception("Database Connection Failed! \n" + str(e))
 
-            sql_res = []
-            formalized_content = []
+        key = pool_key(self._param.db_type, self._param.host, self._param.port, self._param.database,
+                       self._param.username, self._param.password)
+        sql_res = []
+        formalized_content = []
+        with SQL_CONNECTION_POOL.connection(key, open_connection, driver) as lease:
             for single_sql in sqls:
                 if self.check_if_canceled("ExeSQL processing"):
-                    ibm_db.close(conn)
                     return
 
                 single_sql = single_sql.replace("```", "").strip()
@@ -198,74 +286,28 @@ class ExeSQL(ToolBase, ABC):
                     continue
                 single_sql = re.sub(r"\[ID:[0-9]+\]", "", single_sql)
 
-                stmt = ibm_db.exec_immediate(conn, single_sql)
-                rows = []
-                row = ibm_db.fetch_assoc(stmt)
-                while row and len(rows) < self._param.max_records:
-                    if self.check_if_canceled("ExeSQL processing"):
-                        ibm_db.close(conn)
-                        return
-                    rows.append(row)
-                    row = ibm_db.fetch_assoc(stmt)
-
-                if not rows:
+                columns, fetched = self._execute(lease, single_sql)
+                if fetched.canceled:
+                    lease.discard()
+                    return
+                if not fetched.rows:
                     sql_res.append({"content": "No record in the database!"})
-                    continue
-
-                df = pd.DataFrame(rows)
-                for col in df.columns:
-                    if pd.api.types.is_datetime64_any_dtype(df[col]):
-                        df[col] = df[col].dt.strftime("%Y-%m-%d")
-
-                df = df.where(pd.notnull(df), None)
-
-                sql_res.append(convert_decimals(df.to_dict(orient="records")))
-                formalized_content.append(df.to_markdown(index=False, floatfmt=".6f"))
-
-            ibm_db.close(conn)
-
-            self.set_output("json", sql_res)
-            self.set_output("formalized_content", "\n\n".join(formalized_content))
-            return self.output("formalized_content")
-        try:
-            cursor = db.cursor()
-        except Exception as e:
-            raise Exception("Database Connection Failed! \n" + str(e))
-
-        sql_res = []
-        formalized_content = []
-        for single_sql in sqls:
-            if self.check_if_canceled("ExeSQL processing"):
-                cursor.close()
-                db.close()
-                return
-
-            single_sql = single_sql.replace('```','')
-            if not single_sql:
-                continue
-            single_sql = re.sub(r"\[ID:[0-9]+\]", "", single_sql)
-            cursor.execute(single_sql)
-            if cursor.rowcount == 0:
-                sql_res.append({"content": "No record in the database!"})
-                break
-            if self._param.db_type == 'mssql':
-                single_res = pd.DataFrame.from_records(cursor.fetchmany(self._param.max_records),
-                                                       columns=[desc[0] for desc in cursor.description])
-            else:
-                single_res = pd.DataFrame([i for i in cursor.fetchmany(self._param.max_records)])
-                single_res.columns = [i[0] for i in cursor.description]
-
-            for col in single_res.columns:
-                if pd.api.types.is_datetime64_any_dtype(single_res[col]):
-                    single_res[col] = single_res[col].dt.strftime('%Y-%m-%d')
-
-            single_res = single_res.where(pd.notnull(single_res), None)
-
-            sql_res.append(convert_decimals(single_res.to_dict(orient='records')))
-            formalized_content.append(single_res.to_markdown(index=False, floatfmt=".6f"))
-
-        cursor.close()
-        db.close()
+                    if self._param.db_type == 'IBM DB2':
+                        continue
+                    break
+
+                single_res = pd.DataFrame.from_records(fetched.rows, columns=columns)
+                for col in single_res.columns:
+                    if pd.api.types.is_datetime64_any_dtype(single_res[col]):
+                        single_res[col] = single_res[col].dt.strftime('%Y-%m-%d')
+
+                single_res = single_res.where(pd.notnull(single_res), None)
+
+                sql_res.append(convert_decimals(single_res.to_dict(orient='records')))
+                content = single_res.to_markdown(index=False, floatfmt=".6f")
+                if fetched.over_bytes:
+                    content += f"\n\n(Only the first {len(single_res)} rows fit in {EXESQL_MAX_RESULT_BYTES} bytes.)"
+                formalized_content.append(content)
 
         self.set_output("json", sql_res)
         self.set_output("formalized_content", "\n\n".join(formalized_content))
@@ -17,9 +17,9 @@ import logging
 import os
 import time
 from abc import ABC
-import requests
 from agent.tools.base import ToolParamBase, ToolMeta, ToolBase
 from common.connection_utils import timeout
+from common.http_client import pooled_request
 
 
 class GitHubParam(ToolParamBase):
@@ -75,7 +75,7 @@ class GitHub(ToolBase, ABC):
                 url = 'https://api.github.com/search/repositories?q=' + kwargs["query"] + '&sort=stars&order=desc&per_page=' + str(
                     self._param.top_n)
                 headers = {"Content-Type": "application/vnd.github+json", "X-GitHub-Api-Version": '2022-11-28'}
-                response = requests.get(url=url, headers=headers).json()
+                response = pooled_request("GET", url, headers=headers, timeout=10).json()
 
                 if self.check_if_canceled("GitHub processing"):
                     return
@@ -17,9 +17,10 @@ import logging
 import os
 import time
 from abc import ABC
-import requests
+import httpx
 from agent.tools.base import ToolMeta, ToolParamBase, ToolBase
 from common.connection_utils import timeout
+from common.http_client import pooled_request
 
 
 class SearXNGParam(ToolParamBase):
@@ -109,7 +110,8 @@ class SearXNG(ToolBase, ABC):
                     'pageno': 1
                 }
 
-                response = requests.get(
+                response = pooled_request(
+                    "GET",
                     f"{searxng_url}/search",
                     params=search_params,
                     timeout=10
@@ -141,7 +143,7 @@ class SearXNG(ToolBase, ABC):
                 self.set_output("json", results)
                 return self.output("formalized_content")
 
-            except requests.RequestException as e:
+            except httpx.HTTPError as e:
                 if self.check_if_canceled("SearXNG processing"):
                     return
 
@@ -13,6 +13,7 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 #
+import asyncio
 import logging
 import os
 import sys
@@ -21,8 +22,7 @@ from pathlib import Path
 from quart import Blueprint, Quart, request, g, current_app, session
 from itsdangerous.url_safe import URLSafeTimedSerializer as Serializer
 from quart_cors import cors
-from common.constants import StatusEnum
-from api.db.db_models import close_connection, APIToken
+from api.db.db_models import close_connection
 from api.db.services import UserService
 from api.utils.json_encode import CustomJSONEncoder
 from api.utils import commands
@@ -75,10 +75,9 @@ T = TypeVar("T")
 P = ParamSpec("P")
 
 
-def _load_user():
+def _resolve_user(cached_only=False):
     jwt = Serializer(secret_key=settings.SECRET_KEY)
     authorization = request.headers.get("Authorization")
-    g.user = None
     if not authorization:
         return None
 
@@ -94,33 +93,52 @@ def _load_user():
             logging.warning(f"Authentication attempt with invalid token format: {len(access_token)} chars")
             return None
 
-        user = UserService.query(
-            access_token=access_token, status=StatusEnum.VALID.value
-        )
+        if cached_only:
+            user = UserService.peek_auth_cache(access_token=access_token)
+        else:
+            user = UserService.get_by_access_token(access_token)
         if user:
-            if not user[0].access_token or not user[0].access_token.strip():
-                logging.warning(f"User {user[0].email} has empty access_token in database")
+            if not user.access_token or not user.access_token.strip():
+                logging.warning(f"User {user.email} has empty access_token in database")
                 return None
-            g.user = user[0]
-            return user[0]
+            return user
     except Exception as e_auth:
-        logging.warning(f"load_user got exception {e_auth}")
+        if not cached_only:
+            logging.warning(f"load_user got exception {e_auth}")
         try:
             authorization = request.headers.get("Authorization")
             if len(authorization.split()) == 2:
-                objs = APIToken.query(token=authorization.split()[1])
-                if objs:
-                    user = UserService.query(id=objs[0].tenant_id, status=StatusEnum.VALID.value)
-                    if user:
-                        if not user[0].access_token or not user[0].access_token.strip():
-                            logging.warning(f"User {user[0].email} has empty access_token in database")
-                            return None
-                        g.user = user[0]
-                        return user[0]
+                if cached_only:
+                    user = UserService.peek_auth_cache(api_token=authorization.split()[1])
+                else:
+                    user = UserService.get_by_api_token(authorization.split()[1])
+                if user:
+                    if not user.access_token or not user.access_token.strip():
+                        logging.warning(f"User {user.email} has empty access_token in database")
+                        return None
+                    return user
         except Exception as e_api_token:
             logging.warning(f"load_user got exception {e_api_token}")
 
 
+def _load_user():
+    if "user" not in g:
+        g.user = _resolve_user()
+    return g.user
+
+
+@app.before_request
+async def _preload_user():
+    # Resolve the user once per request, off the event loop on a cache miss;
+    # current_user then reads it from g, also when no user matches the token.
+    user = None
+    if request.headers.get("Authorization"):
+        user = _resolve_user(cached_only=True)
+        if user is None:
+            user = await asyncio.to_thread(_resolve_user)
+    g.user = user
+
+
 current_user = LocalProxy(_load_user)
 
 
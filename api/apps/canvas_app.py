@@ -25,7 +25,7 @@ from api.db.services.canvas_service import CanvasTemplateService, UserCanvasServ
 from api.db.services.document_service import DocumentService
 from api.db.services.file_service import FileService
 from api.db.services.pipeline_operation_log_service import PipelineOperationLogService
-from api.db.services.task_service import queue_dataflow, CANVAS_DEBUG_DOC_ID, TaskService
+from api.db.services.task_service import queue_dataflow, CANVAS_DEBUG_DOC_ID, TaskCancellation, TaskService
 from api.db.services.user_service import TenantService
 from api.db.services.user_canvas_version import UserCanvasVersionService
 from common.constants import RetCode
@@ -37,7 +37,7 @@ from peewee import MySQLDatabase, PostgresqlDatabase
 from api.db.db_models import APIToken, Task
 import time
 
-from rag.flow.pipeline import Pipeline
+from rag.flow.pipeline import Pipeline, PipelineTrace
 from rag.nlp import search
 from rag.utils.redis_conn import REDIS_CONN
 from common import settings
@@ -212,7 +212,7 @@ async def rerun():
 @login_required
 def cancel(task_id):
     try:
-        REDIS_CONN.set(f"{task_id}-cancel", "x")
+        TaskCancellation.cancel(task_id)
     except Exception as e:
         logging.exception(e)
     return get_json_result(data=True)
@@ -497,6 +497,8 @@ def trace():
     cvs_id = request.args.get("canvas_id")
     msg_id = request.args.get("message_id")
     try:
+        if PipelineTrace.exists(cvs_id, msg_id):
+            return get_json_result(data=PipelineTrace.load(cvs_id, msg_id))
         binary = REDIS_CONN.get(f"{cvs_id}-{msg_id}-logs")
         if not binary:
             return get_json_result(data={})
@@ -21,6 +21,7 @@ import base64
 import xxhash
 from quart import request
 
+from api.db.db_executor import run_db
 from api.db.services.document_service import DocumentService
 from api.db.services.knowledgebase_service import KnowledgebaseService
 from api.db.services.llm_service import LLMBundle
@@ -327,7 +328,7 @@ async def retrieval_test():
         meta_data_filter = {}
         chat_mdl = None
         if req.get("search_id", ""):
-            search_config = SearchService.get_detail(req.get("search_id", "")).get("search_config", {})
+            search_config = (await run_db(SearchService.get_detail, req.get("search_id", ""))).get("search_config", {})
             meta_data_filter = search_config.get("meta_data_filter", {})
             if meta_data_filter.get("method") in ["auto", "semi_auto"]:
                 chat_mdl = LLMBundle(user_id, LLMType.CHAT, llm_name=search_config.get("chat_id", ""))
@@ -337,13 +338,13 @@ async def retrieval_test():
                 chat_mdl = LLMBundle(user_id, LLMType.CHAT)
 
         if meta_data_filter:
-            metas = DocumentService.get_meta_by_kbs(kb_ids)
+            metas = await DocumentService.get_meta_by_kbs.aio(kb_ids)
             local_doc_ids = await apply_meta_data_filter(meta_data_filter, metas, question, chat_mdl, local_doc_ids)
 
-        tenants = UserTenantService.query(user_id=user_id)
+        tenants = await UserTenantService.query.aio(user_id=user_id)
         for kb_id in kb_ids:
             for tenant in tenants:
-                if KnowledgebaseService.query(
+                if await KnowledgebaseService.query.aio(
                         tenant_id=tenant.tenant_id, id=kb_id):
                     tenant_ids.append(tenant.tenant_id)
                     break
@@ -352,7 +353,7 @@ async def retrieval_test():
                     data=False, message='Only owner of dataset authorized for this operation.',
                     code=RetCode.OPERATING_ERROR)
 
-        e, kb = KnowledgebaseService.get_by_id(kb_ids[0])
+        e, kb = await KnowledgebaseService.get_by_id.aio(kb_ids[0])
         if not e:
             return get_data_error_result(message="Knowledgebase not found!")
 
@@ -21,6 +21,7 @@ from copy import deepcopy
 import tempfile
 from quart import Response, request
 from api.apps import current_user, login_required
+from api.db.db_executor import run_db
 from api.db.db_models import APIToken
 from api.db.services.conversation_service import ConversationService, structure_answer
 from api.db.services.dialog_service import DialogService, async_ask, async_chat, gen_mindmap
@@ -194,11 +195,11 @@ async def completion():
             chat_model_config[model_config] = config
 
     try:
-        e, conv = ConversationService.get_by_id(req["conversation_id"])
+        e, conv = await ConversationService.get_by_id.aio(req["conversation_id"])
         if not e:
             return get_data_error_result(message="Conversation not found!")
         conv.message = deepcopy(req["messages"])
-        e, dia = DialogService.get_by_id(conv.dialog_id)
+        e, dia = await DialogService.get_by_id.aio(conv.dialog_id)
         if not e:
             return get_data_error_result(message="Dialog not found!")
         del req["conversation_id"]
@@ -210,7 +211,7 @@ async def completion():
         conv.reference.append({"chunks": [], "doc_aggs": []})
 
         if chat_model_id:
-            if not TenantLLMService.get_api_key(tenant_id=dia.tenant_id, model_name=chat_model_id):
+            if not await run_db(TenantLLMService.get_api_key, tenant_id=dia.tenant_id, model_name=chat_model_id):
                 req.pop("chat_model_id", None)
                 req.pop("chat_model_config", None)
                 return get_data_error_result(message=f"Cannot use specified model {chat_model_id}.")
@@ -225,7 +226,7 @@ async def completion():
                     ans = structure_answer(conv, ans, message_id, conv.id)
                     yield "data:" + json.dumps({"code": 0, "message": "", "data": ans}, ensure_ascii=False) + "\n\n"
                 if not is_embedded:
-                    ConversationService.update_by_id(conv.id, conv.to_dict())
+                    await ConversationService.update_by_id.aio(conv.id, conv.to_dict())
             except Exception as e:
                 logging.exception(e)
                 yield "data:" + json.dumps({"code": 500, "message": str(e), "data": {"answer": "**ERROR**: " + str(e), "reference": []}}, ensure_ascii=False) + "\n\n"
@@ -244,7 +245,7 @@ async def completion():
             async for ans in async_chat(dia, msg, **req):
                 answer = structure_answer(conv, ans, message_id, conv.id)
                 if not is_embedded:
-                    ConversationService.update_by_id(conv.id, conv.to_dict())
+                    await ConversationService.update_by_id.aio(conv.id, conv.to_dict())
                 break
             return get_json_result(data=answer)
     except Exception as e:
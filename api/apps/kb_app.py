@@ -28,7 +28,7 @@ from api.db.services.document_service import DocumentService, queue_raptor_o_gra
 from api.db.services.file2document_service import File2DocumentService
 from api.db.services.file_service import FileService
 from api.db.services.pipeline_operation_log_service import PipelineOperationLogService
-from api.db.services.task_service import TaskService, GRAPH_RAPTOR_FAKE_DOC_ID
+from api.db.services.task_service import TaskCancellation, TaskService, GRAPH_RAPTOR_FAKE_DOC_ID
 from api.db.services.user_service import TenantService, UserTenantService
 from api.utils.api_utils import get_error_data_result, server_error_response, get_data_error_result, validate_request, not_allowed_parameters, \
     get_request_json
@@ -38,7 +38,6 @@ from api.db.db_models import File
 from api.utils.api_utils import get_json_result
 from rag.nlp import search
 from api.constants import DATASET_NAME_LIMIT
-from rag.utils.redis_conn import REDIS_CONN
 from common.constants import RetCode, PipelineTaskType, StatusEnum, VALID_TASK_STATUS, FileSource, LLMType, PAGERANK_FLD
 from common import settings
 from common.doc_store.doc_store_base import OrderByExpr
@@ -785,7 +784,7 @@ def delete_kb_task():
         return get_error_data_result(message="Invalid task type")
 
     def cancel_task(task_id):
-        REDIS_CONN.set(f"{task_id}-cancel", "x")
+        TaskCancellation.cancel(task_id)
 
     kb_task_id_field: str = ""
     kb_task_finish_at: str = ""
@@ -26,7 +26,7 @@ from common.constants import RetCode, VALID_MCP_SERVER_TYPES
 from common.misc_utils import get_uuid
 from api.utils.api_utils import get_data_error_result, get_json_result, get_mcp_tools, get_request_json, server_error_response, validate_request
 from api.utils.web_utils import get_float, safe_json_parse
-from common.mcp_tool_call_conn import MCPToolCallSession, close_multiple_mcp_toolcall_sessions
+from common.mcp_tool_call_conn import MCP_SESSION_POOL, MCPToolCallSession, close_multiple_mcp_toolcall_sessions
 
 
 @manager.route("/list", methods=["POST"])  # noqa: F821
@@ -310,7 +310,6 @@ async def list_tools() -> Response:
     timeout = get_float(req, "timeout", 10)
 
     results = {}
-    tool_call_sessions = []
     try:
         for mcp_id in mcp_ids:
             e, mcp_server = MCPServerService.get_by_id(mcp_id)
@@ -320,8 +319,7 @@ async def list_tools() -> Response:
 
                 cached_tools = mcp_server.variables.get("tools", {})
 
-                tool_call_session = MCPToolCallSession(mcp_server, mcp_server.variables)
-                tool_call_sessions.append(tool_call_session)
+                tool_call_session = MCP_SESSION_POOL.get(mcp_server, mcp_server.variables)
 
                 try:
                     tools = await asyncio.to_thread(tool_call_session.get_tools, timeout)
@@ -339,9 +337,6 @@ async def list_tools() -> Response:
         return get_json_result(data=results)
     except Exception as e:
         return server_error_response(e)
-    finally:
-        # PERF: blocking call to close sessions — consider moving to background thread or task queue
-        await asyncio.to_thread(close_multiple_mcp_toolcall_sessions, tool_call_sessions)
 
 
 @manager.route("/test_tool", methods=["POST"])  # noqa: F821
@@ -360,18 +355,14 @@ async def test_tool() -> Response:
     if not all([tool_name, arguments]):
         return get_data_error_result(message="Require provide tool name and arguments.")
 
-    tool_call_sessions = []
     try:
         e, mcp_server = MCPServerService.get_by_id(mcp_id)
         if not e or mcp_server.tenant_id != current_user.id:
             return get_data_error_result(message=f"Cannot find MCP server {mcp_id} for user {current_user.id}")
 
-        tool_call_session = MCPToolCallSession(mcp_server, mcp_server.variables)
-        tool_call_sessions.append(tool_call_session)
+        tool_call_session = MCP_SESSION_POOL.get(mcp_server, mcp_server.variables)
         result = await asyncio.to_thread(tool_call_session.tool_call, tool_name, arguments, timeout)
 
-        # PERF: blocking call to close sessions — consider moving to background thread or task queue
-        await asyncio.to_thread(close_multiple_mcp_toolcall_sessions, tool_call_sessions)
         return get_json_result(data=result)
     except Exception as e:
         return server_error_response(e)
@@ -27,6 +27,7 @@ from pydantic import BaseModel, Field, validator
 
 from api.constants import FILE_NAME_LEN_LIMIT
 from api.db import FileType
+from api.db.db_executor import run_db
 from api.db.db_models import File, Task
 from api.db.services.document_service import DocumentService
 from api.db.services.file2document_service import File2DocumentService
@@ -1500,9 +1501,9 @@ async def retrieval_test(tenant_id):
     if not isinstance(kb_ids, list):
         return get_error_data_result("`dataset_ids` should be a list")
     for id in kb_ids:
-        if not KnowledgebaseService.accessible(kb_id=id, user_id=tenant_id):
+        if not await run_db(KnowledgebaseService.accessible, kb_id=id, user_id=tenant_id):
             return get_error_data_result(f"You don't own the dataset {id}.")
-    kbs = KnowledgebaseService.get_by_ids(kb_ids)
+    kbs = await run_db(KnowledgebaseService.get_by_ids, kb_ids)
     embd_nms = list(set([TenantLLMService.split_model_name_and_factory(kb.embd_id)[0] for kb in kbs]))  # remove vendor suffix for comparison
     if len(embd_nms) != 1:
         return get_result(
@@ -1521,13 +1522,13 @@ async def retrieval_test(tenant_id):
     if not isinstance(doc_ids, list):
         return get_error_data_result("`documents` should be a list")   
     if doc_ids: 
-        doc_ids_list = KnowledgebaseService.list_documents_by_ids(kb_ids)
+        doc_ids_list = await run_db(KnowledgebaseService.list_documents_by_ids, kb_ids)
         for doc_id in doc_ids:
             if doc_id not in doc_ids_list:
                 return get_error_data_result(f"The datasets don't own the document {doc_id}")
     if not doc_ids:
         metadata_condition = req.get("metadata_condition", {}) or {}
-        metas = DocumentService.get_meta_by_kbs(kb_ids)
+        metas = await DocumentService.get_meta_by_kbs.aio(kb_ids)
         doc_ids = meta_filter(metas, convert_conditions(metadata_condition), metadata_condition.get("logic", "and"))
         # If metadata_condition has conditions but no docs match, return empty result
         if not doc_ids and metadata_condition.get("conditions"):
@@ -1543,7 +1544,7 @@ async def retrieval_test(tenant_id):
         highlight = True
     try:
         tenant_ids = list(set([kb.tenant_id for kb in kbs]))
-        e, kb = KnowledgebaseService.get_by_id(kb_ids[0])
+        e, kb = await KnowledgebaseService.get_by_id.aio(kb_ids[0])
         if not e:
             return get_error_data_result(message="Dataset not found!")
         embd_mdl = LLMBundle(kb.tenant_id, LLMType.EMBEDDING, llm_name=kb.embd_id)
@@ -19,6 +19,7 @@ import json
 
 from api.apps import login_required, current_user
 
+from api.db.db_executor import DB_EXECUTOR
 from api.db.db_models import APIToken
 from api.db.services.api_service import APITokenService
 from api.db.services.knowledgebase_service import KnowledgebaseService
@@ -132,6 +133,7 @@ def status():
             "database": settings.DATABASE_TYPE.lower(),
             "status": "green",
             "elapsed": "{:.1f}".format((timer() - st) * 1000.0),
+            "executor": DB_EXECUTOR.metrics(),
         }
     except Exception as e:
         res["database"] = {
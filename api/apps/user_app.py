@@ -130,6 +130,7 @@ async def login():
         user.update_time = current_timestamp()
         user.update_date = datetime_format(datetime.now())
         user.save()
+        UserService.invalidate_auth_cache(user.id)
         msg = "Welcome back!"
 
         return await construct_response(data=response_data, auth=user.get_id(), message=msg)
@@ -264,6 +265,7 @@ async def oauth_callback(channel):
 
         login_user(user)
         user.save()
+        UserService.invalidate_auth_cache(user.id)
         return redirect(f"/?auth={user.get_id()}")
     except Exception as e:
         logging.exception(e)
@@ -355,6 +357,7 @@ async def github_callback():
         return redirect("/?error=user_inactive")
     login_user(user)
     user.save()
+    UserService.invalidate_auth_cache(user.id)
     return redirect("/?auth=%s" % user.get_id())
 
 
@@ -459,6 +462,7 @@ async def feishu_callback():
     user.access_token = get_uuid()
     login_user(user)
     user.save()
+    UserService.invalidate_auth_cache(user.id)
     return redirect("/?auth=%s" % user.get_id())
 
 
@@ -505,6 +509,7 @@ async def log_out():
     """
     current_user.access_token = f"INVALID_{secrets.token_hex(16)}"
     current_user.save()
+    UserService.invalidate_auth_cache(current_user.id)
     logout_user()
     return get_json_result(data=True)
 
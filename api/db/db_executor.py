@@ -0,0 +1,130 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+"""
+Run blocking peewee calls from async handlers without stalling the event loop.
+
+Service methods stay synchronous. Async code awaits them on a dedicated,
+bounded thread pool, either with `run_db(Service.method, ...)` or, for
+methods marked `@offloadable`, with `Service.method.aio(...)`:
+
+    class DialogService(CommonService):
+        @offloadable
+        @classmethod
+        @DB.connection_context()
+        def get_by_id(cls, pid): ...
+
+    e, dia = await DialogService.get_by_id.aio(dialog_id)
+
+Each call runs inside its own connection context, so a worker thread returns
+its connection to the pool as soon as the call is done. Lazy peewee queries
+are materialized in the worker, never on the loop.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from peewee import BaseQuery
+
+from api.db.db_models import DB
+
+DB_EXECUTOR_WORKERS = int(os.environ.get("DB_EXECUTOR_WORKERS", 32))
+
+
+class DBExecutor:
+    def __init__(self, max_workers: int = DB_EXECUTOR_WORKERS, db=DB):
+        self.max_workers = max_workers
+        self.db = db
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db_executor")
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "queued": 0, "running": 0,
+                       "queue_wait_total": 0.0, "queue_wait_max": 0.0, "run_time_total": 0.0}
+
+    def _call(self, submitted_at, func, args, kwargs):
+        started_at = time.perf_counter()
+        wait = started_at - submitted_at
+        with self._lock:
+            self._stats["queued"] -= 1
+            self._stats["running"] += 1
+            self._stats["queue_wait_total"] += wait
+            self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], wait)
+        failed = True
+        try:
+            with self.db.connection_context():
+                res = func(*args, **kwargs)
+                if isinstance(res, BaseQuery):
+                    res = list(res)
+            failed = False
+            return res
+        finally:
+            with self._lock:
+                self._stats["running"] -= 1
+                self._stats["completed" if not failed else "failed"] += 1
+                self._stats["run_time_total"] += time.perf_counter() - started_at
+
+    async def run(self, func, *args, **kwargs):
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._stats["queued"] += 1
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, self._call, time.perf_counter(), func, args, kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._pool, call)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        done = stats["completed"] + stats["failed"]
+        stats["max_workers"] = self.max_workers
+        stats["queue_wait_avg"] = stats["queue_wait_total"] / max(done + stats["running"], 1)
+        stats["run_time_avg"] = stats["run_time_total"] / max(done, 1)
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+DB_EXECUTOR = DBExecutor()
+
+
+async def run_db(func, *args, **kwargs):
+    return await DB_EXECUTOR.run(func, *args, **kwargs)
+
+
+class _OffloadableCall:
+    def __init__(self, bound):
+        self._bound = bound
+        functools.update_wrapper(self, bound)
+
+    def __call__(self, *args, **kwargs):
+        return self._bound(*args, **kwargs)
+
+    async def aio(self, *args, **kwargs):
+        return await run_db(self._bound, *args, **kwargs)
+
+
+class offloadable:
+    """Mark a service method as safe to run on the DB executor and expose it as `method.aio`."""
+
+    def __init__(self, method):
+        self._method = method
+        functools.update_wrapper(self, method.__func__ if isinstance(method, classmethod) else method)
+
+    def __get__(self, obj, objtype=None):
+        return _OffloadableCall(self._method.__get__(obj, objtype))
@@ -13,7 +13,9 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 #
+import asyncio
 import logging
+import os
 from typing import List
 
 from common import settings
@@ -136,7 +138,7 @@ async def save_extracted_to_memory_only(memory_id: str, message_dict, source_mes
 
     if task_id:
         TaskService.update_progress(task_id, {"progress": 0.5, "progress_msg": timestamp_to_date(current_timestamp())+ " " + f"Extracted {len(message_list)} messages from raw dialogue."})
-    return await embed_and_save(memory, message_list, task_id)
+    return await embed_and_save(memory, message_list)
 
 
 async def extract_by_llm(tenant_id: str, llm_id: str, extract_conf: dict, memory_type: List[str], user_input: str,
@@ -169,47 +171,103 @@ async def extract_by_llm(tenant_id: str, llm_id: str, extract_conf: dict, memory
     } for message_type, extracted_content_list in res_json.items() for extracted_content in extracted_content_list]
 
 
-async def embed_and_save(memory, message_list: list[dict], task_id: str=None):
+MEMORY_WRITE_BATCH_WINDOW = float(os.environ.get("MEMORY_WRITE_BATCH_WINDOW", 0.05))
+MEMORY_WRITE_BATCH_SIZE = int(os.environ.get("MEMORY_WRITE_BATCH_SIZE", 256))
+
+
+class MemoryWriteCoalescer:
+    """
+    Groups concurrent saves to the same memory so they share one embedding
+    call, one index check, one eviction decision and one bulk insert.
+
+    Callers await their own result; the first caller for a (tenant, memory)
+    starts a flusher that collects whatever arrives within the batch window.
+    """
+
+    def __init__(self, window: float = MEMORY_WRITE_BATCH_WINDOW, max_batch: int = MEMORY_WRITE_BATCH_SIZE):
+        self._window = window
+        self._max_batch = max(1, max_batch)
+        self._pending = {}
+        self._flushers = {}
+
+    async def submit(self, memory, message_list: list[dict]):
+        loop = asyncio.get_running_loop()
+        key = (loop, memory.tenant_id, memory.id)
+        fut = loop.create_future()
+        self._pending.setdefault(key, []).append((memory, message_list, fut))
+        if key not in self._flushers:
+            self._flushers[key] = asyncio.create_task(self._run(key))
+        return await fut
+
+    async def _run(self, key):
+        try:
+            while self._pending.get(key):
+                if sum(len(p[1]) for p in self._pending[key]) < self._max_batch:
+                    await asyncio.sleep(self._window)
+                pending = self._pending.pop(key)
+                batch, size = [], 0
+                for item in pending:
+                    if batch and size + len(item[1]) > self._max_batch:
+                        await self._flush(batch)
+                        batch, size = [], 0
+                    batch.append(item)
+                    size += len(item[1])
+                if batch:
+                    await self._flush(batch)
+        finally:
+            self._flushers.pop(key, None)
+
+    @staticmethod
+    async def _flush(batch):
+        memory = batch[-1][0]
+        message_list = [m for _, msgs, _ in batch for m in msgs]
+        try:
+            result = await _embed_and_save(memory, message_list)
+        except Exception as e:
+            logging.exception(f"Failed to save {len(message_list)} messages to memory {memory.id}")
+            result = (False, str(e))
+        for _, _, fut in batch:
+            if not fut.done():
+                fut.set_result(result)
+
+
+MEMORY_WRITER = MemoryWriteCoalescer()
+
+
+async def embed_and_save(memory, message_list: list[dict]):
+    if not message_list:
+        return True, "No message to save."
+    return await MEMORY_WRITER.submit(memory, message_list)
+
+
+async def _embed_and_save(memory, message_list: list[dict]):
     embedding_model = LLMBundle(memory.tenant_id, llm_type=LLMType.EMBEDDING, llm_name=memory.embd_id)
-    if task_id:
-        TaskService.update_progress(task_id, {"progress": 0.65, "progress_msg": timestamp_to_date(current_timestamp())+ " " + "Prepared embedding model."})
-    vector_list, _ = embedding_model.encode([msg["content"] for msg in message_list])
+    vector_list, _ = await asyncio.to_thread(embedding_model.encode, [msg["content"] for msg in message_list])
     for idx, msg in enumerate(message_list):
         msg["content_embed"] = vector_list[idx]
-    if task_id:
-        TaskService.update_progress(task_id, {"progress": 0.85, "progress_msg": timestamp_to_date(current_timestamp())+ " " + "Embedded extracted content."})
     vector_dimension = len(vector_list[0])
-    if not MessageService.has_index(memory.tenant_id, memory.id):
-        created = MessageService.create_index(memory.tenant_id, memory.id, vector_size=vector_dimension)
+    if not await asyncio.to_thread(MessageService.has_index_cached, memory.tenant_id, memory.id):
+        created = await asyncio.to_thread(MessageService.create_index, memory.tenant_id, memory.id, vector_size=vector_dimension)
         if not created:
-            error_msg = "Failed to create message index."
-            if task_id:
-                TaskService.update_progress(task_id, {"progress": -1, "progress_msg": timestamp_to_date(current_timestamp())+ " " + error_msg})
-            return False, error_msg
+            return False, "Failed to create message index."
 
-    new_msg_size = sum([MessageService.calculate_message_size(m) for m in message_list])
-    current_memory_size = get_memory_size_cache(memory.tenant_id, memory.id)
+    for msg in message_list:
+        msg["size"] = MessageService.calculate_message_size(msg)
+    new_msg_size = sum([msg["size"] for msg in message_list])
+    current_memory_size = await asyncio.to_thread(get_memory_size_cache, memory.id, memory.tenant_id)
     if new_msg_size + current_memory_size > memory.memory_size:
         size_to_delete = current_memory_size + new_msg_size - memory.memory_size
         if memory.forgetting_policy == "FIFO":
-            message_ids_to_delete, delete_size = MessageService.pick_messages_to_delete_by_fifo(memory.id, memory.tenant_id,
-                                                                                                size_to_delete)
-            MessageService.delete_message({"message_id": message_ids_to_delete}, memory.tenant_id, memory.id)
+            message_ids_to_delete, delete_size = await asyncio.to_thread(MessageService.pick_messages_to_delete_by_fifo, memory.id, memory.tenant_id,
+                                                                         size_to_delete)
+            await asyncio.to_thread(MessageService.delete_message, {"message_id": message_ids_to_delete}, memory.tenant_id, memory.id)
             decrease_memory_size_cache(memory.id, delete_size)
         else:
-            error_msg = "Failed to insert message into memory. Memory size reached limit and cannot decide which to delete."
-            if task_id:
-                TaskService.update_progress(task_id, {"progress": -1, "progress_msg": timestamp_to_date(current_timestamp())+ " " + error_msg})
-            return False, error_msg
-    fail_cases = MessageService.insert_message(message_list, memory.tenant_id, memory.id)
+            return False, "Failed to insert message into memory. Memory size reached limit and cannot decide which to delete."
+    fail_cases = await asyncio.to_thread(MessageService.insert_message, message_list, memory.tenant_id, memory.id)
     if fail_cases:
-        error_msg = "Failed to insert message into memory. Details: " + "; ".join(fail_cases)
-        if task_id:
-            TaskService.update_progress(task_id, {"progress": -1, "progress_msg": timestamp_to_date(current_timestamp())+ " " + error_msg})
-        return False, error_msg
+        return False, "Failed to insert message into memory. Details: " + "; ".join(fail_cases)
 
-    if task_id:
-        TaskService.update_progress(task_id, {"progress": 0.95, "progress_msg": timestamp_to_date(current_timestamp())+ " " + "Saved messages to storage."})
     increase_memory_size_cache(memory.id, new_msg_size)
     return True, "Message saved successfully."
 
@@ -333,6 +391,7 @@ async def queue_save_to_memory_task(memory_ids: list[str], message_dict: dict):
 
     not_found_memory = []
     failed_memory = []
+    pending = []
     for memory_id in memory_ids:
         memory = MemoryService.get_by_memory_id(memory_id)
         if not memory:
@@ -354,7 +413,11 @@ async def queue_save_to_memory_task(memory_ids: list[str], message_dict: dict):
             "forget_at": None,
             "status": True
         }
-        res, msg = await embed_and_save(memory, [raw_message])
+        pending.append((memory_id, raw_message_id, embed_and_save(memory, [raw_message])))
+
+    # Different memories are written concurrently; writes to the same memory are coalesced.
+    results = await asyncio.gather(*[coro for _, _, coro in pending])
+    for (memory_id, raw_message_id, _), (res, msg) in zip(pending, results):
         if not res:
             failed_memory.append({"memory_id": memory_id, "fail_msg": msg})
             continue
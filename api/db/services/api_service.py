@@ -13,17 +13,46 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 #
+import os
 from datetime import datetime
 
 import peewee
 
 from api.db.db_models import DB, API4Conversation, APIToken, Dialog
 from api.db.services.common_service import CommonService
+from common.misc_utils import TTLCache
 from common.time_utils import current_timestamp, datetime_format
 
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", 10000))
+AUTH_CACHE_TTL = float(os.environ.get("AUTH_CACHE_TTL", 30))
+
 
 class APITokenService(CommonService):
     model = APIToken
+    # API token -> tenant id. Deletions in this process invalidate it, other processes see them within AUTH_CACHE_TTL.
+    _tenant_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+
+    @classmethod
+    def get_tenant_id(cls, token):
+        tenant_id = cls._tenant_cache.get(token)
+        if tenant_id is None:
+            objs = cls.query(token=token)
+            if not objs:
+                return None
+            tenant_id = objs[0].tenant_id
+            cls._tenant_cache.set(token, tenant_id)
+        return tenant_id
+
+    @classmethod
+    def get_cached_tenant_id(cls, token):
+        return cls._tenant_cache.get(token)
+
+    @classmethod
+    def filter_delete(cls, filters):
+        try:
+            return super().filter_delete(filters)
+        finally:
+            cls._tenant_cache.clear()
 
     @classmethod
     @DB.connection_context()
@@ -38,7 +67,9 @@ class APITokenService(CommonService):
     @classmethod
     @DB.connection_context()
     def delete_by_tenant_id(cls, tenant_id):
-        return cls.model.delete().where(cls.model.tenant_id == tenant_id).execute()
+        num = cls.model.delete().where(cls.model.tenant_id == tenant_id).execute()
+        cls._tenant_cache.pop_where(lambda _, v: v == tenant_id)
+        return num
 
 
 class API4ConversationService(CommonService):
@@ -18,6 +18,7 @@ from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_excep
 import peewee
 from peewee import InterfaceError, OperationalError
 
+from api.db.db_executor import offloadable
 from api.db.db_models import DB
 from common.misc_utils import get_uuid
 from common.time_utils import current_timestamp, datetime_format
@@ -48,6 +49,7 @@ class CommonService:
 
     model = None
 
+    @offloadable
     @classmethod
     @DB.connection_context()
     def query(cls, cols=None, reverse=None, order_by=None, **kwargs):
@@ -136,6 +138,7 @@ class CommonService:
         except peewee.DoesNotExist:
             return None
 
+    @offloadable
     @classmethod
     @DB.connection_context()
     def save(cls, **kwargs):
@@ -224,6 +227,7 @@ class CommonService:
             for data in data_list:
                 cls.model.update(data).where(cls.model.id == data["id"]).execute()
 
+    @offloadable
     @classmethod
     @DB.connection_context()
     @retry_db_operation
@@ -239,6 +243,7 @@ class CommonService:
         num = cls.model.update(data).where(cls.model.id == pid).execute()
         return num
 
+    @offloadable
     @classmethod
     @DB.connection_context()
     def get_by_id(cls, pid):
@@ -18,6 +18,7 @@ from datetime import datetime
 import os
 from typing import Tuple, List
 
+import xxhash
 from anthropic import BaseModel
 from peewee import SQL, fn
 
@@ -204,29 +205,65 @@ class SyncLogsService(CommonService):
         class FileObj(BaseModel):
             filename: str
             blob: bytes
+            source_doc_id: str = ""
+            content_hash: str = ""
 
             def read(self) -> bytes:
                 return self.blob
 
+        def file_name(d):
+            return d["semantic_identifier"]+(f"{d['extension']}" if d["semantic_identifier"][::-1].find(d['extension'][::-1])<0 else "")
+
         errs = []
-        files = [FileObj(filename=d["semantic_identifier"]+(f"{d['extension']}" if d["semantic_identifier"][::-1].find(d['extension'][::-1])<0 else ""), blob=d["blob"]) for d in docs]
+        files = []
+        for d in docs:
+            files.append(FileObj(
+                filename=file_name(d),
+                blob=d["blob"],
+                source_doc_id=xxhash.xxh64(f"{src}/{d['id']}".encode("utf-8")).hexdigest(),
+                content_hash=xxhash.xxh128(d["blob"] or b"").hexdigest(),
+            ))
+
+        # Skip documents whose content did not change since the last sync and
+        # overwrite the ones that did, instead of uploading another copy.
+        existing = DocumentService.get_by_source_doc_ids(kb.id, [f.source_doc_id for f in files])
+        new_files, changed, skipped = [], [], 0
+        for d, f in zip(docs, files):
+            prev = existing.get(f.source_doc_id)
+            if not prev:
+                new_files.append(f)
+            elif prev["content_hash"] == f.content_hash:
+                skipped += 1
+                if d.get("metadata"):
+                    DocumentService.update_by_id(prev["id"], {"meta_fields": d["metadata"]})
+            else:
+                changed.append((prev, f, d.get("metadata")))
+        if skipped:
+            logging.info(f"{src}: {skipped} unchanged document(s) skipped for dataset {kb.id}")
+
         doc_ids = []
-        err, doc_blob_pairs = FileService.upload_document(kb, files, tenant_id, src)
+        err, doc_blob_pairs = FileService.upload_document(kb, new_files, tenant_id, src)
         errs.extend(err)
+        replaced = set()
+        for prev, f, meta in changed:
+            try:
+                doc_blob_pairs.append(FileService.replace_document_content(kb, prev, f.blob, f.content_hash, meta))
+                replaced.add(prev["id"])
+            except Exception as e:
+                errs.append(f.filename + ": " + str(e))
 
         # Create a mapping from filename to metadata for later use
         metadata_map = {}
         for d in docs:
             if d.get("metadata"):
-                filename = d["semantic_identifier"]+(f"{d['extension']}" if d["semantic_identifier"][::-1].find(d['extension'][::-1])<0 else "")
-                metadata_map[filename] = d["metadata"]
+                metadata_map[file_name(d)] = d["metadata"]
 
         kb_table_num_map = {}
         for doc, _ in doc_blob_pairs:
             doc_ids.append(doc["id"])
             
-            # Set metadata if available for this document
-            if doc["name"] in metadata_map:
+            # Set metadata if available for this document; replaced ones got it with the new content
+            if doc["id"] not in replaced and doc["name"] in metadata_map:
                 DocumentService.update_by_id(doc["id"], {"meta_fields": metadata_map[doc["name"]]})
             
             if not auto_parse or auto_parse == "0":
@@ -111,7 +111,7 @@ def structure_answer(conv, ans, message_id, session_id):
 
 async def async_completion(tenant_id, chat_id, question, name="New session", session_id=None, stream=True, **kwargs):
     assert name, "`name` can not be empty."
-    dia = DialogService.query(id=chat_id, tenant_id=tenant_id, status=StatusEnum.VALID.value)
+    dia = await DialogService.query.aio(id=chat_id, tenant_id=tenant_id, status=StatusEnum.VALID.value)
     assert dia, "You do not own the chat."
 
     if not session_id:
@@ -123,7 +123,7 @@ async def async_completion(tenant_id, chat_id, question, name="New session", ses
             "message": [{"role": "assistant", "content": dia[0].prompt_config.get("prologue"), "created_at": time.time()}],
             "user_id": kwargs.get("user_id", "")
         }
-        ConversationService.save(**conv)
+        await ConversationService.save.aio(**conv)
         if stream:
             yield "data:" + json.dumps({"code": 0, "message": "",
                                         "data": {
@@ -147,7 +147,7 @@ async def async_completion(tenant_id, chat_id, question, name="New session", ses
             yield answer
             return
 
-    conv = ConversationService.query(id=session_id, dialog_id=chat_id)
+    conv = await ConversationService.query.aio(id=session_id, dialog_id=chat_id)
     if not conv:
         raise LookupError("Session does not exist")
 
@@ -166,7 +166,7 @@ async def async_completion(tenant_id, chat_id, question, name="New session", ses
             continue
         msg.append(m)
     message_id = msg[-1].get("id")
-    e, dia = DialogService.get_by_id(conv.dialog_id)
+    e, dia = await DialogService.get_by_id.aio(conv.dialog_id)
 
     kb_ids = kwargs.get("kb_ids",[])
     dia.kb_ids = list(set(dia.kb_ids + kb_ids))
@@ -180,7 +180,7 @@ async def async_completion(tenant_id, chat_id, question, name="New session", ses
             async for ans in async_chat(dia, msg, True, **kwargs):
                 ans = structure_answer(conv, ans, message_id, session_id)
                 yield "data:" + json.dumps({"code": 0, "data": ans}, ensure_ascii=False) + "\n\n"
-            ConversationService.update_by_id(conv.id, conv.to_dict())
+            await ConversationService.update_by_id.aio(conv.id, conv.to_dict())
         except Exception as e:
             yield "data:" + json.dumps({"code": 500, "message": str(e),
                                         "data": {"answer": "**ERROR**: " + str(e), "reference": []}},
@@ -191,7 +191,7 @@ async def async_completion(tenant_id, chat_id, question, name="New session", ses
         answer = None
         async for ans in async_chat(dia, msg, False, **kwargs):
             answer = structure_answer(conv, ans, message_id, session_id)
-            ConversationService.update_by_id(conv.id, conv.to_dict())
+            await ConversationService.update_by_id.aio(conv.id, conv.to_dict())
             break
         yield answer
 
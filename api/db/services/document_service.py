@@ -28,6 +28,7 @@ from peewee import fn, Case, JOIN
 
 from api.constants import IMG_BASE64_PREFIX, FILE_NAME_LEN_LIMIT
 from api.db import PIPELINE_SPECIAL_PROGRESS_FREEZE_TASK_TYPES, FileType, UserTenantRole, CanvasCategory
+from api.db.db_executor import offloadable
 from api.db.db_models import DB, Document, Knowledgebase, Task, Tenant, UserTenant, File2Document, File, UserCanvas, \
     User
 from api.db.db_utils import bulk_insert_into_db
@@ -624,6 +625,16 @@ class DocumentService(CommonService):
         query = cls.model.select(cls.model.id).where(cls.model.name.in_(doc_names))
         return list(query.scalars().iterator())
 
+    @classmethod
+    @DB.connection_context()
+    def get_by_source_doc_ids(cls, kb_id, source_doc_ids):
+        if not source_doc_ids:
+            return {}
+        fields = [cls.model.id, cls.model.kb_id, cls.model.name, cls.model.location, cls.model.type,
+                  cls.model.source_doc_id, cls.model.content_hash]
+        docs = cls.model.select(*fields).where(cls.model.kb_id == kb_id, cls.model.source_doc_id.in_(source_doc_ids)).dicts()
+        return {d["source_doc_id"]: d for d in docs}
+
     @classmethod
     @DB.connection_context()
     def get_thumbnails(cls, docids):
@@ -683,6 +694,7 @@ class DocumentService(CommonService):
     def update_meta_fields(cls, doc_id, meta_fields):
         return cls.update_by_id(doc_id, {"meta_fields": meta_fields})
 
+    @offloadable
     @classmethod
     @DB.connection_context()
     def get_meta_by_kbs(cls, kb_ids):
@@ -898,70 +910,130 @@ class DocumentService(CommonService):
         cls._sync_progress(docs)
 
 
+    # doc id -> (task fingerprint, priority, queue length used in the message or None) last written by _sync_progress
+    _progress_fingerprints = {}
+
     @classmethod
     @DB.connection_context()
     def _sync_progress(cls, docs:list[dict]):
-        from api.db.services.task_service import TaskService
+        cls._sync_progress_batch(docs)
 
-        for d in docs:
+    @classmethod
+    def _sync_progress_batch(cls, docs:list[dict], batch_size:int=1000):
+        queue_lengths = {}
+
+        def queue_length(priority):
+            if priority not in queue_lengths:
+                queue_lengths[priority] = get_queue_length(priority)
+            return queue_lengths[priority]
+
+        for i in range(0, len(docs), batch_size):
             try:
-                tsks = TaskService.query(doc_id=d["id"], order_by=Task.create_time)
-                if not tsks:
-                    continue
-                msg = []
-                prg = 0
-                finished = True
-                bad = 0
-                e, doc = DocumentService.get_by_id(d["id"])
-                status = doc.run  # TaskStatus.RUNNING.value
-                doc_progress = doc.progress if doc and doc.progress else 0.0
-                special_task_running = False
-                priority = 0
-                for t in tsks:
-                    task_type = (t.task_type or "").lower()
-                    if task_type in PIPELINE_SPECIAL_PROGRESS_FREEZE_TASK_TYPES:
-                        special_task_running = True
-                    if 0 <= t.progress < 1:
-                        finished = False
-                    if t.progress == -1:
-                        bad += 1
-                    prg += t.progress if t.progress >= 0 else 0
-                    if t.progress_msg.strip():
-                        msg.append(t.progress_msg)
-                    priority = max(priority, t.priority)
-                prg /= len(tsks)
-                if finished and bad:
-                    prg = -1
-                    status = TaskStatus.FAIL.value
-                elif finished:
-                    prg = 1
-                    status = TaskStatus.DONE.value
-
-                # only for special task and parsed docs and unfinished
-                freeze_progress = special_task_running and doc_progress >= 1 and not finished
-                msg = "\n".join(sorted(msg))
-                begin_at = d.get("process_begin_at")
-                if not begin_at:
-                    begin_at = datetime.now()
-                    # fallback
-                    cls.update_by_id(d["id"], {"process_begin_at": begin_at})
-
-                info = {
-                    "process_duration": max(datetime.timestamp(datetime.now()) - begin_at.timestamp(), 0),
-                    "run": status}
-                if prg != 0 and not freeze_progress:
-                    info["progress"] = prg
-                if msg:
-                    info["progress_msg"] = msg
-                    if msg.endswith("created task graphrag") or msg.endswith("created task raptor") or msg.endswith("created task mindmap"):
-                        info["progress_msg"] += "\n%d tasks are ahead in the queue..."%get_queue_length(priority)
-                else:
-                    info["progress_msg"] = "%d tasks are ahead in the queue..."%get_queue_length(priority)
-                cls.update_by_id(d["id"], info)
+                cls._sync_progress_chunk(docs[i:i + batch_size], queue_length)
             except Exception as e:
                 if str(e).find("'0'") < 0:
                     logging.exception("fetch task exception")
 
+    @classmethod
+    def _sync_progress_chunk(cls, docs:list[dict], queue_length):
+        from api.db.services.task_service import TaskProgressLog
+
+        docs = {d["id"]: d for d in docs}
+        freeze_types = list(PIPELINE_SPECIAL_PROGRESS_FREEZE_TASK_TYPES)
+        stats = Task.select(
+            Task.doc_id,
+            fn.COUNT(Task.id).alias("task_num"),
+            fn.SUM(Case(None, [(Task.progress >= 0, Task.progress)], 0)).alias("progress_sum"),
+            fn.SUM(Case(None, [(Task.progress == -1, 1)], 0)).alias("bad"),
+            fn.SUM(Case(None, [((Task.progress >= 0) & (Task.progress < 1), 1)], 0)).alias("unfinished"),
+            fn.SUM(Case(None, [(fn.LOWER(Task.task_type).in_(freeze_types), 1)], 0)).alias("special"),
+            fn.MAX(Task.priority).alias("priority"),
+            fn.MAX(Task.update_time).alias("last_update"),
+        ).where(Task.doc_id.in_(list(docs.keys()))).group_by(Task.doc_id).dicts()
+        stats = {r["doc_id"]: r for r in stats}
+        if not stats:
+            return
+
+        # Only documents whose tasks changed since the last pass, or whose
+        # message shows a queue length that moved, are rewritten. The others
+        # only get their process_duration advanced.
+        changed, durations = [], {}
+        for doc_id, st in stats.items():
+            fingerprint = (st["task_num"], float(st["progress_sum"] or 0), st["bad"], st["unfinished"], st["last_update"])
+            priority = st["priority"] or 0
+            prev = cls._progress_fingerprints.get(doc_id)
+            if prev and prev[0] == fingerprint and (prev[2] is None or prev[2] == queue_length(priority)):
+                begin_at = docs[doc_id].get("process_begin_at")
+                if begin_at:
+                    durations[doc_id] = max(datetime.timestamp(datetime.now()) - begin_at.timestamp(), 0)
+                continue
+            changed.append((doc_id, st, fingerprint, priority))
+        if durations:
+            cls.model.update(process_duration=Case(cls.model.id, list(durations.items()), cls.model.process_duration)) \
+                .where(cls.model.id.in_(list(durations.keys()))).execute()
+        if not changed:
+            return
+
+        changed_ids = [doc_id for doc_id, _, _, _ in changed]
+        states = {r["id"]: r for r in cls.model.select(cls.model.id, cls.model.run, cls.model.progress)
+                  .where(cls.model.id.in_(changed_ids)).dicts()}
+        task_msgs = {}
+        rows = list(Task.select(Task.id, Task.doc_id, Task.progress_msg).where(Task.doc_id.in_(changed_ids)).order_by(Task.create_time).dicts())
+        progress_msgs = TaskProgressLog.materialize_many([r["id"] for r in rows], {r["id"]: r["progress_msg"] or "" for r in rows})
+        for r in rows:
+            task_msgs.setdefault(r["doc_id"], []).append(progress_msgs[r["id"]])
+
+        updates = []
+        for doc_id, st, fingerprint, priority in changed:
+            state = states.get(doc_id)
+            if not state:
+                continue
+            status = state["run"]
+            doc_progress = state["progress"] or 0.0
+            finished = not st["unfinished"]
+            prg = float(st["progress_sum"] or 0) / st["task_num"]
+            if finished and st["bad"]:
+                prg = -1
+                status = TaskStatus.FAIL.value
+            elif finished:
+                prg = 1
+                status = TaskStatus.DONE.value
+
+            # only for special task and parsed docs and unfinished
+            freeze_progress = st["special"] and doc_progress >= 1 and not finished
+            msg = "\n".join(sorted([m for m in task_msgs.get(doc_id, []) if m.strip()]))
+            begin_at = docs[doc_id].get("process_begin_at")
+            info = {}
+            if not begin_at:
+                begin_at = datetime.now()
+                # fallback
+                info["process_begin_at"] = begin_at
+
+            info.update({
+                "process_duration": max(datetime.timestamp(datetime.now()) - begin_at.timestamp(), 0),
+                "run": status})
+            if prg != 0 and not freeze_progress:
+                info["progress"] = prg
+            queue_len = None
+            if msg:
+                info["progress_msg"] = msg
+                if msg.endswith("created task graphrag") or msg.endswith("created task raptor") or msg.endswith("created task mindmap"):
+                    queue_len = queue_length(priority)
+                    info["progress_msg"] += "\n%d tasks are ahead in the queue..."%queue_len
+            else:
+                queue_len = queue_length(priority)
+                info["progress_msg"] = "%d tasks are ahead in the queue..."%queue_len
+            updates.append((doc_id, info, (fingerprint, priority, queue_len)))
+
+        with DB.atomic():
+            for doc_id, info, _ in updates:
+                cls.update_by_id(doc_id, info)
+        for doc_id, _, fp in updates:
+            cls._progress_fingerprints[doc_id] = fp
+        # keep the cache bounded; a cleared entry only costs one extra rewrite
+        if len(cls._progress_fingerprints) > 100000:
+            cls._progress_fingerprints.clear()
+
     @classmethod
     @DB.connection_context()
     def get_kb_doc_count(cls, kb_id):
@@ -25,6 +25,7 @@ from typing import Union
 
 from peewee import fn
 
+from api.constants import IMG_BASE64_PREFIX
 from api.db import KNOWLEDGEBASE_FOLDER_NAME, FileType
 from api.db.db_models import DB, Document, File, File2Document, Knowledgebase, Task
 from api.db.services import duplicate_name
@@ -34,7 +35,7 @@ from api.db.services.file2document_service import File2DocumentService
 from common.misc_utils import get_uuid
 from common.constants import TaskStatus, FileSource, ParserType
 from api.db.services.knowledgebase_service import KnowledgebaseService
-from api.db.services.task_service import TaskService
+from api.db.services.task_service import TaskService, cancel_all_task_of
 from api.utils.file_utils import filename_type, read_potential_broken_pdf, thumbnail_img, sanitize_path
 from rag.llm.cv_model import GptV4
 from common import settings
@@ -478,6 +479,9 @@ class FileService(CommonService):
                     "size": len(blob),
                     "thumbnail": thumbnail_location,
                 }
+                if getattr(file, "source_doc_id", None):
+                    doc["source_doc_id"] = file.source_doc_id
+                    doc["content_hash"] = file.content_hash
                 DocumentService.insert(doc)
 
                 FileService.add_file_from_kb(doc, kb_folder["id"], kb.tenant_id)
@@ -487,6 +491,59 @@ class FileService(CommonService):
 
         return err, files
 
+    @classmethod
+    @DB.connection_context()
+    def replace_document_content(cls, kb, doc, blob, content_hash, meta_fields=None):
+        """
+        Overwrite a document's stored blob in place and reset it for re-parsing.
+        A running parse is canceled first. Old tasks, chunks, chunk images and the
+        thumbnail are dropped so the next parse can't reuse them.
+        """
+        from rag.nlp import search
+
+        e, old_doc = DocumentService.get_by_id(doc["id"])
+        if not e:
+            raise LookupError(f"Document {doc['id']} not found.")
+        if old_doc.run == TaskStatus.RUNNING.value:
+            cancel_all_task_of(old_doc.id)
+
+        if doc["type"] == FileType.PDF.value:
+            blob = read_potential_broken_pdf(blob)
+        settings.STORAGE_IMPL.put(kb.id, doc["location"], blob)
+
+        if old_doc.thumbnail and not old_doc.thumbnail.startswith(IMG_BASE64_PREFIX):
+            if settings.STORAGE_IMPL.obj_exist(kb.id, old_doc.thumbnail):
+                settings.STORAGE_IMPL.rm(kb.id, old_doc.thumbnail)
+        thumbnail_location = ""
+        img = thumbnail_img(doc["name"], blob)
+        if img is not None:
+            thumbnail_location = f"thumbnail_{doc['id']}.png"
+            settings.STORAGE_IMPL.put(kb.id, thumbnail_location, img)
+
+        DocumentService.clear_chunk_num_when_rerun(doc["id"])
+        TaskService.filter_delete([Task.doc_id == doc["id"]])
+        if settings.docStoreConn.index_exist(search.index_name(kb.tenant_id), kb.id):
+            DocumentService.delete_chunk_images(old_doc, kb.tenant_id)
+            settings.docStoreConn.delete({"doc_id": doc["id"]}, search.index_name(kb.tenant_id), kb.id)
+
+        updates = {
+            "size": len(blob),
+            "content_hash": content_hash,
+            "thumbnail": thumbnail_location,
+            "run": TaskStatus.UNSTART.value,
+            "progress": 0,
+            "progress_msg": "",
+            "chunk_num": 0,
+            "token_num": 0,
+        }
+        if meta_fields:
+            updates["meta_fields"] = meta_fields
+        DocumentService.update_by_id(doc["id"], updates)
+        for f2d in File2DocumentService.get_by_document_id(doc["id"]):
+            cls.filter_update((cls.model.id == f2d.file_id,), {"size": len(blob)})
+        e, new_doc = DocumentService.get_by_id(doc["id"])
+        return new_doc.to_dict(), blob
+
     @classmethod
     @DB.connection_context()
     def list_all_files_by_parent_id(cls, parent_id):
@@ -232,6 +232,18 @@ class KnowledgebaseService(CommonService):
             offset += limit
         return res
 
+    @classmethod
+    @DB.connection_context()
+    def get_content_signature(cls, kb_ids):
+        # Get a value that changes whenever documents or chunks of the datasets change
+        # The update time is left out: it moves on every progress update while a dataset is parsed.
+        # Args:
+        #     kb_ids: List of dataset IDs
+        # Returns:
+        #     Tuple of (id, tenant_id, doc_num, chunk_num) per dataset, ordered by ID
+        fields = [cls.model.id, cls.model.tenant_id, cls.model.doc_num, cls.model.chunk_num]
+        return tuple(cls.model.select(*fields).where(cls.model.id.in_(kb_ids)).order_by(cls.model.id).tuples())
+
     @classmethod
     @DB.connection_context()
     def get_kb_ids(cls, tenant_id):
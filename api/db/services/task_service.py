@@ -16,12 +16,14 @@
 import logging
 import os
 import random
+import threading
+import time
 import xxhash
 from datetime import datetime
 
 from api.db.db_utils import bulk_insert_into_db
 from deepdoc.parser import PdfParser
-from peewee import JOIN
+from peewee import JOIN, Case
 from api.db.db_models import DB, File2Document, File
 from api.db import FileType
 from api.db.db_models import Task, Document, Knowledgebase, Tenant
@@ -54,6 +56,159 @@ def trim_header_by_lines(text: str, max_length) -> str:
     return text
 
 
+TASK_PROGRESS_FLUSH_INTERVAL = float(os.environ.get("TASK_PROGRESS_FLUSH_INTERVAL", 1.0))
+TASK_PROGRESS_LOG_EXPIRE = 7 * 24 * 3600
+TASK_PROGRESS_MSG_LIMIT = 3000
+
+
+class TaskProgressLog:
+    """Append-only progress log of tasks, kept in a Redis list per task.
+
+    Writers append messages without reading the task row or taking a
+    cluster-wide lock. The task row is refreshed from the log at most once
+    per TASK_PROGRESS_FLUSH_INTERVAL per task, by a background flusher,
+    except for terminal progress (1 or -1) which is written immediately.
+    Readers call `materialize` to get the message without waiting for a flush.
+    """
+
+    _lock = threading.Lock()
+    # Held from reading the log to writing the row, so a slower flush can't overwrite a newer one.
+    _flush_locks = [threading.Lock() for _ in range(64)]
+    _pending = {}  # task_id -> {"progress": float|None, "dirty": bool, "last_flush": float}
+    _seeded = set()
+    _flusher = None
+
+    @staticmethod
+    def key(task_id):
+        return f"task_progress:{task_id}"
+
+    @classmethod
+    def _seed(cls, task_id):
+        # The first message of a log is the row's progress_msg written before logging began.
+        if task_id in cls._seeded:
+            return
+        k = cls.key(task_id)
+        if not REDIS_CONN.REDIS.exists(k):
+            base = Task.select(Task.progress_msg).where(Task.id == task_id).scalar() or ""
+            if base:
+                REDIS_CONN.REDIS.rpush(k, base)
+        cls._seeded.add(task_id)
+
+    @classmethod
+    def append(cls, task_id, msg, progress=None):
+        if msg:
+            cls._seed(task_id)
+            k = cls.key(task_id)
+            pipe = REDIS_CONN.REDIS.pipeline()
+            pipe.rpush(k, msg)
+            pipe.ltrim(k, -TASK_PROGRESS_MSG_LIMIT, -1)
+            pipe.expire(k, TASK_PROGRESS_LOG_EXPIRE)
+            pipe.execute()
+
+        terminal = progress is not None and (progress == -1 or progress >= 1)
+        with cls._lock:
+            st = cls._pending.setdefault(task_id, {"progress": None, "dirty": False, "last_flush": 0.0})
+            if progress is not None and (st["progress"] is None or progress == -1 or (st["progress"] != -1 and progress > st["progress"])):
+                st["progress"] = progress
+            st["dirty"] = True
+            due = terminal or time.monotonic() - st["last_flush"] >= TASK_PROGRESS_FLUSH_INTERVAL
+        if due:
+            cls.flush(task_id)
+        else:
+            cls._ensure_flusher()
+
+    @classmethod
+    def reset(cls, task_id):
+        REDIS_CONN.delete(cls.key(task_id))
+        with cls._lock:
+            cls._pending.pop(task_id, None)
+            cls._seeded.discard(task_id)
+
+    @classmethod
+    def materialize(cls, task_id, default=""):
+        return cls.materialize_many([task_id], {task_id: default})[task_id]
+
+    @classmethod
+    def materialize_many(cls, task_ids, defaults=None):
+        defaults = defaults or {}
+        res = {tid: defaults.get(tid, "") for tid in task_ids}
+        if not task_ids:
+            return res
+        try:
+            pipe = REDIS_CONN.REDIS.pipeline()
+            for tid in task_ids:
+                pipe.lrange(cls.key(tid), 0, -1)
+            for tid, lines in zip(task_ids, pipe.execute()):
+                if lines:
+                    res[tid] = trim_header_by_lines("\n".join(lines), TASK_PROGRESS_MSG_LIMIT)
+        except Exception as e:
+            logging.warning(f"TaskProgressLog.materialize_many got exception: {e}")
+        return res
+
+    @classmethod
+    def flush(cls, task_id):
+        with cls._flush_locks[hash(task_id) % len(cls._flush_locks)]:
+            cls._flush(task_id)
+
+    @classmethod
+    @DB.connection_context()
+    def _flush(cls, task_id):
+        with cls._lock:
+            st = cls._pending.get(task_id)
+            if not st or not st["dirty"]:
+                return
+            st["dirty"] = False
+            st["last_flush"] = time.monotonic()
+            prog = st["progress"]
+            if prog is not None and (prog == -1 or prog >= 1):
+                cls._pending.pop(task_id, None)
+                cls._seeded.discard(task_id)
+
+        updates = {}
+        progress_msg = cls.materialize(task_id, None)
+        if progress_msg is not None:
+            updates[Task.progress_msg] = progress_msg
+        if prog is not None:
+            updates[Task.progress] = Case(None, [((Task.progress != -1) & ((prog == -1) | (prog > Task.progress)), prog)], Task.progress)
+        task = Task.select(Task.begin_at).where(Task.id == task_id).first()
+        if task and task.begin_at:
+            updates[Task.process_duration] = (datetime.now() - task.begin_at).total_seconds()
+        if updates:
+            Task.update(updates).where(Task.id == task_id).execute()
+
+    @classmethod
+    def flush_all(cls):
+        with cls._lock:
+            now = time.monotonic()
+            due = [tid for tid, st in cls._pending.items() if st["dirty"] and now - st["last_flush"] >= TASK_PROGRESS_FLUSH_INTERVAL]
+            for tid, st in list(cls._pending.items()):
+                # forget idle tasks
+                if not st["dirty"] and now - st["last_flush"] > 600:
+                    cls._pending.pop(tid, None)
+                    cls._seeded.discard(tid)
+        for tid in due:
+            try:
+                cls.flush(tid)
+            except Exception as e:
+                logging.exception(f"TaskProgressLog.flush({tid}) got exception: {e}")
+
+    @classmethod
+    def _ensure_flusher(cls):
+        if cls._flusher and cls._flusher.is_alive():
+            return
+        with cls._lock:
+            if cls._flusher and cls._flusher.is_alive():
+                return
+
+            def loop():
+                while True:
+                    time.sleep(TASK_PROGRESS_FLUSH_INTERVAL)
+                    cls.flush_all()
+
+            cls._flusher = threading.Thread(target=loop, name="task_progress_flusher", daemon=True)
+            cls._flusher.start()
+
+
 class TaskService(CommonService):
     """Service class for managing document processing tasks.
 
@@ -143,6 +298,9 @@ class TaskService(CommonService):
             retry_count=docs[0]["retry_count"] + 1,
         ).where(cls.model.id == docs[0]["id"]).execute()
 
+        # The row now holds the authoritative message; re-seed the progress log from it.
+        TaskProgressLog.reset(docs[0]["id"])
+
         if docs[0]["retry_count"] >= 3:
             return None
 
@@ -305,12 +463,13 @@ class TaskService(CommonService):
     def update_progress(cls, id, info):
         """Update the progress information for a task.
 
-        This method updates both the progress message and completion percentage of a task.
-        It handles platform-specific behavior (macOS vs others) and uses database locking
-        when necessary to ensure thread safety.
+        Messages are appended to the task's TaskProgressLog; the task row is
+        refreshed from the log at most once per TASK_PROGRESS_FLUSH_INTERVAL,
+        or right away for terminal progress. Falls back to writing the row
+        directly if Redis is unavailable.
 
         Update Rules:
-            - progress_msg: Always appends the new message to the existing one, and trims the result to max 3000 lines.
+            - progress_msg: Always appends the new message to the existing one, and trims the result to max 3000 characters.
             - progress: Only updates if the current progress is not -1 AND
                         (the new progress is -1 OR greater than the existing progress),
                         to avoid overwriting valid progress with invalid or regressive values.
@@ -321,38 +480,29 @@ class TaskService(CommonService):
                         - progress_msg (str, optional): Progress message to append
                         - progress (float, optional): Progress percentage (0.0 to 1.0)
         """
+        try:
+            TaskProgressLog.append(id, info.get("progress_msg"), info.get("progress"))
+            return
+        except Exception as e:
+            logging.warning(f"TaskProgressLog.append({id}) got exception, writing progress directly: {e}")
+
         task = cls.model.get_by_id(id)
         if not task:
             logging.warning("Update_progress error: task not found")
             return
 
-        if os.environ.get("MACOS"):
-            if info["progress_msg"]:
-                progress_msg = trim_header_by_lines(task.progress_msg + "\n" + info["progress_msg"], 3000)
-                cls.model.update(progress_msg=progress_msg).where(cls.model.id == id).execute()
-            if "progress" in info:
-                prog = info["progress"]
-                cls.model.update(progress=prog).where(
-                    (cls.model.id == id) &
-                    (
-                            (cls.model.progress != -1) &
-                            ((prog == -1) | (prog > cls.model.progress))
-                    )
-                ).execute()
-        else:
-            with DB.lock("update_progress", -1):
-                if info["progress_msg"]:
-                    progress_msg = trim_header_by_lines(task.progress_msg + "\n" + info["progress_msg"], 3000)
-                    cls.model.update(progress_msg=progress_msg).where(cls.model.id == id).execute()
-                if "progress" in info:
-                    prog = info["progress"]
-                    cls.model.update(progress=prog).where(
-                        (cls.model.id == id) &
-                        (
-                            (cls.model.progress != -1) &
-                            ((prog == -1) | (prog > cls.model.progress))
-                        )
-                    ).execute()
+        if info.get("progress_msg"):
+            progress_msg = trim_header_by_lines(task.progress_msg + "\n" + info["progress_msg"], TASK_PROGRESS_MSG_LIMIT)
+            cls.model.update(progress_msg=progress_msg).where(cls.model.id == id).execute()
+        if "progress" in info:
+            prog = info["progress"]
+            cls.model.update(progress=prog).where(
+                (cls.model.id == id) &
+                (
+                        (cls.model.progress != -1) &
+                        ((prog == -1) | (prog > cls.model.progress))
+                )
+            ).execute()
 
         process_duration = (datetime.now() - task.begin_at).total_seconds()
         cls.model.update(process_duration=process_duration).where(cls.model.id == id).execute()
@@ -518,17 +668,153 @@ def reuse_prev_task_chunks(task: dict, prev_tasks: list[dict], chunking_config:
     return len(task["chunk_ids"].split())
 
 
+TASK_CANCEL_CHANNEL = "task_cancel"
+# Same lifetime as before: the flag used to be set through REDIS_CONN.set, whose default expiry is 3600s.
+TASK_CANCEL_EXPIRE = 3600
+TASK_CANCEL_RECONCILE_INTERVAL = float(os.environ.get("TASK_CANCEL_RECONCILE_INTERVAL", 5.0))
+TASK_CANCEL_WATCH_TTL = 600
+
+
+class TaskCancellation:
+    """Cancellation flags of tasks, cached in every process that checks them.
+
+    `cancel` sets the `<task_id>-cancel` key (expiring after TASK_CANCEL_EXPIRE)
+    and publishes the id on TASK_CANCEL_CHANNEL. A subscriber thread keeps the canceled ids in a local
+    set, so checking a task is a memory lookup once it has been seen. The ids
+    checked recently are reconciled against their keys every
+    TASK_CANCEL_RECONCILE_INTERVAL, which covers lost messages and flags set
+    without publishing. While the subscriber is down every check reads Redis.
+    """
+
+    _lock = threading.Lock()
+    _canceled = set()
+    _watched = {}  # task_id -> monotonic time of the last check
+    _listening = False
+    _subscriber = None
+
+    @staticmethod
+    def key(task_id):
+        return f"{task_id}-cancel"
+
+    @classmethod
+    def cancel(cls, task_ids):
+        if isinstance(task_ids, str):
+            task_ids = [task_ids]
+        if not task_ids:
+            return
+        pipe = REDIS_CONN.REDIS.pipeline()
+        for tid in task_ids:
+            pipe.set(cls.key(tid), "x", ex=TASK_CANCEL_EXPIRE)
+            pipe.publish(TASK_CANCEL_CHANNEL, f"cancel:{tid}")
+        pipe.execute()
+        with cls._lock:
+            cls._canceled.update(task_ids)
+
+    @classmethod
+    def clear(cls, task_id):
+        pipe = REDIS_CONN.REDIS.pipeline()
+        pipe.delete(cls.key(task_id))
+        pipe.publish(TASK_CANCEL_CHANNEL, f"clear:{task_id}")
+        pipe.execute()
+        with cls._lock:
+            cls._canceled.discard(task_id)
+
+    @classmethod
+    def is_canceled(cls, task_id):
+        cls._ensure_subscriber()
+        with cls._lock:
+            if task_id in cls._canceled:
+                return True
+            known = cls._listening and task_id in cls._watched
+            cls._watched[task_id] = time.monotonic()
+        if known:
+            return False
+        canceled = bool(REDIS_CONN.get(cls.key(task_id)))
+        if canceled:
+            with cls._lock:
+                cls._canceled.add(task_id)
+        return canceled
+
+    @classmethod
+    def _apply(cls, data):
+        action, _, tid = (data or "").partition(":")
+        with cls._lock:
+            if action == "cancel":
+                cls._canceled.add(tid)
+            elif action == "clear":
+                cls._canceled.discard(tid)
+
+    @classmethod
+    def _reconcile(cls):
+        cutoff = time.monotonic() - TASK_CANCEL_WATCH_TTL
+        with cls._lock:
+            for tid, seen in list(cls._watched.items()):
+                if seen < cutoff:
+                    del cls._watched[tid]
+                    cls._canceled.discard(tid)
+            task_ids = list(cls._watched.keys())
+        if not task_ids:
+            return
+        pipe = REDIS_CONN.REDIS.pipeline()
+        for tid in task_ids:
+            pipe.exists(cls.key(tid))
+        flags = pipe.execute()
+        with cls._lock:
+            for tid, flag in zip(task_ids, flags):
+                if flag:
+                    cls._canceled.add(tid)
+                else:
+                    cls._canceled.discard(tid)
+
+    @classmethod
+    def _listen(cls):
+        while True:
+            pubsub = None
+            try:
+                pubsub = REDIS_CONN.REDIS.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(TASK_CANCEL_CHANNEL)
+                # Catch up on whatever was missed while not subscribed.
+                cls._reconcile()
+                cls._listening = True
+                last_reconcile = time.monotonic()
+                while True:
+                    msg = pubsub.get_message(timeout=1.0)
+                    if msg and msg.get("type") == "message":
+                        cls._apply(msg["data"])
+                    if time.monotonic() - last_reconcile >= TASK_CANCEL_RECONCILE_INTERVAL:
+                        cls._reconcile()
+                        last_reconcile = time.monotonic()
+            except Exception as e:
+                logging.warning(f"TaskCancellation subscriber got exception: {e}")
+                cls._listening = False
+                time.sleep(1)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    @classmethod
+    def _ensure_subscriber(cls):
+        if cls._subscriber is not None:
+            return
+        with cls._lock:
+            if cls._subscriber is None:
+                cls._subscriber = threading.Thread(target=cls._listen, name="task_cancel_subscriber", daemon=True)
+                cls._subscriber.start()
+
+
 def cancel_all_task_of(doc_id):
-    for t in TaskService.query(doc_id=doc_id):
-        try:
-            REDIS_CONN.set(f"{t.id}-cancel", "x")
-        except Exception as e:
-            logging.exception(e)
+    try:
+        TaskCancellation.cancel([t.id for t in TaskService.query(doc_id=doc_id)])
+    except Exception as e:
+        logging.exception(e)
 
 
 def has_canceled(task_id):
     try:
-        if REDIS_CONN.get(f"{task_id}-cancel"):
+        if TaskCancellation.is_canceled(task_id):
             logging.info(f"Task: {task_id} has been canceled")
             return True
     except Exception as e:
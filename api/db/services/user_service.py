@@ -23,8 +23,9 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from api.db import UserTenantRole
 from api.db.db_models import DB, UserTenant
 from api.db.db_models import User, Tenant
+from api.db.services.api_service import AUTH_CACHE_SIZE, AUTH_CACHE_TTL, APITokenService
 from api.db.services.common_service import CommonService
-from common.misc_utils import get_uuid
+from common.misc_utils import TTLCache, get_uuid
 from common.time_utils import current_timestamp, datetime_format
 from common.constants import StatusEnum
 from common import settings
@@ -40,6 +41,96 @@ class UserService(CommonService):
         model: The User model class for database operations.
     """
     model = User
+    # Authentication key -> row data of the valid user it resolves to.
+    _auth_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+
+    @classmethod
+    def _from_cache(cls, data):
+        # Hand out a fresh instance so request handlers never share one.
+        user = cls.model(**data)
+        user._dirty.clear()
+        return user
+
+    @classmethod
+    def _cached_user(cls, key, load):
+        data = cls._auth_cache.get(key)
+        if data is None:
+            user = load()
+            if not user:
+                return None
+            data = dict(user.__data__)
+            cls._auth_cache.set(key, data)
+        return cls._from_cache(data)
+
+    @classmethod
+    def get_by_access_token(cls, access_token):
+        """Resolve a session access token to its valid user, cached for AUTH_CACHE_TTL.
+
+        Args:
+            access_token: Access token carried by the web session.
+
+        Returns:
+            User object if the token belongs to a valid user, None otherwise.
+        """
+        def load():
+            users = cls.query(access_token=access_token, status=StatusEnum.VALID.value)
+            return users[0] if users else None
+        return cls._cached_user(("access_token", access_token), load)
+
+    @classmethod
+    def get_by_api_token(cls, token):
+        """Resolve an API token to the valid user owning its tenant, cached for AUTH_CACHE_TTL.
+
+        Args:
+            token: API token from the Authorization header.
+
+        Returns:
+            User object if the token is known and its owner is valid, None otherwise.
+        """
+        tenant_id = APITokenService.get_tenant_id(token)
+        if not tenant_id:
+            return None
+
+        def load():
+            users = cls.query(id=tenant_id, status=StatusEnum.VALID.value)
+            return users[0] if users else None
+        return cls._cached_user(("tenant", tenant_id), load)
+
+    @classmethod
+    def peek_auth_cache(cls, access_token=None, api_token=None):
+        """Return the cached user for a token without touching the database, or None on a miss."""
+        if access_token:
+            key = ("access_token", access_token)
+        else:
+            tenant_id = APITokenService.get_cached_tenant_id(api_token)
+            if tenant_id is None:
+                return None
+            key = ("tenant", tenant_id)
+        data = cls._auth_cache.get(key)
+        return None if data is None else cls._from_cache(data)
+
+    @classmethod
+    def invalidate_auth_cache(cls, user_ids):
+        """Forget cached authentications of the given users in this process.
+
+        Other processes pick the change up within AUTH_CACHE_TTL.
+        """
+        if isinstance(user_ids, str):
+            user_ids = [user_ids]
+        user_ids = set(user_ids)
+        cls._auth_cache.pop_where(lambda _, data: data.get("id") in user_ids)
+
+    @classmethod
+    def update_by_id(cls, pid, data):
+        num = super().update_by_id(pid, data)
+        cls.invalidate_auth_cache(pid)
+        return num
+
+    @classmethod
+    def delete_by_id(cls, pid):
+        num = super().delete_by_id(pid)
+        cls.invalidate_auth_cache(pid)
+        return num
 
     @classmethod
     @DB.connection_context()
@@ -132,6 +223,7 @@ class UserService(CommonService):
         with DB.atomic():
             cls.model.update({"status": 0}).where(
                 cls.model.id.in_(user_ids)).execute()
+        cls.invalidate_auth_cache(user_ids)
 
     @classmethod
     @DB.connection_context()
@@ -142,6 +234,7 @@ class UserService(CommonService):
                 user_dict["update_date"] = datetime_format(datetime.now())
                 cls.model.update(user_dict).where(
                     cls.model.id == user_id).execute()
+        cls.invalidate_auth_cache(user_id)
 
     @classmethod
     @DB.connection_context()
@@ -153,6 +246,7 @@ class UserService(CommonService):
                 "update_date": datetime_format(datetime.now())
             }
             cls.model.update(update_dict).where(cls.model.id == user_id).execute()
+        cls.invalidate_auth_cache(user_id)
 
     @classmethod
     @DB.connection_context()
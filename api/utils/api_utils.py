@@ -35,9 +35,9 @@ from quart import (
 from peewee import OperationalError
 
 from common.constants import ActiveEnum
-from api.db.db_models import APIToken
+from api.db.services.api_service import APITokenService
 from api.utils.json_encode import CustomJSONEncoder
-from common.mcp_tool_call_conn import MCPToolCallSession, close_multiple_mcp_toolcall_sessions
+from common.mcp_tool_call_conn import MCP_SESSION_POOL
 from api.db.services.tenant_llm_service import LLMFactoriesService
 from common.connection_utils import timeout
 from common.constants import RetCode
@@ -222,10 +222,12 @@ def apikey_required(func):
     @wraps(func)
     async def decorated_function(*args, **kwargs):
         token = request.headers.get("Authorization").split()[1]
-        objs = APIToken.query(token=token)
-        if not objs:
+        tenant_id = APITokenService.get_cached_tenant_id(token)
+        if tenant_id is None:
+            tenant_id = await asyncio.to_thread(APITokenService.get_tenant_id, token)
+        if not tenant_id:
             return build_error_result(message="API-KEY is invalid!", code=RetCode.FORBIDDEN)
-        kwargs["tenant_id"] = objs[0].tenant_id
+        kwargs["tenant_id"] = tenant_id
         if inspect.iscoroutinefunction(func):
             return await func(*args, **kwargs)
 
@@ -249,7 +251,7 @@ def construct_json_result(code: RetCode = RetCode.SUCCESS, message="success", da
 
 
 def token_required(func):
-    def get_tenant_id(**kwargs):
+    def get_token(**kwargs):
         if os.environ.get("DISABLE_SDK"):
             return False, get_json_result(data=False, message="`Authorization` can't be empty")
         authorization_str = request.headers.get("Authorization")
@@ -258,23 +260,34 @@ def token_required(func):
         authorization_list = authorization_str.split()
         if len(authorization_list) < 2:
             return False, get_json_result(data=False, message="Please check your authorization format.")
-        token = authorization_list[1]
-        objs = APIToken.query(token=token)
-        if not objs:
+        return True, authorization_list[1]
+
+    def with_tenant_id(tenant_id, **kwargs):
+        if not tenant_id:
             return False, get_json_result(data=False, message="Authentication error: API key is invalid!", code=RetCode.AUTHENTICATION_ERROR)
-        kwargs["tenant_id"] = objs[0].tenant_id
+        kwargs["tenant_id"] = tenant_id
         return True, kwargs
 
     @wraps(func)
     def decorated_function(*args, **kwargs):
-        e, kwargs = get_tenant_id(**kwargs)
+        e, token = get_token(**kwargs)
+        if not e:
+            return token
+        e, kwargs = with_tenant_id(APITokenService.get_tenant_id(token), **kwargs)
         if not e:
             return kwargs
         return func(*args, **kwargs)
 
     @wraps(func)
     async def adecorated_function(*args, **kwargs):
-        e, kwargs = get_tenant_id(**kwargs)
+        e, token = get_token(**kwargs)
+        if not e:
+            return token
+        tenant_id = APITokenService.get_cached_tenant_id(token)
+        if tenant_id is None:
+            # Keep the event loop free while the token is looked up.
+            tenant_id = await asyncio.to_thread(APITokenService.get_tenant_id, token)
+        e, kwargs = with_tenant_id(tenant_id, **kwargs)
         if not e:
             return kwargs
         return await func(*args, **kwargs)
@@ -641,15 +654,13 @@ def group_by(list_of_dict, key):
 
 def get_mcp_tools(mcp_servers: list, timeout: float | int = 10) -> tuple[dict, str]:
     results = {}
-    tool_call_sessions = []
     try:
         for mcp_server in mcp_servers:
             server_key = mcp_server.id
 
             cached_tools = mcp_server.variables.get("tools", {})
 
-            tool_call_session = MCPToolCallSession(mcp_server, mcp_server.variables)
-            tool_call_sessions.append(tool_call_session)
+            tool_call_session = MCP_SESSION_POOL.get(mcp_server, mcp_server.variables)
 
             try:
                 tools = tool_call_session.get_tools(timeout)
@@ -664,8 +675,6 @@ def get_mcp_tools(mcp_servers: list, timeout: float | int = 10) -> tuple[dict, s
                 tool_dict["enabled"] = cached_tool.get("enabled", True)
                 results[server_key].append(tool_dict)
 
-        # PERF: blocking call to close sessions — consider moving to background thread or task queue
-        close_multiple_mcp_toolcall_sessions(tool_call_sessions)
         return results, ""
     except Exception as e:
         return {}, str(e)
@@ -26,6 +26,7 @@ from elasticsearch_dsl import Index
 from elastic_transport import ConnectionTimeout
 from common.file_utils import get_project_base_directory
 from common.misc_utils import convert_bytes
+from common.string_utils import KeywordHighlighter
 from common.doc_store.doc_store_base import DocStoreConnection, OrderByExpr, MatchExpr
 from rag.nlp import is_english, rag_tokenizer
 from common import settings
@@ -236,6 +237,7 @@ class ESConnectionBase(DocStoreConnection):
 
     def get_highlight(self, res, keywords: list[str], field_name: str):
         ans = {}
+        highlighter = KeywordHighlighter(keywords)
         for d in res["hits"]["hits"]:
             highlights = d.get("highlight")
             if not highlights:
@@ -245,16 +247,7 @@ class ESConnectionBase(DocStoreConnection):
                 ans[d["_id"]] = txt
                 continue
 
-            txt = d["_source"][field_name]
-            txt = re.sub(r"[\r\n]", " ", txt, flags=re.IGNORECASE | re.MULTILINE)
-            txt_list = []
-            for t in re.split(r"[.?!;\n]", txt):
-                for w in keywords:
-                    t = re.sub(r"(^|[ .?/'\"\(\)!,:;-])(%s)([ .?/'\"\(\)!,:;-])" % re.escape(w), r"\1<em>\2</em>\3", t,
-                               flags=re.IGNORECASE | re.MULTILINE)
-                if not re.search(r"<em>[^<>]+</em>", t, flags=re.IGNORECASE | re.MULTILINE):
-                    continue
-                txt_list.append(t)
+            txt_list = highlighter.highlight(d["_source"][field_name])
             ans[d["_id"]] = "...".join(txt_list) if txt_list else "...".join([a for a in list(highlights.items())[0][1]])
 
         return ans
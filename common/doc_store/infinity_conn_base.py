@@ -14,23 +14,151 @@
 #  limitations under the License.
 #
 
+import heapq
 import logging
 import os
 import re
 import json
+import threading
 import time
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
 import infinity
 from infinity.common import ConflictType
 from infinity.index import IndexInfo, IndexType
 from infinity.errors import ErrorCode
+import numpy as np
 import pandas as pd
 from common.file_utils import get_project_base_directory
+from common.misc_utils import TTLCache
+from common.string_utils import KeywordHighlighter
 from rag.nlp import is_english
 from common import settings
 from common.doc_store.doc_store_base import DocStoreConnection, MatchExpr, OrderByExpr
 
+INFINITY_SEARCH_WORKERS = int(os.environ.get("INFINITY_SEARCH_WORKERS", 8))
+INFINITY_TABLE_CACHE_TTL = int(os.environ.get("INFINITY_TABLE_CACHE_TTL", 60))
+
+
+class InfinityTableScatter:
+    """
+    Runs one query per table concurrently, each on its own connection.
+
+    The scatter owns at most `workers` connections. It takes them from the pool once
+    and keeps them, rather than borrowing per query: the Infinity pool only keeps
+    `max_size` idle connections, so bursts above that would open connections that
+    `release_conn` then drops without closing. Database and table handles are cached
+    per owned connection for INFINITY_TABLE_CACHE_TTL seconds, so repeated searches
+    skip the `get_database` / `get_table` round trips. Missing tables are not cached,
+    so a newly created dataset is visible at once.
+    """
+
+    def __init__(self, conn_pool, db_name: str, workers: int = INFINITY_SEARCH_WORKERS,
+                 cache_ttl: float = INFINITY_TABLE_CACHE_TTL):
+        self.conn_pool = conn_pool
+        self.db_name = db_name
+        self.workers = max(1, workers)
+        self._handles = TTLCache(maxsize=4096, ttl=cache_ttl)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="infinity_search") if self.workers > 1 else None
+
+    def _acquire(self):
+        self._slots.acquire()
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        try:
+            return self.conn_pool.get_conn()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, inf_conn):
+        with self._lock:
+            self._idle.append(inf_conn)
+        self._slots.release()
+
+    def _get_table(self, inf_conn, table_name: str):
+        key = (id(inf_conn), table_name)
+        cached = self._handles.get(key)
+        if cached is not None and cached[0] is inf_conn:
+            return cached[1]
+        db_key = (id(inf_conn), None)
+        cached_db = self._handles.get(db_key)
+        if cached_db is not None and cached_db[0] is inf_conn:
+            db_instance = cached_db[1]
+        else:
+            db_instance = inf_conn.get_database(self.db_name)
+            self._handles.set(db_key, (inf_conn, db_instance))
+        table_instance = db_instance.get_table(table_name)
+        self._handles.set(key, (inf_conn, table_instance))
+        return table_instance
+
+    def invalidate(self, table_name: str):
+        self._handles.pop_where(lambda k, _: k[1] == table_name)
+
+    def run(self, table_name: str, query_fn):
+        """
+        Run `query_fn(table_instance, table_name)` on one of the scatter's connections.
+
+        Returns None if the table doesn't exist.
+        """
+        inf_conn = self._acquire()
+        try:
+            try:
+                table_instance = self._get_table(inf_conn, table_name)
+            except Exception:
+                return None
+            try:
+                return query_fn(table_instance, table_name)
+            except Exception:
+                # The cached handle may belong to a dropped and recreated table.
+                self.invalidate(table_name)
+                try:
+                    table_instance = self._get_table(inf_conn, table_name)
+                except Exception:
+                    return None
+                return query_fn(table_instance, table_name)
+        finally:
+            self._release(inf_conn)
+
+    def map(self, table_names: list[str], query_fn) -> list:
+        """
+        Run `query_fn(table_instance, table_name)` on every existing table.
+
+        Returns the results in `table_names` order, with None for tables that don't exist.
+        """
+        if self._executor is None or len(table_names) <= 1:
+            return [self.run(t, query_fn) for t in table_names]
+        futures = [self._executor.submit(self.run, t, query_fn) for t in table_names]
+        return [f.result() for f in futures]
+
+
+def merge_top_k(df_list: list[pd.DataFrame], scores: list[np.ndarray], limit: int) -> tuple[list[int], list[float]]:
+    """
+    K-way merge of per-table results by descending score.
+
+    Args:
+        df_list: Per-table results.
+        scores: Score of every row of the matching result.
+        limit: Number of rows to keep.
+
+    Returns:
+        (positions, scores): positions of the kept rows in the concatenation of `df_list`,
+        best first, and their scores in the same order.
+    """
+    offsets = np.cumsum([0] + [len(df) for df in df_list])
+    streams = []
+    for t, sc in enumerate(scores):
+        order = np.argsort(-sc, kind="stable")
+        streams.append(zip((-sc[order]).tolist(), (order + offsets[t]).tolist()))
+    merged = list(islice(heapq.merge(*streams), limit))
+    return [pos for _, pos in merged], [-neg for neg, _ in merged]
+
 
 class InfinityConnectionBase(DocStoreConnection):
     def __init__(self, mapping_file_name: str="infinity_mapping.json", logger_name: str="ragflow.infinity_conn"):
@@ -66,6 +194,7 @@ class InfinityConnectionBase(DocStoreConnection):
             msg = f"Infinity {infinity_uri} is unhealthy in 120s."
             self.logger.error(msg)
             raise Exception(msg)
+        self.table_scatter = InfinityTableScatter(self.connPool, self.dbName)
         self.logger.info(f"Infinity {infinity_uri} is healthy.")
 
     def _migrate_db(self, inf_conn):
@@ -368,6 +497,7 @@ class InfinityConnectionBase(DocStoreConnection):
         column_id = res["id"]
         if field_name not in res:
             return {}
+        highlighter = KeywordHighlighter(keywords)
         for i in range(num_rows):
             id = column_id[i]
             txt = res[field_name][i]
@@ -378,21 +508,17 @@ class InfinityConnectionBase(DocStoreConnection):
             txt_list = []
             for t in re.split(r"[.?!;\n]", txt):
                 if is_english([t]):
-                    for w in keywords:
-                        t = re.sub(
-                            r"(^|[ .?/'\"\(\)!,:;-])(%s)([ .?/'\"\(\)!,:;-])" % re.escape(w),
-                            r"\1<em>\2</em>\3",
-                            t,
-                            flags=re.IGNORECASE | re.MULTILINE,
-                        )
-                else:
-                    for w in sorted(keywords, key=len, reverse=True):
-                        t = re.sub(
-                            re.escape(w),
-                            f"<em>{w}</em>",
-                            t,
-                            flags=re.IGNORECASE | re.MULTILINE,
-                        )
+                    t = highlighter.highlight_sentence(t)
+                    if t is not None:
+                        txt_list.append(t)
+                    continue
+                for w in sorted(keywords, key=len, reverse=True):
+                    t = re.sub(
+                        re.escape(w),
+                        f"<em>{w}</em>",
+                        t,
+                        flags=re.IGNORECASE | re.MULTILINE,
+                    )
                 if not re.search(r"<em>[^<>]+</em>", t, flags=re.IGNORECASE | re.MULTILINE):
                     continue
                 txt_list.append(t)
@@ -12,9 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import asyncio
+import atexit
 import logging
 import os
+import threading
 import time
+import weakref
+from http.cookiejar import CookieJar, DefaultCookiePolicy
 from typing import Any, Dict, Optional
 from urllib.parse import urlparse, urlunparse
 
@@ -34,6 +38,138 @@ DEFAULT_MAX_RETRIES = int(os.environ.get("HTTP_CLIENT_MAX_RETRIES", "2"))
 DEFAULT_BACKOFF_FACTOR = float(os.environ.get("HTTP_CLIENT_BACKOFF_FACTOR", "0.5"))
 DEFAULT_PROXY = os.environ.get("HTTP_CLIENT_PROXY")
 DEFAULT_USER_AGENT = os.environ.get("HTTP_CLIENT_USER_AGENT", "ragflow-http-client")
+# Connection pool of every shared client.
+DEFAULT_MAX_CONNECTIONS = int(os.environ.get("HTTP_CLIENT_MAX_CONNECTIONS", "100"))
+DEFAULT_MAX_KEEPALIVE = int(os.environ.get("HTTP_CLIENT_MAX_KEEPALIVE", "20"))
+DEFAULT_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_CLIENT_KEEPALIVE_EXPIRY", "30"))
+DEFAULT_HTTP2 = bool(int(os.environ.get("HTTP_CLIENT_HTTP2", "0")))
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class HttpClientRegistry:
+    """
+    Process-wide httpx clients, one per (origin, proxy, timeout, redirect policy).
+
+    Reusing a client keeps its TCP/TLS connections alive between calls instead of
+    handshaking on every request. Async clients are bound to the event loop that
+    created them, so they are kept per loop and dropped with it. The clients serve
+    unrelated callers (e.g. the OAuth logins of different users), so they never
+    store cookies.
+    """
+
+    def __init__(self):
+        self._sync: Dict[tuple, httpx.Client] = {}
+        self._async: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._http2 = DEFAULT_HTTP2 and _http2_available()
+        if DEFAULT_HTTP2 and not self._http2:
+            logger.warning("HTTP_CLIENT_HTTP2 is set but the h2 package is missing; using HTTP/1.1")
+
+    @staticmethod
+    def _key(url: str, timeout, proxy, follow_redirects: bool, max_redirects: int) -> tuple:
+        parsed = urlparse(url)
+        if isinstance(timeout, httpx.Timeout):
+            timeout = (timeout.connect, timeout.read, timeout.write, timeout.pool)
+        return f"{parsed.scheme}://{parsed.netloc}", str(proxy) if proxy else None, timeout, follow_redirects, max_redirects
+
+    def _client_kwargs(self, timeout, proxy, follow_redirects: bool, max_redirects: int) -> dict:
+        return {
+            "timeout": timeout,
+            "follow_redirects": follow_redirects,
+            "max_redirects": max_redirects,
+            "proxy": proxy,
+            "http2": self._http2,
+            "cookies": CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+            "limits": httpx.Limits(
+                max_connections=DEFAULT_MAX_CONNECTIONS,
+                max_keepalive_connections=DEFAULT_MAX_KEEPALIVE,
+                keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+            ),
+        }
+
+    def get_sync(self, url: str, *, timeout=None, proxy=None, follow_redirects=None, max_redirects=None) -> httpx.Client:
+        timeout, proxy, follow_redirects, max_redirects = _resolve(timeout, proxy, follow_redirects, max_redirects)
+        key = self._key(url, timeout, proxy, follow_redirects, max_redirects)
+        client = self._sync.get(key)
+        if client is None or client.is_closed:
+            with self._lock:
+                client = self._sync.get(key)
+                if client is None or client.is_closed:
+                    client = httpx.Client(**self._client_kwargs(timeout, proxy, follow_redirects, max_redirects))
+                    self._sync[key] = client
+        return client
+
+    def get_async(self, url: str, *, timeout=None, proxy=None, follow_redirects=None, max_redirects=None) -> httpx.AsyncClient:
+        timeout, proxy, follow_redirects, max_redirects = _resolve(timeout, proxy, follow_redirects, max_redirects)
+        key = self._key(url, timeout, proxy, follow_redirects, max_redirects)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(**self._client_kwargs(timeout, proxy, follow_redirects, max_redirects))
+                clients[key] = client
+        return client
+
+    def close(self):
+        """Close the shared sync clients; async ones go with their loops or `aclose`."""
+        with self._lock:
+            clients, self._sync = list(self._sync.values()), {}
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                logger.exception("Failed to close HTTP client")
+
+    async def aclose(self):
+        """Close the async clients of the running loop."""
+        with self._lock:
+            clients = self._async.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception:
+                logger.exception("Failed to close async HTTP client")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"sync_clients": len(self._sync), "async_clients": sum(len(c) for c in self._async.values())}
+
+
+def _resolve(timeout, proxy, follow_redirects, max_redirects):
+    return (
+        DEFAULT_TIMEOUT if timeout is None else timeout,
+        DEFAULT_PROXY if proxy is None else proxy,
+        DEFAULT_FOLLOW_REDIRECTS if follow_redirects is None else follow_redirects,
+        DEFAULT_MAX_REDIRECTS if max_redirects is None else max_redirects,
+    )
+
+
+HTTP_CLIENTS = HttpClientRegistry()
+atexit.register(HTTP_CLIENTS.close)
+
+
+def get_sync_client(url: str, **kwargs: Any) -> httpx.Client:
+    """Shared sync client for the origin of `url`; don't close it."""
+    return HTTP_CLIENTS.get_sync(url, **kwargs)
+
+
+def get_async_client(url: str, **kwargs: Any) -> httpx.AsyncClient:
+    """Shared async client for the origin of `url` on the running loop; don't close it."""
+    return HTTP_CLIENTS.get_async(url, **kwargs)
+
+
+def pooled_request(method: str, url: str, *, timeout: float | httpx.Timeout | None = None, proxy: Any = None,
+                   **kwargs: Any) -> httpx.Response:
+    """One request on the shared client, without the retries of `sync_request`."""
+    return HTTP_CLIENTS.get_sync(url, timeout=timeout, proxy=proxy).request(method, url, **kwargs)
 
 
 def _clean_headers(
@@ -143,45 +279,46 @@ async def async_request(
     headers = _clean_headers(headers, auth_token=auth_token)
     proxy = DEFAULT_PROXY if proxy is None else proxy
 
-    async with httpx.AsyncClient(
+    client = HTTP_CLIENTS.get_async(
+        url,
         timeout=timeout,
         follow_redirects=follow_redirects,
         max_redirects=max_redirects,
         proxy=proxy,
-    ) as client:
-        last_exc: Exception | None = None
-        for attempt in range(retries + 1):
-            try:
-                start = time.monotonic()
-                response = await client.request(
-                    method=method, url=url, headers=headers, **kwargs
-                )
-                duration = time.monotonic() - start
-                if not _is_sensitive_url(url):
-                    log_url = _redact_sensitive_url_params(url)
-                    logger.debug(f"async_request {method} {log_url} -> {response.status_code} in {duration:.3f}s")
-                return response
-            except httpx.RequestError as exc:
-                last_exc = exc
-                if attempt >= retries:
-                    if not _is_sensitive_url(url):
-                        log_url = _redact_sensitive_url_params(url)
-                        logger.warning(f"async_request exhausted retries for {method}")
-                    raise
-                delay = _get_delay(backoff_factor, attempt)
+    )
+    last_exc: Exception | None = None
+    for attempt in range(retries + 1):
+        try:
+            start = time.monotonic()
+            response = await client.request(
+                method=method, url=url, headers=headers, **kwargs
+            )
+            duration = time.monotonic() - start
+            if not _is_sensitive_url(url):
+                log_url = _redact_sensitive_url_params(url)
+                logger.debug(f"async_request {method} {log_url} -> {response.status_code} in {duration:.3f}s")
+            return response
+        except httpx.RequestError as exc:
+            last_exc = exc
+            if attempt >= retries:
                 if not _is_sensitive_url(url):
                     log_url = _redact_sensitive_url_params(url)
-                    logger.warning(
-                        f"async_request attempt {attempt + 1}/{retries + 1} failed for {method}; retrying in {delay:.2f}s"
-                    )
-                    raise
-                delay = _get_delay(backoff_factor, attempt)
-                # Avoid including the (potentially sensitive) URL in retry logs.
+                    logger.warning(f"async_request exhausted retries for {method}")
+                raise
+            delay = _get_delay(backoff_factor, attempt)
+            if not _is_sensitive_url(url):
+                log_url = _redact_sensitive_url_params(url)
                 logger.warning(
                     f"async_request attempt {attempt + 1}/{retries + 1} failed for {method}; retrying in {delay:.2f}s"
                 )
-                await asyncio.sleep(delay)
-        raise last_exc  # pragma: no cover
+                raise
+            delay = _get_delay(backoff_factor, attempt)
+            # Avoid including the (potentially sensitive) URL in retry logs.
+            logger.warning(
+                f"async_request attempt {attempt + 1}/{retries + 1} failed for {method}; retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+    raise last_exc  # pragma: no cover
 
 
 def sync_request(
@@ -211,42 +348,47 @@ def sync_request(
     headers = _clean_headers(headers, auth_token=auth_token)
     proxy = DEFAULT_PROXY if proxy is None else proxy
 
-    with httpx.Client(
+    client = HTTP_CLIENTS.get_sync(
+        url,
         timeout=timeout,
         follow_redirects=follow_redirects,
         max_redirects=max_redirects,
         proxy=proxy,
-    ) as client:
-        last_exc: Exception | None = None
-        for attempt in range(retries + 1):
-            try:
-                start = time.monotonic()
-                response = client.request(
-                    method=method, url=url, headers=headers, **kwargs
-                )
-                duration = time.monotonic() - start
-                logger.debug(
-                    f"sync_request {method} {url} -> {response.status_code} in {duration:.3f}s"
-                )
-                return response
-            except httpx.RequestError as exc:
-                last_exc = exc
-                if attempt >= retries:
-                    logger.warning(
-                        f"sync_request exhausted retries for {method} {url}: {exc}"
-                    )
-                    raise
-                delay = _get_delay(backoff_factor, attempt)
+    )
+    last_exc: Exception | None = None
+    for attempt in range(retries + 1):
+        try:
+            start = time.monotonic()
+            response = client.request(
+                method=method, url=url, headers=headers, **kwargs
+            )
+            duration = time.monotonic() - start
+            logger.debug(
+                f"sync_request {method} {url} -> {response.status_code} in {duration:.3f}s"
+            )
+            return response
+        except httpx.RequestError as exc:
+            last_exc = exc
+            if attempt >= retries:
                 logger.warning(
-                    f"sync_request attempt {attempt + 1}/{retries + 1} failed for {method} {url}: {exc}; retrying in {delay:.2f}s"
+                    f"sync_request exhausted retries for {method} {url}: {exc}"
                 )
-                time.sleep(delay)
-        raise last_exc  # pragma: no cover
+                raise
+            delay = _get_delay(backoff_factor, attempt)
+            logger.warning(
+                f"sync_request attempt {attempt + 1}/{retries + 1} failed for {method} {url}: {exc}; retrying in {delay:.2f}s"
+            )
+            time.sleep(delay)
+    raise last_exc  # pragma: no cover
 
 
 __all__ = [
     "async_request",
     "sync_request",
+    "pooled_request",
+    "get_sync_client",
+    "get_async_client",
+    "HTTP_CLIENTS",
     "DEFAULT_TIMEOUT",
     "DEFAULT_FOLLOW_REDIRECTS",
     "DEFAULT_MAX_REDIRECTS",
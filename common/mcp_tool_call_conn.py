@@ -15,10 +15,13 @@
 #
 
 import asyncio
+import json
 import logging
+import os
 import threading
+import time
 import weakref
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 from concurrent.futures import TimeoutError as FuturesTimeoutError
 from string import Template
 from typing import Any, Literal, Protocol
@@ -31,9 +34,14 @@ from mcp.client.sse import sse_client
 from mcp.client.streamable_http import streamablehttp_client
 from mcp.types import CallToolResult, ListToolsResult, TextContent, Tool
 
-MCPTaskType = Literal["list_tools", "tool_call"]
+MCPTaskType = Literal["list_tools", "tool_call", "ping"]
 MCPTask = tuple[MCPTaskType, dict[str, Any], asyncio.Queue[Any]]
 
+# Pooled sessions idle longer than this are closed by the pool's health check.
+MCP_SESSION_IDLE_TTL = float(os.environ.get("MCP_SESSION_IDLE_TTL", 300))
+MCP_TOOLS_CACHE_TTL = float(os.environ.get("MCP_TOOLS_CACHE_TTL", 60))
+MCP_POOL_CHECK_INTERVAL = float(os.environ.get("MCP_POOL_CHECK_INTERVAL", 30))
+
 
 class ToolCallSession(Protocol):
     def tool_call(self, name: str, arguments: dict[str, Any]) -> str: ...
@@ -41,20 +49,44 @@ class ToolCallSession(Protocol):
 
 class MCPToolCallSession(ToolCallSession):
     _ALL_INSTANCES: weakref.WeakSet["MCPToolCallSession"] = weakref.WeakSet()
-
-    def __init__(self, mcp_server: Any, server_variables: dict[str, Any] | None = None) -> None:
+    # Requests are multiplexed on the session, so an LLM turn may call its tools at once.
+    concurrent_tool_calls = True
+
+    def __init__(self, mcp_server: Any, server_variables: dict[str, Any] | None = None,
+                 event_loop: asyncio.AbstractEventLoop | None = None, tools_cache_ttl: float = 0) -> None:
+        """
+        Args:
+            mcp_server: The MCP server record (id, url, server_type, headers).
+            server_variables: Values substituted into the header templates.
+            event_loop: A running loop to host the session on; by default the session runs its own loop thread.
+            tools_cache_ttl: Seconds `get_tools` reuses the last tool list; 0 disables caching.
+        """
         self.__class__._ALL_INSTANCES.add(self)
 
         self._mcp_server = mcp_server
         self._server_variables = server_variables or {}
         self._queue = asyncio.Queue()
         self._close = False
+        self._error_message: str | None = None
+        self._tools_cache_ttl = tools_cache_ttl
+        self._tools_cache: tuple[float, list[Tool]] | None = None
+        self.pooled = False
+        self.last_used = time.monotonic()
+
+        if event_loop is None:
+            self._event_loop = asyncio.new_event_loop()
+            self._thread_pool = ThreadPoolExecutor(max_workers=1)
+            self._thread_pool.submit(self._event_loop.run_forever)
+        else:
+            self._event_loop = event_loop
+            self._thread_pool = None
 
-        self._event_loop = asyncio.new_event_loop()
-        self._thread_pool = ThreadPoolExecutor(max_workers=1)
-        self._thread_pool.submit(self._event_loop.run_forever)
+        self._server_future = asyncio.run_coroutine_threadsafe(self._mcp_server_loop(), self._event_loop)
 
-        asyncio.run_coroutine_threadsafe(self._mcp_server_loop(), self._event_loop)
+    @property
+    def healthy(self) -> bool:
+        """False once the session is closed, failed to connect or its connection ended."""
+        return not self._close and self._error_message is None and not self._server_future.done()
 
     async def _mcp_server_loop(self) -> None:
         url = self._mcp_server.url.strip()
@@ -113,6 +145,18 @@ class MCPToolCallSession(ToolCallSession):
                                           f"Unsupported MCP server type: {self._mcp_server.server_type}, id: {self._mcp_server.id}")
 
     async def _process_mcp_tasks(self, client_session: ClientSession | None, error_message: str | None = None) -> None:
+        if error_message:
+            self._error_message = error_message
+        # Requests are multiplexed over the one client session, each in its own task.
+        inflight: set[asyncio.Task] = set()
+        try:
+            await self._dispatch_mcp_tasks(client_session, error_message, inflight)
+        finally:
+            for task in inflight:
+                task.cancel()
+
+    async def _dispatch_mcp_tasks(self, client_session: ClientSession | None, error_message: str | None,
+                                  inflight: set[asyncio.Task]) -> None:
         while not self._close:
             try:
                 mcp_task, arguments, result_queue = await asyncio.wait_for(self._queue.get(), timeout=1)
@@ -133,22 +177,25 @@ class MCPToolCallSession(ToolCallSession):
                     break
                 continue
 
-            try:
-                if mcp_task == "list_tools":
-                    r = await client_session.list_tools()
-                elif mcp_task == "tool_call":
-                    r = await client_session.call_tool(**arguments)
-                else:
-                    r = ValueError(f"Unknown MCP task {mcp_task}")
-            except Exception as e:
-                r = e
-            except asyncio.CancelledError:
-                break
+            task = asyncio.create_task(self._run_mcp_task(client_session, mcp_task, arguments, result_queue))
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
 
-            try:
-                await result_queue.put(r)
-            except asyncio.CancelledError:
-                break
+    async def _run_mcp_task(self, client_session: ClientSession, mcp_task: MCPTaskType, arguments: dict[str, Any],
+                            result_queue: asyncio.Queue[Any]) -> None:
+        r: Any = None
+        try:
+            if mcp_task == "list_tools":
+                r = await client_session.list_tools()
+            elif mcp_task == "tool_call":
+                r = await client_session.call_tool(**arguments)
+            elif mcp_task == "ping":
+                r = await client_session.send_ping()
+            else:
+                r = ValueError(f"Unknown MCP task {mcp_task}")
+        except Exception as e:
+            r = e
+        await result_queue.put(r)
 
     async def _call_mcp_server(self, task_type: MCPTaskType, request_timeout: float | int = 8, **kwargs) -> Any:
         if self._close:
@@ -187,13 +234,25 @@ class MCPToolCallSession(ToolCallSession):
         except Exception:
             raise
 
+    async def ping(self, request_timeout: float | int = 5) -> None:
+        """Round trip to the server; raises if the connection is unusable. Runs on the session's loop."""
+        await self._call_mcp_server("ping", request_timeout=request_timeout)
+
     def get_tools(self, timeout: float | int = 10) -> list[Tool]:
         if self._close:
             raise ValueError("Session is closed")
 
+        self.last_used = time.monotonic()
+        cached = self._tools_cache
+        if cached and time.monotonic() - cached[0] < self._tools_cache_ttl:
+            return cached[1]
+
         future = asyncio.run_coroutine_threadsafe(self._get_tools_from_mcp_server(request_timeout=timeout), self._event_loop)
         try:
-            return future.result(timeout=timeout)
+            tools = future.result(timeout=timeout)
+            if self._tools_cache_ttl > 0:
+                self._tools_cache = (time.monotonic(), tools)
+            return tools
         except FuturesTimeoutError:
             msg = f"Timeout when fetching tools from MCP server: {self._mcp_server.id} (timeout={timeout})"
             logging.error(msg)
@@ -207,6 +266,7 @@ class MCPToolCallSession(ToolCallSession):
         if self._close:
             return "Error: Session is closed"
 
+        self.last_used = time.monotonic()
         future = asyncio.run_coroutine_threadsafe(self._call_mcp_tool(name, arguments), self._event_loop)
         try:
             return future.result(timeout=timeout)
@@ -235,15 +295,16 @@ class MCPToolCallSession(ToolCallSession):
             except Exception:
                 break
 
-        try:
-            self._event_loop.call_soon_threadsafe(self._event_loop.stop)
-        except Exception:
-            pass
+        if self._thread_pool is not None:
+            try:
+                self._event_loop.call_soon_threadsafe(self._event_loop.stop)
+            except Exception:
+                pass
 
-        try:
-            self._thread_pool.shutdown(wait=True)
-        except Exception:
-            pass
+            try:
+                self._thread_pool.shutdown(wait=True)
+            except Exception:
+                pass
 
         self.__class__._ALL_INSTANCES.discard(self)
 
@@ -264,7 +325,125 @@ class MCPToolCallSession(ToolCallSession):
             logging.exception(f"Exception while scheduling close for server {self._mcp_server.id}")
 
 
+class MCPSessionPool:
+    """
+    Process-wide MCP sessions, one per server configuration, hosted on one shared loop thread.
+
+    Sessions stay connected between agent runs and API calls. A background check
+    pings them every MCP_POOL_CHECK_INTERVAL seconds and closes the ones that are
+    idle for MCP_SESSION_IDLE_TTL seconds or fail the ping; a broken session is
+    replaced on the next `get`. Pooled sessions belong to the pool, so
+    `close_multiple_mcp_toolcall_sessions` leaves them alone.
+    """
+
+    def __init__(self, idle_ttl: float = MCP_SESSION_IDLE_TTL, tools_cache_ttl: float = MCP_TOOLS_CACHE_TTL,
+                 check_interval: float = MCP_POOL_CHECK_INTERVAL) -> None:
+        self.idle_ttl = idle_ttl
+        self.tools_cache_ttl = tools_cache_ttl
+        self.check_interval = check_interval
+        self._sessions: dict[tuple, MCPToolCallSession] = {}
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._checker: Future | None = None
+
+    @staticmethod
+    def _key(mcp_server: Any, server_variables: dict[str, Any] | None) -> tuple:
+        # The cached tool selection in the variables doesn't change the connection.
+        variables = {k: v for k, v in (server_variables or {}).items() if k != "tools"}
+        return (
+            mcp_server.id,
+            str(mcp_server.server_type),
+            mcp_server.url.strip(),
+            json.dumps(mcp_server.headers or {}, sort_keys=True, default=str),
+            json.dumps(variables, sort_keys=True, default=str),
+        )
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=loop.run_forever, name="mcp-session-pool", daemon=True)
+            self._thread.start()
+            self._checker = asyncio.run_coroutine_threadsafe(self._check_sessions(), loop)
+            self._loop = loop
+        return self._loop
+
+    def get(self, mcp_server: Any, server_variables: dict[str, Any] | None = None) -> MCPToolCallSession:
+        """Return the warm session for this server configuration, connecting one if needed."""
+        key = self._key(mcp_server, server_variables)
+        with self._lock:
+            loop = self._ensure_loop()
+            session = self._sessions.get(key)
+            if session is not None and session.healthy:
+                return session
+            stale = session
+            session = MCPToolCallSession(mcp_server, server_variables, event_loop=loop, tools_cache_ttl=self.tools_cache_ttl)
+            session.pooled = True
+            self._sessions[key] = session
+        if stale is not None:
+            asyncio.run_coroutine_threadsafe(stale.close(), loop)
+        return session
+
+    async def _evict(self, key: tuple, session: MCPToolCallSession, reason: str) -> None:
+        with self._lock:
+            if self._sessions.get(key) is session:
+                del self._sessions[key]
+        logging.info(f"Closing pooled MCP session for server {session._mcp_server.id}: {reason}")
+        await session.close()
+
+    async def _check_sessions(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            with self._lock:
+                sessions = list(self._sessions.items())
+            now = time.monotonic()
+            for key, session in sessions:
+                if now - session.last_used > self.idle_ttl:
+                    await self._evict(key, session, "idle")
+                elif not session.healthy:
+                    await self._evict(key, session, "disconnected")
+                else:
+                    try:
+                        await session.ping(request_timeout=min(5, self.check_interval))
+                    except Exception as e:
+                        await self._evict(key, session, f"ping failed: {e}")
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"sessions": len(self._sessions), "healthy": sum(1 for s in self._sessions.values() if s.healthy)}
+
+    def close(self, timeout: float | int = 5) -> None:
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+            loop, self._loop = self._loop, None
+            thread, self._thread = self._thread, None
+            checker, self._checker = self._checker, None
+        if loop is None:
+            return
+        checker.cancel()
+
+        async def _close_all() -> None:
+            await asyncio.gather(*[s.close() for s in sessions], return_exceptions=True)
+            # Give the session tasks a moment to leave their transports cleanly.
+            await asyncio.sleep(min(timeout, 1.5))
+
+        try:
+            asyncio.run_coroutine_threadsafe(_close_all(), loop).result(timeout=timeout)
+        except Exception:
+            logging.exception("Exception while closing pooled MCP sessions")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=timeout)
+        if not thread.is_alive():
+            loop.close()
+
+
+MCP_SESSION_POOL = MCPSessionPool()
+
+
 def close_multiple_mcp_toolcall_sessions(sessions: list[MCPToolCallSession]) -> None:
+    sessions = [s for s in sessions if s is not None and not s.pooled]
+    if not sessions:
+        return
     logging.info(f"Want to clean up {len(sessions)} MCP sessions")
 
     async def _gather_and_stop() -> None:
@@ -285,6 +464,7 @@ def close_multiple_mcp_toolcall_sessions(sessions: list[MCPToolCallSession]) ->
 
         asyncio.run_coroutine_threadsafe(_gather_and_stop(), loop).result()
         thread.join()
+        loop.close()
     except Exception:
         logging.exception("Exception during MCP session cleanup thread management")
 
@@ -294,7 +474,8 @@ def close_multiple_mcp_toolcall_sessions(sessions: list[MCPToolCallSession]) ->
 
 def shutdown_all_mcp_sessions():
     """Gracefully shutdown all active MCPToolCallSession instances."""
-    sessions = list(MCPToolCallSession._ALL_INSTANCES)
+    MCP_SESSION_POOL.close()
+    sessions = [s for s in MCPToolCallSession._ALL_INSTANCES if not s.pooled]
     if not sessions:
         logging.info("No MCPToolCallSession instances to close.")
         return
@@ -16,6 +16,7 @@
 
 import base64
 import hashlib
+import time
 import uuid
 import requests
 import threading
@@ -23,6 +24,7 @@ import subprocess
 import sys
 import os
 import logging
+from collections import OrderedDict
 
 def get_uuid():
     return uuid.uuid1().hex
@@ -98,6 +100,67 @@ def once(func):
         return result
     return wrapper
 
+class TTLCache:
+    """
+    A thread-safe, size-bounded LRU mapping whose entries expire after `ttl` seconds.
+
+    Args:
+        maxsize (int): Maximum number of entries; the least recently used one is evicted first.
+        ttl (float): Seconds an entry stays valid after it is set.
+
+    Example:
+        cache = TTLCache(maxsize=1024, ttl=30)
+        cache.set("k", 1)
+        cache.get("k")  # 1, or None once expired or evicted
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def pop_where(self, predicate) -> int:
+        """Drop every entry for which `predicate(key, value)` is true; returns how many were dropped."""
+        with self._lock:
+            keys = [k for k, (_, v) in self._data.items() if predicate(k, v)]
+            for k in keys:
+                del self._data[k]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
 @once
 def pip_install_torch():
     device = os.getenv("DEVICE", "cpu")
@@ -0,0 +1,232 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+"""
+Keyed pool of connections to user databases, and capped result fetching.
+
+Connections are pooled per key (database type, address, database, user and a
+digest of the password). A connection idle for a while is pinged before it is
+handed out again, connections idle past the TTL are closed, and a connection
+that saw an error is closed instead of being returned.
+"""
+
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, NamedTuple
+
+SQL_POOL_MAX_IDLE = int(os.environ.get("SQL_POOL_MAX_IDLE", 4))
+SQL_POOL_IDLE_TTL = float(os.environ.get("SQL_POOL_IDLE_TTL", 300))
+SQL_POOL_CHECK_AFTER = float(os.environ.get("SQL_POOL_CHECK_AFTER", 5))
+
+
+def pool_key(db_type: str, host: str, port: Any, database: str, username: str, password: str) -> tuple:
+    """Pool key of a connection; the password only enters as a digest."""
+    digest = hashlib.sha256((password or "").encode("utf-8")).hexdigest()
+    return db_type, host, str(port), database, username, digest
+
+
+class DBAPIDriver:
+    """How the pool checks, resets and closes a PEP 249 connection."""
+
+    ping_sql = "SELECT 1"
+
+    def ping(self, conn) -> None:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(self.ping_sql)
+            cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def reset(self, conn) -> None:
+        # End the read transaction, so the next lease doesn't see a stale snapshot.
+        conn.rollback()
+
+    def close(self, conn) -> None:
+        conn.close()
+
+
+DBAPI_DRIVER = DBAPIDriver()
+
+
+class _Idle(NamedTuple):
+    conn: Any
+    driver: DBAPIDriver
+    since: float
+
+
+class Lease:
+    """A pooled connection checked out for the duration of a `with` block."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.reusable = True
+
+    def discard(self) -> None:
+        """Close the connection on release instead of pooling it, e.g. after an abandoned result set."""
+        self.reusable = False
+
+
+class SQLConnectionPool:
+    def __init__(self, max_idle_per_key: int = SQL_POOL_MAX_IDLE, idle_ttl: float = SQL_POOL_IDLE_TTL,
+                 check_after: float = SQL_POOL_CHECK_AFTER):
+        """
+        Args:
+            max_idle_per_key: Idle connections kept per key; extra ones are closed on release.
+            idle_ttl: Seconds an idle connection is kept.
+            check_after: Idle seconds after which a connection is pinged before reuse.
+        """
+        self.max_idle_per_key = max_idle_per_key
+        self.idle_ttl = idle_ttl
+        self.check_after = check_after
+        self._idle: dict[tuple, list[_Idle]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _close(conn, driver: DBAPIDriver) -> None:
+        try:
+            driver.close(conn)
+        except Exception:
+            logging.debug("Failed to close pooled SQL connection", exc_info=True)
+
+    def _take_expired(self, now: float) -> list[_Idle]:
+        expired = []
+        for key in list(self._idle):
+            idle = self._idle[key]
+            keep = [i for i in idle if now - i.since <= self.idle_ttl]
+            if len(keep) != len(idle):
+                expired.extend(i for i in idle if now - i.since > self.idle_ttl)
+                if keep:
+                    self._idle[key] = keep
+                else:
+                    del self._idle[key]
+        return expired
+
+    def _checkout(self, key: tuple):
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                expired = self._take_expired(now)
+                idle = self._idle.get(key)
+                item = idle.pop() if idle else None
+            for i in expired:
+                self._close(i.conn, i.driver)
+            if item is None:
+                return None
+            if now - item.since <= self.check_after:
+                return item.conn
+            try:
+                item.driver.ping(item.conn)
+                return item.conn
+            except Exception as e:
+                logging.info(f"Dropping dead pooled SQL connection to {key[1]}: {e}")
+                self._close(item.conn, item.driver)
+
+    def _checkin(self, key: tuple, conn, driver: DBAPIDriver) -> None:
+        try:
+            driver.reset(conn)
+        except Exception:
+            self._close(conn, driver)
+            return
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.max_idle_per_key:
+                idle.append(_Idle(conn, driver, time.monotonic()))
+                return
+        self._close(conn, driver)
+
+    @contextmanager
+    def connection(self, key: tuple, connect: Callable[[], Any], driver: DBAPIDriver = DBAPI_DRIVER) -> Iterator[Lease]:
+        """
+        Lease a connection for `key`, opening one with `connect()` if none is idle.
+
+        The connection goes back to the pool when the block exits normally and the
+        lease wasn't discarded; otherwise it is closed.
+        """
+        conn = self._checkout(key)
+        if conn is None:
+            conn = connect()
+        lease = Lease(conn)
+        try:
+            yield lease
+        except BaseException:
+            lease.discard()
+            raise
+        finally:
+            if lease.reusable:
+                self._checkin(key, conn, driver)
+            else:
+                self._close(conn, driver)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"keys": len(self._idle), "idle": sum(len(v) for v in self._idle.values())}
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, defaultdict(list)
+        for items in idle.values():
+            for i in items:
+                self._close(i.conn, i.driver)
+
+
+SQL_CONNECTION_POOL = SQLConnectionPool()
+atexit.register(SQL_CONNECTION_POOL.close_all)
+
+
+class FetchResult(NamedTuple):
+    rows: list
+    complete: bool
+    over_bytes: bool
+    canceled: bool = False
+
+
+def _row_size(row) -> int:
+    values = row.values() if isinstance(row, dict) else row
+    return sum(len(v) if isinstance(v, (str, bytes)) else 8 for v in values)
+
+
+def fetch_capped(fetchmany: Callable[[int], list], max_rows: int, max_bytes: int, batch_size: int = 256,
+                 canceled: Callable[[], bool] | None = None) -> FetchResult:
+    """
+    Fetch rows in batches until the result ends, `max_rows` rows are read or about
+    `max_bytes` of values are held, whichever comes first.
+
+    Returns the rows and whether the result set was read to its end (`complete`);
+    `over_bytes` tells that the byte cap stopped it, `canceled` that `canceled()`
+    did. At least one row is kept.
+    """
+    rows = []
+    size = 0
+    while len(rows) < max_rows:
+        if canceled and canceled():
+            return FetchResult(rows, False, False, True)
+        want = min(batch_size, max_rows - len(rows))
+        batch = fetchmany(want)
+        for row in batch:
+            size += _row_size(row)
+            if size > max_bytes and rows:
+                return FetchResult(rows, False, True)
+            rows.append(row)
+        if len(batch) < want:
+            return FetchResult(rows, True, False)
+    return FetchResult(rows, False, False)
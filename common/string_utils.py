@@ -71,3 +71,67 @@ def clean_markdown_block(text):
 
     # Return text with surrounding whitespace removed
     return text.strip()
+
+
+_HIGHLIGHT_BOUNDARY = r"[ .?/'\"\(\)!,:;-]"
+_EM_PATTERN = re.compile(r"<em>[^<>]+</em>", flags=re.IGNORECASE | re.MULTILINE)
+
+
+class KeywordHighlighter:
+    """
+    Wrap query keywords in <em> tags, sentence by sentence, for English text.
+
+    Built once per query and reused across hits. All keywords are compiled into a
+    single alternation that screens out sentences mentioning none of them; the
+    remaining sentences get the per-keyword substitutions of the original
+    highlighter, restricted to keywords the sentence actually contains, so the
+    output is identical to running every keyword's `re.sub` on every sentence.
+    """
+
+    def __init__(self, keywords: list[str]):
+        self.keywords = list(keywords)
+        self._subs = [
+            (w, w.lower(), w.isascii(),
+             re.compile(r"(^|%s)(%s)(%s)" % (_HIGHLIGHT_BOUNDARY, re.escape(w), _HIGHLIGHT_BOUNDARY),
+                        flags=re.IGNORECASE | re.MULTILINE))
+            for w in self.keywords
+        ]
+        alternatives = sorted({w for w in self.keywords if w}, key=len, reverse=True)
+        self._matcher = re.compile("|".join(re.escape(w) for w in alternatives),
+                                   flags=re.IGNORECASE | re.MULTILINE) if alternatives else None
+
+    def _contains(self, t: str, t_lower: str, w: str, w_lower: str, w_ascii: bool) -> bool:
+        if w_ascii and t.isascii():
+            return w_lower in t_lower
+        return re.search(re.escape(w), t, flags=re.IGNORECASE | re.MULTILINE) is not None
+
+    def highlight_sentence(self, t: str) -> str | None:
+        """Return the sentence with keywords wrapped in <em>, or None if it has no highlight."""
+        if self._matcher is None or not self._matcher.search(t):
+            # No keyword occurs, so only an empty keyword could change the sentence,
+            # and that never produces a non-empty <em> by itself.
+            if not _EM_PATTERN.search(t):
+                return None
+            for _, _, _, pattern in self._subs:
+                t = pattern.sub(r"\1<em>\2</em>\3", t)
+            return t
+
+        t_lower = t.lower()
+        for w, w_lower, w_ascii, pattern in self._subs:
+            if not self._contains(t, t_lower, w, w_lower, w_ascii):
+                continue
+            highlighted = pattern.sub(r"\1<em>\2</em>\3", t)
+            if highlighted != t:
+                t = highlighted
+                t_lower = t.lower()
+        return t if _EM_PATTERN.search(t) else None
+
+    def highlight(self, txt: str) -> list[str]:
+        """Split text into sentences and return the highlighted ones, in order."""
+        txt = re.sub(r"[\r\n]", " ", txt, flags=re.IGNORECASE | re.MULTILINE)
+        highlighted = []
+        for t in re.split(r"[.?!;\n]", txt):
+            t = self.highlight_sentence(t)
+            if t is not None:
+                highlighted.append(t)
+        return highlighted
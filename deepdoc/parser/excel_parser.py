@@ -14,6 +14,7 @@
 import logging
 import re
 import sys
+import zipfile
 from io import BytesIO
 
 import pandas as pd
@@ -25,6 +26,9 @@ from rag.nlp import find_codec
 # copied from `/openpyxl/cell/cell.py`
 ILLEGAL_CHARACTERS_RE = re.compile(r"[\000-\010]|[\013-\014]|[\016-\037]")
 
+# Start tag of a merged range in sheet XML, with or without a namespace prefix.
+_MERGE_CELL_TAG = re.compile(rb"<(?:\w+:)?mergeCell\b")
+
 
 class RAGFlowExcelParser:
     @staticmethod
@@ -65,6 +69,59 @@ class RAGFlowExcelParser:
             except Exception as e_pandas:
                 raise Exception(f"pandas.read_excel error: {e_pandas}, original openpyxl error: {e}")
 
+    @staticmethod
+    def _has_read_only_losses(file_like_object) -> bool:
+        """
+        Whether reading an .xlsx in read-only mode would lose content: embedded images
+        (drawings or media parts) or merged cells, which the full load turns into image
+        descriptions and multi-level headers.
+        """
+        if isinstance(file_like_object, bytes):
+            file_like_object = BytesIO(file_like_object)
+        try:
+            with zipfile.ZipFile(file_like_object) as zf:
+                names = zf.namelist()
+                if any(n.startswith(("xl/drawings/", "xl/media/")) for n in names):
+                    return True
+                for name in names:
+                    if not (name.startswith("xl/worksheets/") and name.endswith(".xml")):
+                        continue
+                    with zf.open(name) as f:
+                        tail = b""
+                        while chunk := f.read(1 << 20):
+                            if _MERGE_CELL_TAG.search(tail + chunk):
+                                return True
+                            tail = chunk[-32:]
+        except zipfile.BadZipFile:
+            return False
+        finally:
+            file_like_object.seek(0)
+        return False
+
+    @staticmethod
+    def _load_read_only_workbook(file_like_object):
+        """
+        Open an .xlsx file in openpyxl's read-only mode, which streams rows from the
+        sheet XML instead of building every cell up front.
+
+        Returns None for anything that can't be streamed (.xls, CSV, broken files);
+        callers then fall back to `_load_excel_to_workbook`. Read-only worksheets
+        have no merged-cell ranges, images or random cell access.
+        """
+        if isinstance(file_like_object, bytes):
+            file_like_object = BytesIO(file_like_object)
+        file_like_object.seek(0)
+        file_head = file_like_object.read(4)
+        file_like_object.seek(0)
+        if not file_head.startswith(b"PK\x03\x04"):
+            return None
+        try:
+            return load_workbook(file_like_object, read_only=True, data_only=True)
+        except Exception as e:
+            logging.info(f"openpyxl read-only load error: {e}")
+            file_like_object.seek(0)
+            return None
+
     @staticmethod
     def _clean_dataframe(df: pd.DataFrame):
         def clean_string(s):
@@ -247,6 +304,17 @@ class RAGFlowExcelParser:
     @staticmethod
     def row_number(fnm, binary):
         if fnm.split(".")[-1].lower().find("xls") >= 0:
+            wb = RAGFlowExcelParser._load_read_only_workbook(BytesIO(binary))
+            if wb is not None:
+                total = 0
+                for sheetname in wb.sheetnames:
+                    try:
+                        total += sum(1 for _ in wb[sheetname].iter_rows(values_only=True))
+                    except Exception as e:
+                        logging.warning(f"Skip sheet '{sheetname}' due to rows access error: {e}")
+                wb.close()
+                return total
+
             wb = RAGFlowExcelParser._load_excel_to_workbook(BytesIO(binary))
             total = 0
             
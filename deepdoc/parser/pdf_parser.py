@@ -38,7 +38,7 @@ from sklearn.metrics import silhouette_score
 
 from common.file_utils import get_project_base_directory
 from common.misc_utils import pip_install_torch
-from deepdoc.vision import OCR, AscendLayoutRecognizer, LayoutRecognizer, Recognizer, TableStructureRecognizer
+from deepdoc.vision import OCR, AscendLayoutRecognizer, BoxTable, LayoutRecognizer, Recognizer, TableStructureRecognizer
 from rag.nlp import rag_tokenizer
 from rag.prompts.generator import vision_llm_describe_prompt
 from common import settings
@@ -236,9 +236,11 @@ class RAGFlowPdfParser:
                     pg.append(it)
             self.tb_cpns.extend(pg)
 
+        boxes_tbl = BoxTable(self.boxes)
+
         def gather(kwd, fzy=10, ption=0.6):
             eles = Recognizer.sort_Y_firstly([r for r in self.tb_cpns if re.match(kwd, r["label"])], fzy)
-            eles = Recognizer.layouts_cleanup(self.boxes, eles, 5, ption)
+            eles = Recognizer.layouts_cleanup(self.boxes, eles, 5, ption, table=boxes_tbl)
             return Recognizer.sort_Y_firstly(eles, 0)
 
         # add R,H,C,SP tag to boxes within table layout
@@ -246,17 +248,18 @@ class RAGFlowPdfParser:
         rows = gather(r".* (row|header)")
         spans = gather(r".*spanning")
         clmns = sorted([r for r in self.tb_cpns if re.match(r"table column$", r["label"])], key=lambda x: (x["pn"], x["layoutno"], x["x0"]))
-        clmns = Recognizer.layouts_cleanup(self.boxes, clmns, 5, 0.5)
+        clmns = Recognizer.layouts_cleanup(self.boxes, clmns, 5, 0.5, table=boxes_tbl)
+        rows_tbl, headers_tbl, spans_tbl = BoxTable(rows), BoxTable(headers), BoxTable(spans)
         for b in self.boxes:
             if b.get("layout_type", "") != "table":
                 continue
-            ii = Recognizer.find_overlapped_with_threshold(b, rows, thr=0.3)
+            ii = Recognizer.find_overlapped_with_threshold(b, rows, thr=0.3, table=rows_tbl)
             if ii is not None:
                 b["R"] = ii
                 b["R_top"] = rows[ii]["top"]
                 b["R_bott"] = rows[ii]["bottom"]
 
-            ii = Recognizer.find_overlapped_with_threshold(b, headers, thr=0.3)
+            ii = Recognizer.find_overlapped_with_threshold(b, headers, thr=0.3, table=headers_tbl)
             if ii is not None:
                 b["H_top"] = headers[ii]["top"]
                 b["H_bott"] = headers[ii]["bottom"]
@@ -270,7 +273,7 @@ class RAGFlowPdfParser:
                 b["C_left"] = clmns[ii]["x0"]
                 b["C_right"] = clmns[ii]["x1"]
 
-            ii = Recognizer.find_overlapped_with_threshold(b, spans, thr=0.3)
+            ii = Recognizer.find_overlapped_with_threshold(b, spans, thr=0.3, table=spans_tbl)
             if ii is not None:
                 b["H_top"] = spans[ii]["top"]
                 b["H_bott"] = spans[ii]["bottom"]
@@ -298,8 +301,9 @@ class RAGFlowPdfParser:
         )
 
         # merge chars in the same rect
+        bxs_tbl = BoxTable(bxs)
         for c in chars:
-            ii = Recognizer.find_overlapped(c, bxs)
+            ii = Recognizer.find_overlapped(c, bxs, table=bxs_tbl)
             if ii is None:
                 self.lefted_chars.append(c)
                 continue
@@ -375,13 +379,7 @@ class RAGFlowPdfParser:
             width = max_x1 - min_x0
 
             INDENT_TOL = width * 0.12
-            x0s = []
-            for x in x0s_raw:
-                if abs(x - min_x0) < INDENT_TOL:
-                    x0s.append([min_x0])
-                else:
-                    x0s.append([x])
-            x0s = np.array(x0s, dtype=float)
+            x0s = np.where(np.abs(x0s_raw - min_x0) < INDENT_TOL, min_x0, x0s_raw).reshape(-1, 1)
 
             max_try = min(4, len(bxs))
             if max_try < 2:
@@ -431,10 +429,6 @@ class RAGFlowPdfParser:
             for b, lb in zip(bxs, labels):
                 b["col_id"] = remap[lb]
 
-            grouped = defaultdict(list)
-            for b in bxs:
-                grouped[b["col_id"]].append(b)
-
         return boxes
 
     def _text_merge(self, zoomin=3):
@@ -451,29 +445,33 @@ class RAGFlowPdfParser:
             return tt and any([tt.find(t.strip()) == 0 for t in txts])
 
         # horizontally merge adjacent box with the same layout
-        i = 0
-        while i < len(bxs) - 1:
-            b = bxs[i]
-            b_ = bxs[i + 1]
-
+        if not bxs:
+            self.boxes = bxs
+            return
+        merged = []
+        b = bxs[0]
+        for b_ in bxs[1:]:
             if b["page_number"] != b_["page_number"] or b.get("col_id") != b_.get("col_id"):
-                i += 1
+                merged.append(b)
+                b = b_
                 continue
 
             if b.get("layoutno", "0") != b_.get("layoutno", "1") or b.get("layout_type", "") in ["table", "figure", "equation"]:
-                i += 1
+                merged.append(b)
+                b = b_
                 continue
 
-            if abs(self._y_dis(b, b_)) < self.mean_height[bxs[i]["page_number"] - 1] / 3:
+            if abs(self._y_dis(b, b_)) < self.mean_height[b["page_number"] - 1] / 3:
                 # merge
-                bxs[i]["x1"] = b_["x1"]
-                bxs[i]["top"] = (b["top"] + b_["top"]) / 2
-                bxs[i]["bottom"] = (b["bottom"] + b_["bottom"]) / 2
-                bxs[i]["text"] += b_["text"]
-                bxs.pop(i + 1)
+                b["x1"] = b_["x1"]
+                b["top"] = (b["top"] + b_["top"]) / 2
+                b["bottom"] = (b["bottom"] + b_["bottom"]) / 2
+                b["text"] += b_["text"]
                 continue
-            i += 1
-        self.boxes = bxs
+            merged.append(b)
+            b = b_
+        merged.append(b)
+        self.boxes = merged
 
     def _naive_vertical_merge(self, zoomin=3):
         #bxs = self._assign_column(self.boxes, zoomin)
@@ -492,30 +490,32 @@ class RAGFlowPdfParser:
 
             mh = self.mean_height[pg - 1] if self.mean_height else np.median([b["bottom"] - b["top"] for b in bxs]) or 10
 
-            i = 0
-            while i + 1 < len(bxs):
-                b = bxs[i]
-                b_ = bxs[i + 1]
-
+            # Boxes are kept, dropped or merged into the current box `b` in one pass.
+            kept = []
+            b = bxs[0]
+            for b_ in bxs[1:]:
                 if b["page_number"] < b_["page_number"] and re.match(r"[0-9  •一—-]+$", b["text"]):
-                    bxs.pop(i)
+                    b = b_
                     continue
 
                 if not b["text"].strip():
-                    bxs.pop(i)
+                    b = b_
                     continue
 
                 if not b["text"].strip() or b.get("layoutno") != b_.get("layoutno"):
-                    i += 1
+                    kept.append(b)
+                    b = b_
                     continue
 
                 if b_["top"] - b["bottom"] > mh * 1.5:
-                    i += 1
+                    kept.append(b)
+                    b = b_
                     continue
 
                 overlap = max(0, min(b["x1"], b_["x1"]) - max(b["x0"], b_["x0"]))
                 if overlap / max(1, min(b["x1"] - b["x0"], b_["x1"] - b_["x0"])) < 0.3:
-                    i += 1
+                    kept.append(b)
+                    b = b_
                     continue
 
                 concatting_feats = [
@@ -542,16 +542,17 @@ class RAGFlowPdfParser:
                             any(concatting_feats),
                         )
                     )
-                    i += 1
+                    kept.append(b)
+                    b = b_
                     continue
 
                 b["text"] = (b["text"].rstrip() + " " + b_["text"].lstrip()).strip()
                 b["bottom"] = b_["bottom"]
                 b["x0"] = min(b["x0"], b_["x0"])
                 b["x1"] = max(b["x1"], b_["x1"])
-                bxs.pop(i + 1)
+            kept.append(b)
 
-            merged_boxes.extend(bxs)
+            merged_boxes.extend(kept)
 
         #self.boxes = sorted(merged_boxes, key=lambda x: (x["page_number"], x.get("col_id", 0), x["top"]))
 
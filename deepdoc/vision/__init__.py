@@ -19,6 +19,7 @@ import threading
 
 import pdfplumber
 
+from .box_table import BoxTable
 from .ocr import OCR
 from .recognizer import Recognizer
 from .layout_recognizer import AscendLayoutRecognizer
@@ -81,6 +82,7 @@ def init_in_out(args):
 
 
 __all__ = [
+    "BoxTable",
     "OCR",
     "Recognizer",
     "LayoutRecognizer",
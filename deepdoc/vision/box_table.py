@@ -0,0 +1,79 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import numpy as np
+
+# Relative slack of the candidate queries. Box coordinates are often float32,
+# whose comparisons against Python floats round at about 6e-8 relative.
+BOX_TABLE_SLACK = 1e-5
+# Ranges up to this many boxes are returned whole; filtering them costs more than it saves.
+BOX_TABLE_MIN_FILTER = 32
+
+
+class BoxTable:
+    """
+    Column view (x0, x1, top, bottom) over a list of box dicts, for overlap queries.
+
+    The boxes are indexed in a top-sorted order; a query scans the window of boxes
+    whose top lies between the query's top minus the tallest box height and the
+    query's bottom, and filters it with vectorized interval tests. The table only
+    narrows the candidates: callers still run their exact per-box checks on them, so
+    results stay the same as a scan over every box. The boxes' coordinates must not
+    change while the table is in use.
+    """
+
+    def __init__(self, boxes):
+        n = len(boxes)
+        self.x0 = np.fromiter((b["x0"] for b in boxes), dtype=np.float64, count=n)
+        self.x1 = np.fromiter((b["x1"] for b in boxes), dtype=np.float64, count=n)
+        self.top = np.fromiter((b["top"] for b in boxes), dtype=np.float64, count=n)
+        self.bottom = np.fromiter((b["bottom"] for b in boxes), dtype=np.float64, count=n)
+        self._order = np.argsort(self.top, kind="stable")
+        self._sorted_top = self.top[self._order]
+        if n:
+            self._max_height = max(0.0, float(np.max(self.bottom - self.top)))
+            scale = max(float(np.max(np.abs(c))) for c in (self.x0, self.x1, self.top, self.bottom))
+        else:
+            self._max_height, scale = 0.0, 0.0
+        self._scale = max(1.0, scale)
+
+    def __len__(self):
+        return len(self.x0)
+
+    def overlapping(self, box, start=0, end=None) -> list[int]:
+        """
+        Ascending indices in [start, end) of the boxes that may touch `box`.
+
+        A superset of the boxes not strictly left of, right of, above or below it,
+        the disjointness tests of `Recognizer.overlapped_area`.
+        """
+        end = len(self) if end is None else min(end, len(self))
+        if end - start <= BOX_TABLE_MIN_FILTER:
+            return list(range(start, end))
+        x0, x1, top, bottom = float(box["x0"]), float(box["x1"]), float(box["top"]), float(box["bottom"])
+        slack = BOX_TABLE_SLACK * max(self._scale, abs(x0), abs(x1), abs(top), abs(bottom))
+        lo = np.searchsorted(self._sorted_top, top - self._max_height - 2 * slack, "left")
+        hi = np.searchsorted(self._sorted_top, bottom + slack, "right")
+        idx = self._order[lo:hi]
+        idx = idx[
+            (self.bottom[idx] >= top - slack)
+            & (self.top[idx] <= bottom + slack)
+            & (self.x1[idx] >= x0 - slack)
+            & (self.x0[idx] <= x1 + slack)
+        ]
+        if start or end < len(self):
+            idx = idx[(idx >= start) & (idx < end)]
+        return np.sort(idx).tolist()
@@ -27,6 +27,7 @@ from .operators import *  # noqa: F403
 from .operators import preprocess
 from . import operators
 from .ocr import load_model
+from .box_table import BoxTable
 
 class Recognizer:
     def __init__(self, label_list, task_name, model_dir=None):
@@ -53,6 +54,10 @@ class Recognizer:
 
     @staticmethod
     def sort_Y_firstly(arr, threshold):
+        if not threshold > 0:
+            # No fuzzy band: the comparator below is a plain order by top.
+            return sorted(arr, key=lambda c: c["top"])
+
         def cmp(c1, c2):
             diff = c1["top"] - c2["top"]
             if abs(diff) < threshold:
@@ -63,6 +68,9 @@ class Recognizer:
 
     @staticmethod
     def sort_X_firstly(arr, threshold):
+        if not threshold > 0:
+            return sorted(arr, key=lambda c: c["x0"])
+
         def cmp(c1, c2):
             diff = c1["x0"] - c2["x0"]
             if abs(diff) < threshold:
@@ -132,7 +140,7 @@ class Recognizer:
         return ov
 
     @staticmethod
-    def layouts_cleanup(boxes, layouts, far=2, thr=0.7):
+    def layouts_cleanup(boxes, layouts, far=2, thr=0.7, table=None):
         def not_overlapped(a, b):
             return any([a["x1"] < b["x0"],
                         a["x0"] > b["x1"],
@@ -161,12 +169,15 @@ class Recognizer:
                     layouts.pop(i)
                 continue
 
+            if table is None:
+                table = BoxTable(boxes)
             area_i, area_i_1 = 0, 0
-            for b in boxes:
-                if not not_overlapped(b, layouts[i]):
-                    area_i += Recognizer.overlapped_area(b, layouts[i], False)
-                if not not_overlapped(b, layouts[j]):
-                    area_i_1 += Recognizer.overlapped_area(b, layouts[j], False)
+            for k in table.overlapping(layouts[i]):
+                if not not_overlapped(boxes[k], layouts[i]):
+                    area_i += Recognizer.overlapped_area(boxes[k], layouts[i], False)
+            for k in table.overlapping(layouts[j]):
+                if not not_overlapped(boxes[k], layouts[j]):
+                    area_i_1 += Recognizer.overlapped_area(boxes[k], layouts[j], False)
 
             if area_i > area_i_1:
                 layouts.pop(j)
@@ -215,7 +226,13 @@ class Recognizer:
         return inputs
 
     @staticmethod
-    def find_overlapped(box, boxes_sorted_by_y, naive=False):
+    def find_overlapped(box, boxes_sorted_by_y, naive=False, table=None):
+        """
+        Index of the box in `boxes_sorted_by_y` that `box` covers the largest share of.
+
+        Pass a `BoxTable` of the boxes to look at the overlapping ones only when
+        matching many boxes against the same list.
+        """
         if not boxes_sorted_by_y:
             return
         bxs = boxes_sorted_by_y
@@ -240,7 +257,7 @@ class Recognizer:
             break
 
         max_overlapped_i, max_overlapped = None, 0
-        for i in range(s, e):
+        for i in (range(s, e) if table is None else table.overlapping(box, s, e)):
             ov = Recognizer.overlapped_area(bxs[i], box)
             if ov <= max_overlapped:
                 continue
@@ -264,12 +281,13 @@ class Recognizer:
         return min_i
 
     @staticmethod
-    def find_overlapped_with_threshold(box, boxes, thr=0.3):
+    def find_overlapped_with_threshold(box, boxes, thr=0.3, table=None):
         if not boxes:
             return
         max_overlapped_i, max_overlapped, _max_overlapped = None, thr, 0
         s, e = 0, len(boxes)
-        for i in range(s, e):
+        # Disjoint boxes score (0, 0), which only a non-positive threshold lets through.
+        for i in (range(s, e) if table is None or thr <= 0 else table.overlapping(box)):
             ov = Recognizer.overlapped_area(box, boxes[i])
             _ov = Recognizer.overlapped_area(boxes[i], box)
             if (ov, _ov) < (max_overlapped, _max_overlapped):
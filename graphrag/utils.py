@@ -130,6 +130,27 @@ def set_embed_cache(llmnm, txt, arr):
     REDIS_CONN.set(k, arr.encode("utf-8"), 24 * 3600)
 
 
+def _reduced_embed_cache_key(embeddings, n_neighbors, n_components):
+    hasher = xxhash.xxh64()
+    hasher.update(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+    hasher.update(f"umap:{n_neighbors}:{n_components}".encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def get_reduced_embed_cache(embeddings, n_neighbors, n_components):
+    k = _reduced_embed_cache_key(embeddings, n_neighbors, n_components)
+    bin = REDIS_CONN.get(k)
+    if not bin:
+        return
+    return np.array(json.loads(bin))
+
+
+def set_reduced_embed_cache(embeddings, n_neighbors, n_components, reduced):
+    k = _reduced_embed_cache_key(embeddings, n_neighbors, n_components)
+    reduced = json.dumps(reduced.tolist() if isinstance(reduced, np.ndarray) else reduced)
+    REDIS_CONN.set(k, reduced.encode("utf-8"), 24 * 3600)
+
+
 def get_tags_from_cache(kb_ids):
     hasher = xxhash.xxh64()
     hasher.update(str(kb_ids).encode("utf-8"))
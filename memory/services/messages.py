@@ -19,11 +19,22 @@ from typing import List
 from common import settings
 from common.constants import MemoryType
 from common.doc_store.doc_store_base import OrderByExpr, MatchExpr
+from rag.utils.redis_conn import REDIS_CONN
 
 
 def index_name(uid: str): return f"memory_{uid}"
 
 
+INDEX_EXIST_CACHE_TTL = 60
+LEGACY_SIZE_PAGE = 2048
+
+
+def _index_exist_key(uid: str, memory_id: str): return f"memory_index_exist:{uid}:{memory_id}"
+
+
+def _legacy_sized_key(index: str, memory_id: str): return f"memory_legacy_sized:{index}:{memory_id}"
+
+
 class MessageService:
 
     @classmethod
@@ -31,6 +42,21 @@ class MessageService:
         index = index_name(uid)
         return settings.msgStoreConn.index_exist(index, memory_id)
 
+    @classmethod
+    def has_index_cached(cls, uid: str, memory_id: str):
+        """
+        Like `has_index`, but remembers a positive answer in Redis for INDEX_EXIST_CACHE_TTL seconds.
+        Meant for the write path, where the index is checked before every insert.
+        `delete_index` drops the entry, so no process keeps using a deleted index.
+        """
+        key = _index_exist_key(uid, memory_id)
+        if REDIS_CONN.exist(key):
+            return True
+        exist = cls.has_index(uid, memory_id)
+        if exist:
+            REDIS_CONN.set(key, 1, INDEX_EXIST_CACHE_TTL)
+        return exist
+
     @classmethod
     def create_index(cls, uid: str, memory_id: str, vector_size: int):
         index = index_name(uid)
@@ -38,6 +64,7 @@ class MessageService:
 
     @classmethod
     def delete_index(cls, uid: str, memory_id: str):
+        REDIS_CONN.delete(_index_exist_key(uid, memory_id))
         index = index_name(uid)
         return settings.msgStoreConn.delete_idx(index, memory_id)
 
@@ -46,7 +73,8 @@ class MessageService:
         index = index_name(uid)
         [m.update({
             "id": f'{memory_id}_{m["message_id"]}',
-            "status": 1 if m["status"] else 0
+            "status": 1 if m["status"] else 0,
+            "size": m.get("size") or cls.calculate_message_size(m)
         }) for m in messages]
         return settings.msgStoreConn.insert(messages, index, memory_id)
 
@@ -181,70 +209,77 @@ class MessageService:
     def calculate_message_size(message: dict):
         return sys.getsizeof(message["content"]) + sys.getsizeof(message["content_embed"][0]) * len(message["content_embed"])
 
+    @classmethod
+    def _legacy_message_size(cls, index: str, memory_id: str):
+        """
+        Size of messages stored before `size` was tracked, written back so they are counted once.
+        Returns (size, complete); `complete` is False if some of them may still be unsized.
+        """
+        select_fields = ["message_id", "content", "content_embed"]
+        total, seen = 0, set()
+        while True:
+            res = settings.msgStoreConn.get_unsized_messages(select_fields, index, memory_id, limit=LEGACY_SIZE_PAGE)
+            if res is None or not settings.msgStoreConn.get_total(res):
+                return total, True
+            docs = settings.msgStoreConn.get_fields(res, select_fields)
+            new_docs = {doc_id: doc for doc_id, doc in docs.items() if doc_id not in seen}
+            if not new_docs:
+                # Only messages sized already (e.g. not yet refreshed, or of size 0) came back.
+                return total, len(docs) < LEGACY_SIZE_PAGE
+            for doc_id, doc in new_docs.items():
+                seen.add(doc_id)
+                size = cls.calculate_message_size(doc)
+                settings.msgStoreConn.update({"id": doc_id}, {"size": size}, index, memory_id)
+                total += size
+
     @classmethod
     def calculate_memory_size(cls, memory_ids: List[str], uid_list: List[str]):
         index_names = [index_name(uid) for uid in uid_list]
-        order_by = OrderByExpr()
-        order_by.desc("valid_at")
-
-        res, count = settings.msgStoreConn.search(
-            select_fields=["memory_id", "content", "content_embed"],
-            highlight_fields=[],
-            condition={},
-            match_expressions=[],
-            order_by=order_by,
-            offset=0, limit=2048*len(memory_ids),
-            index_names=index_names, memory_ids=memory_ids, agg_fields=[], hide_forgotten=False
-        )
-
-        if count == 0:
-            return {}
-
-        docs = settings.msgStoreConn.get_fields(res, ["memory_id", "content", "content_embed"])
-        size_dict = {}
-        for doc in docs.values():
-            if size_dict.get(doc["memory_id"]):
-                size_dict[doc["memory_id"]] += cls.calculate_message_size(doc)
-            else:
-                size_dict[doc["memory_id"]] = cls.calculate_message_size(doc)
+        size_dict = settings.msgStoreConn.sum_message_size(index_names, memory_ids)
+        # Messages written before `size` was tracked are sized once per memory, then flagged.
+        for index in index_names:
+            for memory_id in memory_ids:
+                flag = _legacy_sized_key(index, memory_id)
+                if REDIS_CONN.exist(flag):
+                    continue
+                if not settings.msgStoreConn.index_exist(index, memory_id):
+                    # A table created from now on only gets sized messages.
+                    REDIS_CONN.set(flag, 1, None)
+                    continue
+                legacy_size, complete = cls._legacy_message_size(index, memory_id)
+                if legacy_size:
+                    size_dict[memory_id] = size_dict.get(memory_id, 0) + legacy_size
+                if complete:
+                    REDIS_CONN.set(flag, 1, None)
         return size_dict
 
     @classmethod
-    def pick_messages_to_delete_by_fifo(cls, memory_id: str, uid: str, size_to_delete: int):
-        select_fields = ["message_id", "content", "content_embed"]
+    def _message_size(cls, message: dict, uid: str, memory_id: str):
+        if message["size"]:
+            return int(message["size"])
+        doc = cls.get_by_message_id(memory_id, message["message_id"], uid)
+        return cls.calculate_message_size(doc) if doc else 0
+
+    @classmethod
+    def pick_messages_to_delete_by_fifo(cls, memory_id: str, uid: str, size_to_delete: int, page_size: int=512):
         _index_name = index_name(uid)
-        res = settings.msgStoreConn.get_forgotten_messages(select_fields, _index_name, memory_id)
         current_size = 0
         ids_to_remove = []
-        if res:
-            message_list = settings.msgStoreConn.get_fields(res, select_fields)
-            for message in message_list.values():
-                if current_size < size_to_delete:
-                    current_size += cls.calculate_message_size(message)
+        # forgotten messages go first, then the oldest valid ones
+        for forgotten in [True, False]:
+            offset = 0
+            while current_size < size_to_delete:
+                page = settings.msgStoreConn.list_message_sizes(_index_name, memory_id, offset, page_size, forgotten)
+                for message in page:
+                    if current_size >= size_to_delete:
+                        break
+                    current_size += cls._message_size(message, uid, memory_id)
                     ids_to_remove.append(message["message_id"])
-                else:
-                    return ids_to_remove, current_size
+                if len(page) < page_size:
+                    break
+                offset += page_size
             if current_size >= size_to_delete:
-                return ids_to_remove, current_size
-
-        order_by = OrderByExpr()
-        order_by.asc("valid_at")
-        res, total_count = settings.msgStoreConn.search(
-            select_fields=select_fields,
-            highlight_fields=[],
-            condition={},
-            match_expressions=[],
-            order_by=order_by,
-            offset=0, limit=512,
-            index_names=[_index_name], memory_ids=[memory_id], agg_fields=[]
-        )
-        docs = settings.msgStoreConn.get_fields(res, select_fields)
-        for doc in docs.values():
-            if current_size < size_to_delete:
-                current_size += cls.calculate_message_size(doc)
-                ids_to_remove.append(doc["message_id"])
-            else:
-                return ids_to_remove, current_size
+                break
         return ids_to_remove, current_size
 
     @classmethod
@@ -43,6 +43,8 @@ class ESConnection(ESConnectionBase):
                 return "status_int"
             case "content":
                 return "content_ltks"
+            case "size":
+                return "size_int"
             case _:
                 return field_name
 
@@ -71,6 +73,8 @@ class ESConnection(ESConnectionBase):
             "content_ltks": message["content"],
             f"q_{len(message['content_embed'])}_vec": message["content_embed"],
         }
+        if message.get("size") is not None:
+            storage_doc["size_int"] = int(message["size"])
         return storage_doc
 
     @staticmethod
@@ -97,6 +101,7 @@ class ESConnection(ESConnectionBase):
             "status": bool(int(doc["status_int"])),
             "content": doc.get("content_ltks", ""),
             "content_embed": doc.get(embd_field_name, []) if embd_field_name else [],
+            "size": doc.get("size_int"),
         }
         if doc.get("id"):
             message["id"] = doc["id"]
@@ -216,32 +221,11 @@ class ESConnection(ESConnectionBase):
         q = s.to_dict()
         self.logger.debug(f"ESConnection.search {str(index_names)} query: " + json.dumps(q))
 
-        for i in range(ATTEMPT_TIME):
-            try:
-                #print(json.dumps(q, ensure_ascii=False))
-                res = self.es.search(index=exist_index_list,
-                                     body=q,
-                                     timeout="600s",
-                                     # search_type="dfs_query_then_fetch",
-                                     track_total_hits=True,
-                                     _source=True)
-                if str(res.get("timed_out", "")).lower() == "true":
-                    raise Exception("Es Timeout.")
-                self.logger.debug(f"ESConnection.search {str(index_names)} res: " + str(res))
-                return res, self.get_total(res)
-            except ConnectionTimeout:
-                self.logger.exception("ES request timeout")
-                self._connect()
-                continue
-            except NotFoundError as e:
-                self.logger.debug(f"ESConnection.search {str(index_names)} query: " + str(q) + str(e))
-                return None, 0
-            except Exception as e:
-                self.logger.exception(f"ESConnection.search {str(index_names)} query: " + str(q) + str(e))
-                raise e
-
-        self.logger.error(f"ESConnection.search timeout for {ATTEMPT_TIME} times!")
-        raise Exception("ESConnection.search timeout.")
+        res = self._search_with_retry(exist_index_list, q, track_total_hits=True, _source=True)
+        if res is None:
+            return None, 0
+        self.logger.debug(f"ESConnection.search {str(index_names)} res: " + str(res))
+        return res, self.get_total(res)
 
     def get_forgotten_messages(self, select_fields: list[str], index_name: str, memory_id: str, limit: int=512):
         bool_query = Q("bool", must=[])
@@ -286,6 +270,77 @@ class ESConnection(ESConnectionBase):
         self.logger.error(f"ESConnection.search timeout for {ATTEMPT_TIME} times!")
         raise Exception("ESConnection.search timeout.")
 
+    def _search_with_retry(self, index_names: str | list[str], q: dict, **kwargs):
+        """Run `q`, reconnecting and retrying on timeouts; None if an index doesn't exist."""
+        for i in range(ATTEMPT_TIME):
+            try:
+                res = self.es.search(index=index_names, body=q, timeout="600s", **kwargs)
+                if str(res.get("timed_out", "")).lower() == "true":
+                    raise Exception("Es Timeout.")
+                return res
+            except ConnectionTimeout:
+                self.logger.exception("ES request timeout")
+                self._connect()
+                continue
+            except NotFoundError as e:
+                self.logger.debug(f"ESConnection.search {str(index_names)} query: " + str(q) + str(e))
+                return None
+            except Exception as e:
+                self.logger.exception(f"ESConnection.search {str(index_names)} query: " + str(q) + str(e))
+                raise e
+
+        self.logger.error(f"ESConnection.search timeout for {ATTEMPT_TIME} times!")
+        raise Exception("ESConnection.search timeout.")
+
+    def sum_message_size(self, index_names: str | list[str], memory_ids: list[str]) -> dict[str, int]:
+        """
+        Sum `size_int` per memory with an aggregation; no message is fetched.
+        """
+        if isinstance(index_names, str):
+            index_names = index_names.split(",")
+        exist_index_list = [idx for idx in index_names if self.index_exist(idx)]
+        if not exist_index_list or not memory_ids:
+            return {}
+        s = Search().query(Q("bool", filter=[Q("terms", memory_id=memory_ids)]))
+        s.aggs.bucket("aggs_memory_id", "terms", field="memory_id", size=len(memory_ids)).metric("size_sum", "sum", field="size_int")
+        s = s[0:0]
+        res = self._search_with_retry(exist_index_list, s.to_dict(), track_total_hits=False)
+        if not res:
+            return {}
+        buckets = res.get("aggregations", {}).get("aggs_memory_id", {}).get("buckets", [])
+        return {b["key"]: int(b["size_sum"]["value"] or 0) for b in buckets}
+
+    def get_unsized_messages(self, select_fields: list[str], index_name: str, memory_id: str, limit: int=2048):
+        """
+        Messages written before `size_int` was tracked.
+        """
+        bool_query = Q("bool", must_not=[Q("exists", field="size_int")])
+        bool_query.filter.append(Q("term", memory_id=memory_id))
+        s = Search().query(bool_query)[:limit]
+        return self._search_with_retry(index_name, s.to_dict(), track_total_hits=True, _source=True)
+
+    def list_message_sizes(self, index_name: str, memory_id: str, offset: int=0, limit: int=512, forgotten: bool=False) -> list[dict]:
+        """
+        Page through message ids and sizes, oldest first, without loading content or embeddings.
+        Forgotten messages are ordered by `forget_at`, the others by `valid_at`.
+        """
+        bool_query = Q("bool", filter=[Q("term", memory_id=memory_id)])
+        if forgotten:
+            bool_query.must.append(Q("exists", field="forget_at"))
+            sort_field = "forget_at"
+        else:
+            bool_query.must_not.append(Q("exists", field="forget_at"))
+            sort_field = "valid_at"
+        s = Search().query(bool_query).sort({sort_field: {"order": "asc", "unmapped_type": "text"}})
+        s = s[offset:offset + limit]
+        res = self._search_with_retry(index_name, s.to_dict(), track_total_hits=False, _source=["message_id", "size_int"])
+        if not res:
+            return []
+        return [
+            {"id": d["_id"], "message_id": d["_source"]["message_id"], "size": d["_source"].get("size_int")}
+            for d in res["hits"]["hits"]
+        ]
+
     def get(self, doc_id: str, index_name: str, memory_ids: list[str]) -> dict | None:
         for i in range(ATTEMPT_TIME):
             try:
@@ -501,7 +556,7 @@ class ESConnection(ESConnectionBase):
                 if isinstance(v, list):
                     m[n] = v
                     continue
-                if n in ["message_id", "source_id", "valid_at", "invalid_at", "forget_at", "status"] and isinstance(v, (int, float, bool)):
+                if n in ["message_id", "source_id", "valid_at", "invalid_at", "forget_at", "status", "size"] and isinstance(v, (int, float, bool)):
                     m[n] = v
                     continue
                 if not isinstance(v, str):
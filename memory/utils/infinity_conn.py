@@ -48,6 +48,8 @@ class InfinityConnection(InfinityConnectionBase):
                 return "message_type_kwd"
             case "status":
                 return "status_int"
+            case "size":
+                return "size_int"
             case "content_embed":
                 if not table_fields:
                     raise Exception("Can't convert 'content_embed' to vector field name with empty table fields.")
@@ -64,6 +66,8 @@ class InfinityConnection(InfinityConnectionBase):
             return "message_type"
         if field_name.startswith("status"):
             return "status"
+        if field_name == "size_int":
+            return "size"
         if re.match(r"q_\d+_vec", field_name):
             return "content_embed"
         return field_name
@@ -87,6 +91,8 @@ class InfinityConnection(InfinityConnectionBase):
                 return "message_type_kwd"
             case "status":
                 return "status_int"
+            case "size":
+                return "size_int"
             case "valid_at":
                 return "valid_at_flt"
             case "invalid_at":
@@ -305,6 +311,81 @@ class InfinityConnection(InfinityConnectionBase):
         self.connPool.release_conn(inf_conn)
         return res
 
+    def sum_message_size(self, index_names: str | list[str], memory_ids: list[str]) -> dict[str, int]:
+        """
+        Sum `size_int` per memory table; no message is fetched.
+        """
+        if isinstance(index_names, str):
+            index_names = index_names.split(",")
+        inf_conn = self.connPool.get_conn()
+        size_dict = {}
+        try:
+            db_instance = inf_conn.get_database(self.dbName)
+            for indexName in index_names:
+                for memory_id in memory_ids:
+                    table_name = f"{indexName}_{memory_id}"
+                    try:
+                        table_instance = db_instance.get_table(table_name)
+                    except Exception:
+                        continue
+                    mem_res, _ = table_instance.output(["sum(size_int)"]).to_df()
+                    if not mem_res.empty:
+                        size_dict[memory_id] = size_dict.get(memory_id, 0) + int(mem_res.iloc[0, 0] or 0)
+        finally:
+            self.connPool.release_conn(inf_conn)
+        return size_dict
+
+    def get_unsized_messages(self, select_fields: list[str], index_name: str, memory_id: str, limit: int=2048):
+        """
+        Messages written before `size_int` was tracked; the migrated column defaults to 0.
+        """
+        inf_conn = self.connPool.get_conn()
+        try:
+            db_instance = inf_conn.get_database(self.dbName)
+            table_name = f"{index_name}_{memory_id}"
+            try:
+                table_instance = db_instance.get_table(table_name)
+            except Exception:
+                return pd.DataFrame()
+            column_name_list = [r[0] for r in table_instance.show_columns().rows()]
+            output_fields = [self.convert_message_field_to_infinity(f, column_name_list) for f in select_fields]
+            if "id" not in output_fields:
+                output_fields.append("id")
+            mem_res, _ = table_instance.output(output_fields).filter("size_int = 0").limit(limit).to_df()
+        finally:
+            self.connPool.release_conn(inf_conn)
+        return self.concat_dataframes([mem_res], output_fields)
+
+    def list_message_sizes(self, index_name: str, memory_id: str, offset: int=0, limit: int=512, forgotten: bool=False) -> list[dict]:
+        """
+        Page through message ids and sizes, oldest first, without loading content or embeddings.
+        Forgotten messages are ordered by `forget_at`, the others by `valid_at`.
+        """
+        if forgotten:
+            condition = {"memory_id": memory_id, "exists": "forget_at_flt"}
+            sort_field = "forget_at_flt"
+        else:
+            condition = {"memory_id": memory_id, "must_not": {"exists": "forget_at_flt"}}
+            sort_field = "valid_at_flt"
+        inf_conn = self.connPool.get_conn()
+        try:
+            db_instance = inf_conn.get_database(self.dbName)
+            table_name = f"{index_name}_{memory_id}"
+            try:
+                table_instance = db_instance.get_table(table_name)
+            except Exception:
+                return []
+            filter_cond = self.equivalent_condition_to_str(condition, table_instance)
+            builder = table_instance.output(["id", "message_id", "size_int"]).filter(filter_cond)
+            builder.sort([(sort_field, SortType.Asc)])
+            mem_res, _ = builder.offset(offset).limit(limit).to_df()
+        finally:
+            self.connPool.release_conn(inf_conn)
+        return [
+            {"id": row["id"], "message_id": int(row["message_id"]), "size": int(row["size_int"]) or None}
+            for row in mem_res.to_dict(orient="records")
+        ]
+
     def get(self, message_id: str, index_name: str, memory_ids: list[str]) -> dict | None:
         inf_conn = self.connPool.get_conn()
         db_instance = inf_conn.get_database(self.dbName)
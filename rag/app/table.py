@@ -18,8 +18,10 @@ import copy
 import csv
 import io
 import logging
+import os
 import re
 from io import BytesIO
+from types import SimpleNamespace
 from xpinyin import Pinyin
 import numpy as np
 import pandas as pd
@@ -31,19 +33,27 @@ from dateutil.parser import parse as datetime_parse
 from api.db.services.knowledgebase_service import KnowledgebaseService
 from deepdoc.parser.figure_parser import vision_figure_parser_figure_xlsx_wrapper
 from deepdoc.parser.utils import get_text
-from rag.nlp import rag_tokenizer, tokenize, tokenize_table
+from rag.nlp import rag_tokenizer, tokenize_batch, tokenize_table
 from deepdoc.parser import ExcelParser
 
+# .xlsx files at least this large are streamed row by row, unless they have images or
+# merged cells, which streaming would drop; 0 disables streaming.
+EXCEL_STREAMING_MIN_BYTES = int(os.environ.get("EXCEL_STREAMING_MIN_BYTES", 8 * 1024 * 1024))
+
 
 class Excel(ExcelParser):
     def __call__(self, fnm, binary=None, from_page=0, to_page=10000000000, callback=None, **kwargs):
+        if binary and 0 < EXCEL_STREAMING_MIN_BYTES <= len(binary) and not Excel._has_read_only_losses(binary):
+            wb = Excel._load_read_only_workbook(BytesIO(binary))
+            if wb is not None:
+                try:
+                    return self._stream(wb, from_page, to_page, callback)
+                finally:
+                    wb.close()
         if not binary:
             wb = Excel._load_excel_to_workbook(fnm)
         else:
             wb = Excel._load_excel_to_workbook(BytesIO(binary))
-        total = 0
-        for sheet_name in wb.sheetnames:
-            total += len(list(wb[sheet_name].rows))
         res, fails, done = [], [], 0
         rn = 0
         flow_images = []
@@ -126,6 +136,48 @@ class Excel(ExcelParser):
             f"{len(fails)} failure, line: %s..." % (",".join(fails[:3])) if fails else "")))
         return res, tables
 
+    def _stream(self, wb, from_page, to_page, callback):
+        """
+        Row-range read of a read-only workbook.
+
+        Rows before `from_page` are skipped without being kept and reading stops at
+        `to_page`, so a task holds only its own rows. Read-only sheets expose neither
+        merged cells nor images: headers are the first row and embedded images are
+        not described, so files with either are not streamed.
+        """
+        res, rn = [], 0
+        for sheet_name in wb.sheetnames:
+            if rn >= to_page:
+                break
+            ws = wb[sheet_name]
+            try:
+                rows = ws.iter_rows(values_only=True)
+                first = next(rows, None)
+            except Exception as e:
+                logging.warning(f"Skip sheet '{sheet_name}' due to rows access error: {e}")
+                continue
+            if first is None:
+                continue
+            headers, _ = self._parse_simple_headers([[SimpleNamespace(value=v) for v in first]])
+            if not headers:
+                continue
+            n = len(headers)
+            data = []
+            for r in rows:
+                rn += 1
+                if rn - 1 < from_page:
+                    continue
+                if rn - 1 >= to_page:
+                    break
+                row_data = list(r[:n]) + [None] * (n - len(r))
+                if self._is_empty_row(row_data):
+                    continue
+                data.append(row_data)
+            if data:
+                res.append(pd.DataFrame(data, columns=headers))
+        callback(0.3, "Extract records: {}~{}".format(from_page + 1, min(to_page, from_page + rn)))
+        return res, []
+
     def _parse_headers(self, ws, rows):
         if len(rows) == 0:
             return [], 0
@@ -316,38 +368,55 @@ def trans_bool(s):
     return None
 
 
+_INT_RE = re.compile(r"[+-]?[0-9]+$")
+_FLOAT_RE = re.compile(r"[+-]?[0-9.]{,19}$")
+_BOOL_RE = re.compile(r"(true|yes|是|\*|✓|✔|☑|✅|√|false|no|否|⍻|×)$", flags=re.IGNORECASE)
+
+
 def column_data_type(arr):
     arr = list(arr)
     counts = {"int": 0, "float": 0, "text": 0, "datetime": 0, "bool": 0}
-    trans = {t: f for f, t in
-             [(int, "int"), (float, "float"), (trans_datatime, "datetime"), (trans_bool, "bool"), (str, "text")]}
     float_flag = False
-    for a in arr:
-        if a is None:
+    # Columns repeat values a lot; classify and convert every distinct string once.
+    strs = [None if a is None else str(a) for a in arr]
+    datetimes = {}
+    for s in strs:
+        if s is None:
             continue
-        if re.match(r"[+-]?[0-9]+$", str(a).replace("%%", "")) and not str(a).replace("%%", "").startswith("0"):
+        num = s.replace("%%", "")
+        if _INT_RE.match(num) and not num.startswith("0"):
             counts["int"] += 1
-            if int(str(a)) > 2 ** 63 - 1:
+            if int(s) > 2 ** 63 - 1:
                 float_flag = True
                 break
-        elif re.match(r"[+-]?[0-9.]{,19}$", str(a).replace("%%", "")) and not str(a).replace("%%", "").startswith("0"):
+        elif _FLOAT_RE.match(num) and not num.startswith("0"):
             counts["float"] += 1
-        elif re.match(r"(true|yes|是|\*|✓|✔|☑|✅|√|false|no|否|⍻|×)$", str(a), flags=re.IGNORECASE):
+        elif _BOOL_RE.match(s):
             counts["bool"] += 1
-        elif trans_datatime(str(a)):
-            counts["datetime"] += 1
         else:
-            counts["text"] += 1
+            if s not in datetimes:
+                datetimes[s] = trans_datatime(s)
+            if datetimes[s]:
+                counts["datetime"] += 1
+            else:
+                counts["text"] += 1
     if float_flag:
         ty = "float"
     else:
         counts = sorted(counts.items(), key=lambda x: x[1] * -1)
         ty = counts[0][0]
-    for i in range(len(arr)):
-        if arr[i] is None:
+    if ty == "datetime":
+        def conv(v):
+            if v not in datetimes:
+                datetimes[v] = trans_datatime(v)
+            return datetimes[v]
+    else:
+        conv = {"int": int, "float": float, "bool": trans_bool, "text": str}[ty]
+    for i, s in enumerate(strs):
+        if s is None:
             continue
         try:
-            arr[i] = trans[ty](str(arr[i]))
+            arr[i] = conv(s)
         except Exception as e:
             arr[i] = None
             logging.warning(f"Column {i}: {e}")
@@ -455,24 +524,30 @@ def chunk(filename, binary=None, from_page=0, to_page=10000000000, lang="Chinese
         clmns_map = [(py_clmns[i].lower() + fieds_map[clmn_tys[i]], str(clmns[i]).replace("_", " ")) for i in
                      range(len(clmns))]
 
-        eng = lang.lower() == "english"  # is_english(txts)
-        for ii, row in df.iterrows():
-            d = {"docnm_kwd": filename, "title_tks": rag_tokenizer.tokenize(re.sub(r"\.[a-zA-Z]+$", "", filename))}
+        title_tks = rag_tokenizer.tokenize(re.sub(r"\.[a-zA-Z]+$", "", filename))
+        pending, text_cells = [], []
+        for row in zip(*[df[c].tolist() for c in clmns]):
+            d = {"docnm_kwd": filename, "title_tks": title_tks}
             row_txt = []
-            for j in range(len(clmns)):
-                if row[clmns[j]] is None:
+            for j, v in enumerate(row):
+                if v is None:
                     continue
-                if not str(row[clmns[j]]):
+                if not str(v):
                     continue
-                if not isinstance(row[clmns[j]], pd.Series) and pd.isna(row[clmns[j]]):
+                if pd.isna(v):
                     continue
                 fld = clmns_map[j][0]
-                d[fld] = row[clmns[j]] if clmn_tys[j] != "text" else rag_tokenizer.tokenize(row[clmns[j]])
-                row_txt.append("{}:{}".format(clmns[j], row[clmns[j]]))
+                if clmn_tys[j] != "text":
+                    d[fld] = v
+                else:
+                    text_cells.append((d, fld, v))
+                row_txt.append("{}:{}".format(clmns[j], v))
             if not row_txt:
                 continue
-            tokenize(d, "; ".join(row_txt), eng)
-            res.append(d)
+            pending.append((d, "; ".join(row_txt)))
+        for (d, fld, _), tks in zip(text_cells, rag_tokenizer.tokenize_batch([v for _, _, v in text_cells])):
+            d[fld] = tks
+        res.extend(tokenize_batch(pending))
         if tbls:
             doc = {"docnm_kwd": filename, "title_tks": rag_tokenizer.tokenize(re.sub(r"\.[a-zA-Z]+$", "", filename))}
             res.extend(tokenize_table(tbls, doc, is_english))
@@ -131,20 +131,27 @@ def label_question(question, kbs):
         if kb.parser_config.get("tag_kb_ids"):
             tag_kb_ids.extend(kb.parser_config["tag_kb_ids"])
     if tag_kb_ids:
-        all_tags = get_tags_from_cache(tag_kb_ids)
-        if not all_tags:
-            all_tags = settings.retriever.all_tags_in_portion(kb.tenant_id, tag_kb_ids)
-            set_tags_to_cache(tags=all_tags, kb_ids=tag_kb_ids)
-        else:
-            all_tags = json.loads(all_tags)
-        tag_kbs = KnowledgebaseService.get_by_ids(tag_kb_ids)
-        if not tag_kbs:
+        signature = KnowledgebaseService.get_content_signature(tag_kb_ids)
+        if not signature:
             return tags
+        tenant_ids = list(set([r[1] for r in signature]))
+        # Called from request handlers: never wait for the index to load, ask the doc store until it's there.
+        tag_index = settings.retriever.tag_index(tenant_ids, tag_kb_ids, signature, wait=False)
+        if tag_index is None:
+            all_tags = get_tags_from_cache(tag_kb_ids)
+            if not all_tags:
+                all_tags = settings.retriever.all_tags_in_portion(kb.tenant_id, tag_kb_ids)
+                set_tags_to_cache(tags=all_tags, kb_ids=tag_kb_ids)
+            else:
+                all_tags = json.loads(all_tags)
+            return settings.retriever.tag_query(question, tenant_ids, tag_kb_ids, all_tags,
+                                                kb.parser_config.get("topn_tags", 3))
         tags = settings.retriever.tag_query(question,
-                                            list(set([kb.tenant_id for kb in tag_kbs])),
+                                            tenant_ids,
                                             tag_kb_ids,
-                                            all_tags,
-                                            kb.parser_config.get("topn_tags", 3)
+                                            tag_index.priors,
+                                            kb.parser_config.get("topn_tags", 3),
+                                            tag_index=tag_index
                                             )
     return tags
 
@@ -25,6 +25,50 @@ from api.db.services.task_service import has_canceled, TaskService, CANVAS_DEBUG
 from rag.utils.redis_conn import REDIS_CONN
 
 
+PIPELINE_TRACE_EXPIRE = 60 * 30
+
+
+class PipelineTrace:
+    """Append-only trace of a pipeline run, one Redis list entry per callback.
+
+    Entries are flat dicts carrying their `component_id`. `load` regroups
+    consecutive entries of the same component into the
+    `[{"component_id": ..., "trace": [...]}]` shape served to the UI.
+    """
+
+    @staticmethod
+    def key(flow_id, task_id):
+        return f"{flow_id}-{task_id}-trace"
+
+    @classmethod
+    def append(cls, flow_id, task_id, entry):
+        k = cls.key(flow_id, task_id)
+        pipe = REDIS_CONN.REDIS.pipeline()
+        pipe.rpush(k, json.dumps(entry, ensure_ascii=False))
+        pipe.expire(k, PIPELINE_TRACE_EXPIRE)
+        pipe.execute()
+
+    @classmethod
+    def reset(cls, flow_id, task_id):
+        REDIS_CONN.delete(cls.key(flow_id, task_id))
+
+    @classmethod
+    def exists(cls, flow_id, task_id):
+        return bool(REDIS_CONN.REDIS.exists(cls.key(flow_id, task_id)))
+
+    @classmethod
+    def load(cls, flow_id, task_id):
+        logs = []
+        for line in REDIS_CONN.REDIS.lrange(cls.key(flow_id, task_id), 0, -1):
+            entry = json.loads(line)
+            component_id = entry.pop("component_id")
+            if logs and logs[-1]["component_id"] == component_id:
+                logs[-1]["trace"].append(entry)
+            else:
+                logs.append({"component_id": component_id, "trace": [entry]})
+        return logs
+
+
 class Pipeline(Graph):
     def __init__(self, dsl: str|dict, tenant_id=None, doc_id=None, task_id=None, flow_id=None):
         if isinstance(dsl, dict):
@@ -39,85 +83,74 @@ class Pipeline(Graph):
             self._kb_id = DocumentService.get_knowledgebase_id(doc_id)
             if not self._kb_id:
                 self._doc_id = None
+        self._reset_trace_state()
+
+    def _reset_trace_state(self):
+        # Running totals over the trace, so a callback never rereads it.
+        self._trace_component = None
+        self._trace_timestamp = None
+        self._trace_progress = 0.0  # last progress of the current component
+        self._trace_closed_progress = 0.0  # sum of last progress of previous components
+        self._trace_failed = False
 
     def callback(self, component_name: str, progress: float | int | None = None, message: str = "") -> None:
         from common.exceptions import TaskCanceledException
-        log_key = f"{self._flow_id}-{self.task_id}-logs"
         timestamp = timer()
-        if has_canceled(self.task_id):
+        canceled = has_canceled(self.task_id)
+        if canceled:
             progress = -1
             message += "[CANCEL]"
         try:
-            bin = REDIS_CONN.get(log_key)
-            obj = json.loads(bin.encode("utf-8"))
-            if obj:
-                if obj[-1]["component_id"] == component_name:
-                    obj[-1]["trace"].append(
-                        {
-                            "progress": progress,
-                            "message": message,
-                            "datetime": datetime.datetime.now().strftime("%H:%M:%S"),
-                            "timestamp": timestamp,
-                            "elapsed_time": timestamp - obj[-1]["trace"][-1]["timestamp"],
-                        }
-                    )
-                else:
-                    obj.append(
-                        {
-                            "component_id": component_name,
-                            "trace": [{"progress": progress, "message": message, "datetime": datetime.datetime.now().strftime("%H:%M:%S"), "timestamp": timestamp, "elapsed_time": 0}],
-                        }
-                    )
-            else:
-                obj = [
-                    {
-                        "component_id": component_name,
-                        "trace": [{"progress": progress, "message": message, "datetime": datetime.datetime.now().strftime("%H:%M:%S"), "timestamp": timestamp, "elapsed_time": 0}],
-                    }
-                ]
+            new_component = component_name != self._trace_component
+            entry = {
+                "component_id": component_name,
+                "progress": progress,
+                "message": message,
+                "datetime": datetime.datetime.now().strftime("%H:%M:%S"),
+                "timestamp": timestamp,
+                "elapsed_time": 0 if new_component else timestamp - self._trace_timestamp,
+            }
+            if new_component:
+                if self._trace_component is not None:
+                    self._trace_closed_progress += self._trace_progress
+                self._trace_component = component_name
+                self._trace_progress = 0.0
+            self._trace_timestamp = timestamp
+            if progress is not None:
+                self._trace_progress = progress
+                if progress < 0:
+                    self._trace_failed = True
+
             if component_name != "END" and self._doc_id and self.task_id:
                 percentage = 1.0 / len(self.components.items())
-                finished = 0.0
-                for o in obj:
-                    for t in o["trace"]:
-                        if t["progress"] < 0:
-                            finished = -1
-                            break
-                    if finished < 0:
-                        break
-                    finished += o["trace"][-1]["progress"] * percentage
-
+                finished = -1 if self._trace_failed else (self._trace_closed_progress + self._trace_progress) * percentage
                 msg = ""
-                if len(obj[-1]["trace"]) == 1:
-                    msg += f"\n-------------------------------------\n[{self.get_component_name(o['component_id'])}]:\n"
-                t = obj[-1]["trace"][-1]
-                msg += "%s: %s\n" % (t["datetime"], t["message"])
+                if new_component:
+                    msg += f"\n-------------------------------------\n[{self.get_component_name(component_name)}]:\n"
+                msg += "%s: %s\n" % (entry["datetime"], entry["message"])
                 TaskService.update_progress(self.task_id, {"progress": finished, "progress_msg": msg})
             elif component_name == "END" and not self._doc_id:
-                obj[-1]["trace"][-1]["dsl"] = json.loads(str(self))
-            REDIS_CONN.set_obj(log_key, obj, 60 * 30)
+                entry["dsl"] = json.loads(str(self))
+            PipelineTrace.append(self._flow_id, self.task_id, entry)
 
         except Exception as e:
             logging.exception(e)
 
-        if has_canceled(self.task_id):
+        if canceled:
             raise TaskCanceledException(message)
 
     def fetch_logs(self):
-        log_key = f"{self._flow_id}-{self.task_id}-logs"
         try:
-            bin = REDIS_CONN.get(log_key)
-            if bin:
-                return json.loads(bin.encode("utf-8"))
+            return PipelineTrace.load(self._flow_id, self.task_id)
         except Exception as e:
             logging.exception(e)
         return []
 
 
     async def run(self, **kwargs):
-        log_key = f"{self._flow_id}-{self.task_id}-logs"
+        self._reset_trace_state()
         try:
-            REDIS_CONN.set_obj(log_key, [], 60 * 10)
+            PipelineTrace.reset(self._flow_id, self.task_id)
         except Exception as e:
             logging.exception(e)
         self.error = ""
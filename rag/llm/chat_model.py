@@ -14,13 +14,17 @@
 #  limitations under the License.
 #
 import asyncio
+import concurrent.futures
+import functools
 import json
 import logging
 import os
 import random
 import re
+import threading
 import time
 from abc import ABC
+from contextvars import ContextVar, copy_context
 from copy import deepcopy
 from urllib.parse import urljoin
 
@@ -60,6 +64,151 @@ ERROR_PREFIX = "**ERROR**"
 LENGTH_NOTIFICATION_CN = "······\n由于大模型的上下文窗口大小限制，回答已经被大模型截断。"
 LENGTH_NOTIFICATION_EN = "...\nThe answer is truncated by your chosen LLM due to its limitation on context length."
 
+# Tool calls of one model turn run concurrently; these bound each call and the whole process.
+TOOL_CALL_TIMEOUT = float(os.environ.get("LLM_TOOL_CALL_TIMEOUT", 600))
+TOOL_CALL_CONCURRENCY = int(os.environ.get("LLM_TOOL_CALL_CONCURRENCY", 16))
+_TOOL_CALL_SLOTS = threading.BoundedSemaphore(max(TOOL_CALL_CONCURRENCY, 1))
+# Set while a tool runs, so tools calling an LLM with tools themselves don't wait on their own slot.
+_holding_tool_slot = ContextVar("holding_tool_slot", default=False)
+
+
+def _call_tool_in_slot(session, name, args):
+    if _holding_tool_slot.get():
+        return session.tool_call(name, args)
+    with _TOOL_CALL_SLOTS:
+        token = _holding_tool_slot.set(True)
+        try:
+            return session.tool_call(name, args)
+        finally:
+            _holding_tool_slot.reset(token)
+
+
+def _tool_target(session, name):
+    """
+    Key of the object a tool call goes to, or None when calls to it may overlap.
+
+    Agent tools keep per-call state on the component, so two calls to the same
+    tool must not run at the same time.
+    """
+    get_tool_obj = getattr(session, "get_tool_obj", None)
+    if get_tool_obj is None:
+        return id(session), name
+    try:
+        tool_obj = get_tool_obj(name)
+    except Exception:
+        return id(session), name
+    if getattr(tool_obj, "concurrent_tool_calls", False):
+        return None
+    return id(tool_obj)
+
+
+# Last started call per tool target, kept until it has returned. A call that timed out
+# still runs in its thread, so later rounds and turns have to wait for it as well.
+_tool_runs = {}
+_tool_runs_lock = threading.Lock()
+
+
+def _chain_tool_call(target):
+    """Register a call to `target`; returns the future of the call before it (or None) and its own."""
+    done = concurrent.futures.Future()
+    with _tool_runs_lock:
+        after = _tool_runs.get(target)
+        _tool_runs[target] = done
+
+    def forget(_):
+        with _tool_runs_lock:
+            if _tool_runs.get(target) is done:
+                del _tool_runs[target]
+
+    done.add_done_callback(forget)
+    return after, done
+
+
+def _set_done(future):
+    try:
+        future.set_result(None)
+    except concurrent.futures.InvalidStateError:
+        pass
+
+
+def _release_unstarted(after, done, state, _future):
+    # The call ended before its worker started, so nothing else resolves `done`;
+    # the target is free once the call before it has returned.
+    if state["worker"] is not None:
+        return
+    if after is None:
+        _set_done(done)
+    else:
+        after.add_done_callback(lambda _: _set_done(done))
+
+
+def _run_tool_call(session, name, args, done):
+    try:
+        return _call_tool_in_slot(session, name, args)
+    finally:
+        if done is not None:
+            _set_done(done)
+
+
+async def _invoke_tool(session, name, args, after=None, done=None, state=None):
+    """
+    Run one tool call in a worker thread, after the call `after` to the same tool
+    has returned. The worker thread resolves `done` when it returns, which can be
+    later than a timeout.
+    """
+    if after is not None:
+        await asyncio.wait([asyncio.wrap_future(after)])
+    loop = asyncio.get_running_loop()
+    ctx = copy_context()
+    worker = loop.run_in_executor(None, functools.partial(ctx.run, _run_tool_call, session, name, args, done))
+    if state is not None:
+        state["worker"] = worker
+    if done is not None:
+        # A worker cancelled before it started never resolves `done` itself.
+        worker.add_done_callback(lambda w: _set_done(done) if w.cancelled() else None)
+    try:
+        return await asyncio.wait_for(asyncio.shield(worker), TOOL_CALL_TIMEOUT)
+    except asyncio.TimeoutError:
+        # The worker thread can't be interrupted; it finishes in the background and then frees its slot.
+        raise TimeoutError(f"Tool {name} timed out after {TOOL_CALL_TIMEOUT}s")
+
+
+def start_tool_calls(session, tool_calls) -> list[tuple]:
+    """
+    Parse the arguments of a turn's tool calls and start them.
+
+    Calls to different tools run at once; calls to the same tool run one after
+    another, in the order the model sent them and after any earlier call to it
+    that is still running. Returns (tool_call, args, future) in the order of
+    `tool_calls`. `args` is None and the future holds the error when the arguments
+    can't be parsed. Awaiting the futures in order keeps the tool messages in the
+    order the model sent them.
+    """
+    loop = asyncio.get_running_loop()
+    started = []
+    for tool_call in tool_calls:
+        logging.info(f"Response {tool_call=}")
+        name = tool_call.function.name
+        try:
+            args = json_repair.loads(tool_call.function.arguments)
+            target = _tool_target(session, name)
+            after, done = _chain_tool_call(target) if target is not None else (None, None)
+            state = {"worker": None}
+            future = asyncio.ensure_future(_invoke_tool(session, name, args, after, done, state))
+            if done is not None:
+                future.add_done_callback(functools.partial(_release_unstarted, after, done, state))
+        except Exception as e:
+            args = None
+            future = loop.create_future()
+            future.set_exception(e)
+        started.append((tool_call, args, future))
+    return started
+
+
+def cancel_tool_calls(started: list[tuple]):
+    for _, _, future in started:
+        future.cancel()
+
 
 class Base(ABC):
     def __init__(self, key, model_name, base_url, **kwargs):
@@ -283,9 +432,9 @@ class Base(ABC):
 
         ans = ""
         tk_count = 0
-        hist = deepcopy(history)
+        hist = list(history)
         for attempt in range(self.max_retries + 1):
-            history = deepcopy(hist)
+            history = list(hist)
             try:
                 for _ in range(self.max_rounds + 1):
                     logging.info(f"{self.tools=}")
@@ -304,18 +453,20 @@ class Base(ABC):
 
                         return ans, tk_count
 
-                    for tool_call in response.choices[0].message.tool_calls:
-                        logging.info(f"Response {tool_call=}")
-                        name = tool_call.function.name
-                        try:
-                            args = json_repair.loads(tool_call.function.arguments)
-                            tool_response = await asyncio.to_thread(self.toolcall_session.tool_call, name, args)
-                            history = self._append_history(history, tool_call, tool_response)
-                            ans += self._verbose_tool_use(name, args, tool_response)
-                        except Exception as e:
-                            logging.exception(msg=f"Wrong JSON argument format in LLM tool call response: {tool_call}")
-                            history.append({"role": "tool", "tool_call_id": tool_call.id, "content": f"Tool call error: \n{tool_call}\nException:\n" + str(e)})
-                            ans += self._verbose_tool_use(name, {}, str(e))
+                    started = start_tool_calls(self.toolcall_session, response.choices[0].message.tool_calls)
+                    try:
+                        for tool_call, args, future in started:
+                            name = tool_call.function.name
+                            try:
+                                tool_response = await future
+                                history = self._append_history(history, tool_call, tool_response)
+                                ans += self._verbose_tool_use(name, args, tool_response)
+                            except Exception as e:
+                                logging.exception(msg=f"Tool call failed: {tool_call}")
+                                history.append({"role": "tool", "tool_call_id": tool_call.id, "content": f"Tool call error: \n{tool_call}\nException:\n" + str(e)})
+                                ans += self._verbose_tool_use(name, {}, str(e))
+                    finally:
+                        cancel_tool_calls(started)
 
                 logging.warning(f"Exceed max rounds: {self.max_rounds}")
                 history.append({"role": "user", "content": f"Exceed max rounds: {self.max_rounds}"})
@@ -337,10 +488,10 @@ class Base(ABC):
             history.insert(0, {"role": "system", "content": system})
 
         total_tokens = 0
-        hist = deepcopy(history)
+        hist = list(history)
 
         for attempt in range(self.max_retries + 1):
-            history = deepcopy(hist)
+            history = list(hist)
             try:
                 for _ in range(self.max_rounds + 1):
                     reasoning_start = False
@@ -397,18 +548,23 @@ class Base(ABC):
                         yield total_tokens
                         return
 
-                    for tool_call in final_tool_calls.values():
-                        name = tool_call.function.name
-                        try:
-                            args = json_repair.loads(tool_call.function.arguments)
-                            yield self._verbose_tool_use(name, args, "Begin to call...")
-                            tool_response = await asyncio.to_thread(self.toolcall_session.tool_call, name, args)
-                            history = self._append_history(history, tool_call, tool_response)
-                            yield self._verbose_tool_use(name, args, tool_response)
-                        except Exception as e:
-                            logging.exception(msg=f"Wrong JSON argument format in LLM tool call response: {tool_call}")
-                            history.append({"role": "tool", "tool_call_id": tool_call.id, "content": f"Tool call error: \n{tool_call}\nException:\n" + str(e)})
-                            yield self._verbose_tool_use(name, {}, str(e))
+                    started = start_tool_calls(self.toolcall_session, final_tool_calls.values())
+                    try:
+                        for tool_call, args, _ in started:
+                            if args is not None:
+                                yield self._verbose_tool_use(tool_call.function.name, args, "Begin to call...")
+                        for tool_call, args, future in started:
+                            name = tool_call.function.name
+                            try:
+                                tool_response = await future
+                                history = self._append_history(history, tool_call, tool_response)
+                                yield self._verbose_tool_use(name, args, tool_response)
+                            except Exception as e:
+                                logging.exception(msg=f"Tool call failed: {tool_call}")
+                                history.append({"role": "tool", "tool_call_id": tool_call.id, "content": f"Tool call error: \n{tool_call}\nException:\n" + str(e)})
+                                yield self._verbose_tool_use(name, {}, str(e))
+                    finally:
+                        cancel_tool_calls(started)
 
                 logging.warning(f"Exceed max rounds: {self.max_rounds}")
                 history.append({"role": "user", "content": f"Exceed max rounds: {self.max_rounds}"})
@@ -1419,9 +1575,9 @@ class LiteLLMBase(ABC):
 
         ans = ""
         tk_count = 0
-        hist = deepcopy(history)
+        hist = list(history)
         for attempt in range(self.max_retries + 1):
-            history = deepcopy(hist)
+            history = list(hist)
             try:
                 for _ in range(self.max_rounds + 1):
                     logging.info(f"{self.tools=}")
@@ -1448,18 +1604,20 @@ class LiteLLMBase(ABC):
                             ans = self._length_stop(ans)
                         return ans, tk_count
 
-                    for tool_call in message.tool_calls:
-                        logging.info(f"Response {tool_call=}")
-                        name = tool_call.function.name
-                        try:
-                            args = json_repair.loads(tool_call.function.arguments)
-                            tool_response = await asyncio.to_thread(self.toolcall_session.tool_call, name, args)
-                            history = self._append_history(history, tool_call, tool_response)
-                            ans += self._verbose_tool_use(name, args, tool_response)
-                        except Exception as e:
-                            logging.exception(msg=f"Wrong JSON argument format in LLM tool call response: {tool_call}")
-                            history.append({"role": "tool", "tool_call_id": tool_call.id, "content": f"Tool call error: \n{tool_call}\nException:\n" + str(e)})
-                            ans += self._verbose_tool_use(name, {}, str(e))
+                    started = start_tool_calls(self.toolcall_session, message.tool_calls)
+                    try:
+                        for tool_call, args, future in started:
+                            name = tool_call.function.name
+                            try:
+                                tool_response = await future
+                                history = self._append_history(history, tool_call, tool_response)
+                                ans += self._verbose_tool_use(name, args, tool_response)
+                            except Exception as e:
+                                logging.exception(msg=f"Tool call failed: {tool_call}")
+                                history.append({"role": "tool", "tool_call_id": tool_call.id, "content": f"Tool call error: \n{tool_call}\nException:\n" + str(e)})
+                                ans += self._verbose_tool_use(name, {}, str(e))
+                    finally:
+                        cancel_tool_calls(started)
 
                 logging.warning(f"Exceed max rounds: {self.max_rounds}")
                 history.append({"role": "user", "content": f"Exceed max rounds: {self.max_rounds}"})
@@ -1483,10 +1641,10 @@ class LiteLLMBase(ABC):
             history.insert(0, {"role": "system", "content": system})
 
         total_tokens = 0
-        hist = deepcopy(history)
+        hist = list(history)
 
         for attempt in range(self.max_retries + 1):
-            history = deepcopy(hist)
+            history = list(hist)
             try:
                 for _ in range(self.max_rounds + 1):
                     reasoning_start = False
@@ -1548,18 +1706,23 @@ class LiteLLMBase(ABC):
                         yield total_tokens
                         return
 
-                    for tool_call in final_tool_calls.values():
-                        name = tool_call.function.name
-                        try:
-                            args = json_repair.loads(tool_call.function.arguments)
-                            yield self._verbose_tool_use(name, args, "Begin to call...")
-                            tool_response = await asyncio.to_thread(self.toolcall_session.tool_call, name, args)
-                            history = self._append_history(history, tool_call, tool_response)
-                            yield self._verbose_tool_use(name, args, tool_response)
-                        except Exception as e:
-                            logging.exception(msg=f"Wrong JSON argument format in LLM tool call response: {tool_call}")
-                            history.append({"role": "tool", "tool_call_id": tool_call.id, "content": f"Tool call error: \n{tool_call}\nException:\n" + str(e)})
-                            yield self._verbose_tool_use(name, {}, str(e))
+                    started = start_tool_calls(self.toolcall_session, final_tool_calls.values())
+                    try:
+                        for tool_call, args, _ in started:
+                            if args is not None:
+                                yield self._verbose_tool_use(tool_call.function.name, args, "Begin to call...")
+                        for tool_call, args, future in started:
+                            name = tool_call.function.name
+                            try:
+                                tool_response = await future
+                                history = self._append_history(history, tool_call, tool_response)
+                                yield self._verbose_tool_use(name, args, tool_response)
+                            except Exception as e:
+                                logging.exception(msg=f"Tool call failed: {tool_call}")
+                                history.append({"role": "tool", "tool_call_id": tool_call.id, "content": f"Tool call error: \n{tool_call}\nException:\n" + str(e)})
+                                yield self._verbose_tool_use(name, {}, str(e))
+                    finally:
+                        cancel_tool_calls(started)
 
                 logging.warning(f"Exceed max rounds: {self.max_rounds}")
                 history.append({"role": "user", "content": f"Exceed max rounds: {self.max_rounds}"})
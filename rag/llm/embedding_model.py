@@ -22,17 +22,19 @@ from urllib.parse import urljoin
 import dashscope
 import google.generativeai as genai
 import numpy as np
-import requests
 from ollama import Client
 from openai import OpenAI
 from zhipuai import ZhipuAI
 
+from common.http_client import pooled_request
 from common.log_utils import log_exception
 from common.token_utils import num_tokens_from_string, truncate, total_token_count_from_response
 from common import settings
 import logging
 import base64
 
+LLM_HTTP_TIMEOUT = int(os.environ.get("LLM_TIMEOUT_SECONDS", 600))
+
 
 class Base(ABC):
     def __init__(self, key, model_name, **kwargs):
@@ -384,7 +386,7 @@ class JinaMultiVecEmbed(Base):
                 data['task'] = task
                 data['truncate'] = True
 
-            response = requests.post(self.base_url, headers=self.headers, json=data)
+            response = pooled_request("POST", self.base_url, headers=self.headers, json=data, timeout=LLM_HTTP_TIMEOUT)
             try:
                 res = response.json()
                 for d in res['data']:
@@ -605,7 +607,7 @@ class NvidiaEmbed(Base):
                 "encoding_format": "float",
                 "truncate": "END",
             }
-            response = requests.post(self.base_url, headers=self.headers, json=payload)
+            response = pooled_request("POST", self.base_url, headers=self.headers, json=payload, timeout=LLM_HTTP_TIMEOUT)
             try:
                 res = response.json()
                 ress.extend([d["embedding"] for d in res["data"]])
@@ -742,7 +744,7 @@ class SILICONFLOWEmbed(Base):
                 "input": texts_batch,
                 "encoding_format": "float",
             }
-            response = requests.post(self.base_url, json=payload, headers=self.headers)
+            response = pooled_request("POST", self.base_url, json=payload, headers=self.headers, timeout=LLM_HTTP_TIMEOUT)
             try:
                 res = response.json()
                 ress.extend([d["embedding"] for d in res["data"]])
@@ -759,7 +761,7 @@ class SILICONFLOWEmbed(Base):
             "input": text,
             "encoding_format": "float",
         }
-        response = requests.post(self.base_url, json=payload, headers=self.headers)
+        response = pooled_request("POST", self.base_url, json=payload, headers=self.headers, timeout=LLM_HTTP_TIMEOUT)
         try:
             res = response.json()
             return np.array(res["data"][0]["embedding"]), total_token_count_from_response(res)
@@ -869,7 +871,7 @@ class HuggingFaceEmbed(Base):
         self.base_url = base_url or "http://127.0.0.1:8080"
 
     def encode(self, texts: list):
-        response = requests.post(f"{self.base_url}/embed", json={"inputs": texts}, headers={"Content-Type": "application/json"})
+        response = pooled_request("POST", f"{self.base_url}/embed", json={"inputs": texts}, headers={"Content-Type": "application/json"}, timeout=LLM_HTTP_TIMEOUT)
         if response.status_code == 200:
             embeddings = response.json()
         else:
@@ -877,7 +879,7 @@ class HuggingFaceEmbed(Base):
         return np.array(embeddings), sum([num_tokens_from_string(text) for text in texts])
 
     def encode_queries(self, text: str):
-        response = requests.post(f"{self.base_url}/embed", json={"inputs": text}, headers={"Content-Type": "application/json"})
+        response = pooled_request("POST", f"{self.base_url}/embed", json={"inputs": text}, headers={"Content-Type": "application/json"}, timeout=LLM_HTTP_TIMEOUT)
         if response.status_code == 200:
             embedding = response.json()[0]
             return np.array(embedding), num_tokens_from_string(text)
@@ -14,17 +14,21 @@
 #  limitations under the License.
 #
 import json
+import os
 from abc import ABC
 from urllib.parse import urljoin
 
 import httpx
 import numpy as np
-import requests
 from yarl import URL
 
+from common.http_client import pooled_request
 from common.log_utils import log_exception
 from common.token_utils import num_tokens_from_string, truncate, total_token_count_from_response
 
+LLM_HTTP_TIMEOUT = int(os.environ.get("LLM_TIMEOUT_SECONDS", 600))
+
+
 class Base(ABC):
     def __init__(self, key, model_name, **kwargs):
         """
@@ -64,7 +68,7 @@ class JinaRerank(Base):
     def similarity(self, query: str, texts: list):
         texts = [truncate(t, 8196) for t in texts]
         data = {"model": self.model_name, "query": query, "documents": texts, "top_n": len(texts)}
-        res = requests.post(self.base_url, headers=self.headers, json=data).json()
+        res = pooled_request("POST", self.base_url, headers=self.headers, json=data, timeout=LLM_HTTP_TIMEOUT).json()
         rank = np.zeros(len(texts), dtype=float)
         try:
             for d in res["results"]:
@@ -96,7 +100,7 @@ class XInferenceRerank(Base):
         for _, t in pairs:
             token_count += num_tokens_from_string(t)
         data = {"model": self.model_name, "query": query, "return_documents": "true", "return_len": "true", "documents": texts}
-        res = requests.post(self.base_url, headers=self.headers, json=data).json()
+        res = pooled_request("POST", self.base_url, headers=self.headers, json=data, timeout=LLM_HTTP_TIMEOUT).json()
         rank = np.zeros(len(texts), dtype=float)
         try:
             for d in res["results"]:
@@ -129,7 +133,7 @@ class LocalAIRerank(Base):
         token_count = 0
         for t in texts:
             token_count += num_tokens_from_string(t)
-        res = requests.post(self.base_url, headers=self.headers, json=data).json()
+        res = pooled_request("POST", self.base_url, headers=self.headers, json=data, timeout=LLM_HTTP_TIMEOUT).json()
         rank = np.zeros(len(texts), dtype=float)
         try:
             for d in res["results"]:
@@ -172,7 +176,7 @@ class NvidiaRerank(Base):
             "truncate": "END",
             "top_n": len(texts),
         }
-        res = requests.post(self.base_url, headers=self.headers, json=data).json()
+        res = pooled_request("POST", self.base_url, headers=self.headers, json=data, timeout=LLM_HTTP_TIMEOUT).json()
         rank = np.zeros(len(texts), dtype=float)
         try:
             for d in res["rankings"]:
@@ -215,7 +219,7 @@ class OpenAI_APIRerank(Base):
         token_count = 0
         for t in texts:
             token_count += num_tokens_from_string(t)
-        res = requests.post(self.base_url, headers=self.headers, json=data).json()
+        res = pooled_request("POST", self.base_url, headers=self.headers, json=data, timeout=LLM_HTTP_TIMEOUT).json()
         rank = np.zeros(len(texts), dtype=float)
         try:
             for d in res["results"]:
@@ -293,7 +297,7 @@ class SILICONFLOWRerank(Base):
             "max_chunks_per_doc": 1024,
             "overlap_tokens": 80,
         }
-        response = requests.post(self.base_url, json=payload, headers=self.headers).json()
+        response = pooled_request("POST", self.base_url, json=payload, headers=self.headers, timeout=LLM_HTTP_TIMEOUT).json()
         rank = np.zeros(len(texts), dtype=float)
         try:
             for d in response["results"]:
@@ -394,8 +398,8 @@ class HuggingfaceRerank(Base):
         batch_size = 8
         for i in range(0, len(texts), batch_size):
             try:
-                res = requests.post(
-                    f"http://{url}/rerank", headers={"Content-Type": "application/json"}, json={"query": query, "texts": texts[i : i + batch_size], "raw_scores": False, "truncate": True}
+                res = pooled_request(
+                    "POST", f"http://{url}/rerank", headers={"Content-Type": "application/json"}, json={"query": query, "texts": texts[i : i + batch_size], "raw_scores": False, "truncate": True}, timeout=LLM_HTTP_TIMEOUT
                 )
 
                 for o in res.json():
@@ -444,7 +448,7 @@ class GPUStackRerank(Base):
         }
 
         try:
-            response = requests.post(self.base_url, json=payload, headers=self.headers)
+            response = pooled_request("POST", self.base_url, json=payload, headers=self.headers, timeout=LLM_HTTP_TIMEOUT)
             response.raise_for_status()
             response_json = response.json()
 
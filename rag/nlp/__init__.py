@@ -15,8 +15,10 @@
 #
 
 import logging
+import os
 import random
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from common.token_utils import num_tokens_from_string
 import re
@@ -273,8 +275,19 @@ def tokenize(d, txt, eng):
     d["content_sm_ltks"] = rag_tokenizer.fine_grained_tokenize(d["content_ltks"])
 
 
-def split_with_pattern(d, pattern: str, content: str, eng) -> list:
-    docs = []
+def tokenize_batch(pending: list[tuple[dict, str]]) -> list[dict]:
+    """Batch form of `tokenize` for (doc, text) pairs; returns the docs in order."""
+    from . import rag_tokenizer
+    txts = [re.sub(r"</?(table|td|caption|tr|th)( [^<>]{0,12})?>", " ", txt) for _, txt in pending]
+    for (d, txt), (ltks, sm_ltks) in zip(pending, rag_tokenizer.tokenize_pairs(txts)):
+        d["content_with_weight"] = txt
+        d["content_ltks"] = ltks
+        d["content_sm_ltks"] = sm_ltks
+    return [d for d, _ in pending]
+
+
+def _split_children(d, pattern: str, content: str) -> list[tuple[dict, str]]:
+    children = []
     txts = [txt for txt in re.split(r"(%s)" % pattern, content, flags=re.DOTALL)]
     for j in range(0, len(txts), 2):
         txt = txts[j]
@@ -282,42 +295,65 @@ def split_with_pattern(d, pattern: str, content: str, eng) -> list:
             continue
         if j + 1 < len(txts):
             txt += txts[j + 1]
-        dd = copy.deepcopy(d)
-        tokenize(dd, txt, eng)
-        docs.append(dd)
-    return docs
+        children.append((copy.deepcopy(d), txt))
+    return children
+
+
+def split_with_pattern(d, pattern: str, content: str, eng) -> list:
+    return tokenize_batch(_split_children(d, pattern, content))
+
+
+CHUNK_CROP_WORKERS = int(os.environ.get("CHUNK_CROP_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+def _crop_chunk(pdf_parser, ck):
+    """Crop a chunk's image off the page renders; the image is kept as JPEG bytes, not a page-sized bitmap."""
+    from rag.utils.base64_image import image_to_jpeg
+    try:
+        img, poss = pdf_parser.crop(ck, need_position=True)
+    except NotImplementedError:
+        return None
+    jpeg = None
+    if img is not None:
+        jpeg = image_to_jpeg(img)
+        img.close()
+    return jpeg, poss, pdf_parser.remove_tag(ck)
+
+
+def _crop_chunks(pdf_parser, chunks):
+    if CHUNK_CROP_WORKERS <= 1 or len(chunks) < 2:
+        return map(lambda ck: _crop_chunk(pdf_parser, ck), chunks)
+    with ThreadPoolExecutor(max_workers=CHUNK_CROP_WORKERS, thread_name_prefix="chunk_crop") as executor:
+        return list(executor.map(lambda ck: _crop_chunk(pdf_parser, ck), chunks))
 
 
 def tokenize_chunks(chunks, doc, eng, pdf_parser=None, child_delimiters_pattern=None):
-    res = []
+    pending = []
+    chunks = [(ii, ck) for ii, ck in enumerate(chunks) if len(ck.strip()) != 0]
+    # PIL crops and JPEG encoding mostly run outside the GIL, so the chunks' images are cropped concurrently.
+    crops = _crop_chunks(pdf_parser, [ck for _, ck in chunks]) if pdf_parser else [None] * len(chunks)
     # wrap up as es documents
-    for ii, ck in enumerate(chunks):
-        if len(ck.strip()) == 0:
-            continue
+    for (ii, ck), crop in zip(chunks, crops):
         logging.debug("-- {}".format(ck))
         d = copy.deepcopy(doc)
         if pdf_parser:
-            try:
-                d["image"], poss = pdf_parser.crop(ck, need_position=True)
+            if crop is not None:
+                d["image"], poss, ck = crop
                 add_positions(d, poss)
-                ck = pdf_parser.remove_tag(ck)
-            except NotImplementedError:
-                pass
         else:
             add_positions(d, [[ii] * 5])
 
         if child_delimiters_pattern:
             d["mom_with_weight"] = ck
-            res.extend(split_with_pattern(d, child_delimiters_pattern, ck, eng))
+            pending.extend(_split_children(d, child_delimiters_pattern, ck))
             continue
 
-        tokenize(d, ck, eng)
-        res.append(d)
-    return res
+        pending.append((d, ck))
+    return tokenize_batch(pending)
 
 
 def doc_tokenize_chunks_with_images(chunks, doc, eng, child_delimiters_pattern=None, batch_size=10):
-    res = []
+    pending = []
     for ii, ck in enumerate(chunks):
         text = ck.get('context_above', "") + ck.get('text') + ck.get('context_below', "")
         if len(text.strip()) == 0:
@@ -331,19 +367,18 @@ def doc_tokenize_chunks_with_images(chunks, doc, eng, child_delimiters_pattern=N
         if ck.get("ck_type") == "text":
             if child_delimiters_pattern:
                 d["mom_with_weight"] = ck
-                res.extend(split_with_pattern(d, child_delimiters_pattern, text, eng))
+                pending.extend(_split_children(d, child_delimiters_pattern, text))
                 continue
         elif ck.get("ck_type") == "image":
             d["doc_type_kwd"] = "image"
         elif ck.get("ck_type") == "table":
             d["doc_type_kwd"] = "table"
-        tokenize(d, text, eng)
-        res.append(d)
-    return res
+        pending.append((d, text))
+    return tokenize_batch(pending)
 
 
 def tokenize_chunks_with_images(chunks, doc, eng, images, child_delimiters_pattern=None):
-    res = []
+    pending = []
     # wrap up as es documents
     for ii, (ck, image) in enumerate(zip(chunks, images)):
         if len(ck.strip()) == 0:
@@ -354,11 +389,10 @@ def tokenize_chunks_with_images(chunks, doc, eng, images, child_delimiters_patte
         add_positions(d, [[ii] * 5])
         if child_delimiters_pattern:
             d["mom_with_weight"] = ck
-            res.extend(split_with_pattern(d, child_delimiters_pattern, ck, eng))
+            pending.extend(_split_children(d, child_delimiters_pattern, ck))
             continue
-        tokenize(d, ck, eng)
-        res.append(d)
-    return res
+        pending.append((d, ck))
+    return tokenize_batch(pending)
 
 
 def tokenize_table(tbls, doc, eng, batch_size=10):
@@ -14,8 +14,24 @@
 #  limitations under the License.
 #
 
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 import infinity.rag_tokenizer
 from common import settings
+from common.misc_utils import TTLCache
+
+TOKENIZE_CACHE_SIZE = int(os.environ.get("TOKENIZE_CACHE_SIZE", 8192))
+TOKENIZER_WORKERS = int(os.environ.get("TOKENIZER_WORKERS", 0))
+TOKENIZER_POOL_MIN_BATCH = int(os.environ.get("TOKENIZER_POOL_MIN_BATCH", 32))
 
 
 class RagTokenizer(infinity.rag_tokenizer.RagTokenizer):
@@ -49,9 +65,180 @@ def naive_qie(txt):
     return infinity.rag_tokenizer.naive_qie(txt)
 
 
+class TokenizeStats:
+    """Tokenization calls, cache hits and seconds spent, accumulated for one task."""
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, calls: int, hits: int, seconds: float):
+        with self._lock:
+            self.calls += calls
+            self.hits += hits
+            self.seconds += seconds
+
+    def __str__(self):
+        hit_rate = self.hits / self.calls * 100 if self.calls else 0
+        return "tokenization {:.2f}s over {} strings ({:.0f}% cached)".format(self.seconds, self.calls, hit_rate)
+
+
+_task_stats: ContextVar[TokenizeStats | None] = ContextVar("tokenize_stats", default=None)
+
+
+@contextmanager
+def track_stats():
+    """Collect tokenization stats of the current context, including threads and tasks spawned from it."""
+    stats = TokenizeStats()
+    token = _task_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _task_stats.reset(token)
+
+
+_pool_tokenizer = None
+
+
+def _pool_init():
+    global _pool_tokenizer
+    _pool_tokenizer = infinity.rag_tokenizer.RagTokenizer()
+
+
+def _pool_tokenize(lines: list[str], fine_grained: bool) -> list[tuple[str, str | None]]:
+    res = []
+    for line in lines:
+        tks = _pool_tokenizer.tokenize(line)
+        res.append((tks, _pool_tokenizer.fine_grained_tokenize(tks) if fine_grained else None))
+    return res
+
+
+class TokenizationService:
+    """
+    Front of the tokenizer with a content-hash LRU and batch APIs.
+
+    Repeated strings (child chunks, keywords, questions, rerank candidates) are
+    tokenized once per process. Batches with enough cache misses are spread over
+    a process pool of TOKENIZER_WORKERS workers, since the tokenizer is pure
+    Python and does not scale with threads; with no workers everything runs
+    in-process.
+    """
+
+    def __init__(self, tokenizer: RagTokenizer, cache_size: int = TOKENIZE_CACHE_SIZE,
+                 workers: int = TOKENIZER_WORKERS, pool_min_batch: int = TOKENIZER_POOL_MIN_BATCH):
+        self.tokenizer = tokenizer
+        self.workers = workers
+        self.pool_min_batch = pool_min_batch
+        self._cache = TTLCache(maxsize=cache_size, ttl=float("inf")) if cache_size > 0 else None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind: str, text: str):
+        return kind, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def _cached(self, kind: str, text: str, fn) -> str:
+        stats = _task_stats.get()
+        st = time.perf_counter() if stats else 0
+        if self._cache is None:
+            res, hit = fn(text), False
+        else:
+            key = self._key(kind, text)
+            res = self._cache.get(key)
+            hit = res is not None
+            if not hit:
+                res = fn(text)
+                self._cache.set(key, res)
+        if stats:
+            stats.add(1, int(hit), time.perf_counter() - st)
+        return res
+
+    def tokenize(self, line: str) -> str:
+        if settings.DOC_ENGINE_INFINITY:
+            return line
+        return self._cached("tks", line, self.tokenizer.tokenize)
+
+    def fine_grained_tokenize(self, tks: str) -> str:
+        if settings.DOC_ENGINE_INFINITY:
+            return tks
+        return self._cached("sm", tks, self.tokenizer.fine_grained_tokenize)
+
+    def tokenize_batch(self, lines: list[str]) -> list[str]:
+        """Coarse tokens of every line, in order."""
+        return [tks for tks, _ in self._batch(lines, fine_grained=False)]
+
+    def tokenize_pairs(self, lines: list[str]) -> list[tuple[str, str]]:
+        """(coarse tokens, fine-grained tokens of the coarse tokens) of every line, in order."""
+        return self._batch(lines, fine_grained=True)
+
+    def _batch(self, lines: list[str], fine_grained: bool) -> list[tuple[str, str | None]]:
+        if settings.DOC_ENGINE_INFINITY:
+            return [(line, line if fine_grained else None) for line in lines]
+        stats = _task_stats.get()
+        st = time.perf_counter()
+        res = [None] * len(lines)
+        misses = {}
+        for i, line in enumerate(lines):
+            tks = self._cache.get(self._key("tks", line)) if self._cache is not None else None
+            sm = None
+            if tks is not None and fine_grained:
+                sm = self._cache.get(self._key("sm", tks))
+                if sm is None:
+                    tks = None
+            if tks is None:
+                misses.setdefault(line, []).append(i)
+            else:
+                res[i] = (tks, sm)
+
+        computed = self._compute(list(misses.keys()), fine_grained)
+        for line, (tks, sm) in zip(misses.keys(), computed):
+            if self._cache is not None:
+                self._cache.set(self._key("tks", line), tks)
+                if fine_grained:
+                    self._cache.set(self._key("sm", tks), sm)
+            for i in misses[line]:
+                res[i] = (tks, sm)
+        if stats:
+            stats.add(len(lines), len(lines) - sum(len(v) for v in misses.values()), time.perf_counter() - st)
+        return res
+
+    def _compute(self, lines: list[str], fine_grained: bool) -> list[tuple[str, str | None]]:
+        if self.workers > 0 and len(lines) >= self.pool_min_batch:
+            try:
+                pool = self._get_pool()
+                chunksize = max(1, len(lines) // (self.workers * 4))
+                parts = [lines[i:i + chunksize] for i in range(0, len(lines), chunksize)]
+                res = []
+                for part in pool.map(_pool_tokenize, parts, [fine_grained] * len(parts)):
+                    res.extend(part)
+                return res
+            except BrokenProcessPool:
+                logging.exception("Tokenizer pool broke, tokenizing in-process")
+                with self._pool_lock:
+                    self._pool = None
+        res = []
+        for line in lines:
+            tks = self.tokenizer.tokenize(line)
+            res.append((tks, self.tokenizer.fine_grained_tokenize(tks) if fine_grained else None))
+        return res
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: the caller is multi-threaded, forking it is unsafe.
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_pool_init,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+
 tokenizer = RagTokenizer()
-tokenize = tokenizer.tokenize
-fine_grained_tokenize = tokenizer.fine_grained_tokenize
+service = TokenizationService(tokenizer)
+tokenize = service.tokenize
+fine_grained_tokenize = service.fine_grained_tokenize
+tokenize_batch = service.tokenize_batch
+tokenize_pairs = service.tokenize_pairs
 tag = tokenizer.tag
 freq = tokenizer.freq
 tradi2simp = tokenizer._tradi2simp
@@ -15,9 +15,13 @@
 #
 import json
 import logging
+import os
 import re
 import math
+import threading
+import time
 from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 
 from rag.prompts.generator import relevant_chunks_with_toc
@@ -27,8 +31,16 @@ from common.doc_store.doc_store_base import MatchDenseExpr, FusionExpr, OrderByE
 from common.string_utils import remove_redundant_spaces
 from common.float_utils import get_float
 from common.constants import PAGERANK_FLD, TAG_FLD
+from rag.utils.rank_feature_utils import tag_feature_scores
+from rag.utils.tag_index import TAG_INDEX_TOKEN_FIELDS, TagIndex
+from common.misc_utils import TTLCache
 from common import settings
 
+TAG_INDEX_TTL = int(os.environ.get("TAG_INDEX_TTL", 3600))
+TAG_INDEX_MAX_CHUNKS = int(os.environ.get("TAG_INDEX_MAX_CHUNKS", 200000))
+# Minimum age of a tag index before a change of its KBs triggers a rebuild.
+TAG_INDEX_REBUILD_INTERVAL = int(os.environ.get("TAG_INDEX_REBUILD_INTERVAL", 300))
+
 
 def index_name(uid): return f"ragflow_{uid}"
 
@@ -37,6 +49,11 @@ class Dealer:
     def __init__(self, dataStore: DocStoreConnection):
         self.qryr = query.FulltextQueryer()
         self.dataStore = dataStore
+        # (tuple(sorted tag kb ids), S) -> (signature, TagIndex, built at); stale entries are served while rebuilding
+        self._tag_indexes = TTLCache(64, TAG_INDEX_TTL * 2)
+        self._tag_index_builds: dict[tuple, Future] = {}
+        self._tag_index_lock = threading.Lock()
+        self._tag_index_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tag_index")
 
     @dataclass
     class SearchResult:
@@ -275,7 +292,6 @@ class Dealer:
 
     def _rank_feature_scores(self, query_rfea, search_res):
         ## For rank feature(tag_fea) scores.
-        rank_fea = []
         pageranks = []
         for chunk_id in search_res.ids:
             pageranks.append(search_res.field[chunk_id].get(PAGERANK_FLD, 0))
@@ -284,21 +300,9 @@ class Dealer:
         if not query_rfea:
             return np.array([0 for _ in range(len(search_res.ids))]) + pageranks
 
-        q_denor = np.sqrt(np.sum([s * s for t, s in query_rfea.items() if t != PAGERANK_FLD]))
-        for i in search_res.ids:
-            nor, denor = 0, 0
-            if not search_res.field[i].get(TAG_FLD):
-                rank_fea.append(0)
-                continue
-            for t, sc in eval(search_res.field[i].get(TAG_FLD, "{}")).items():
-                if t in query_rfea:
-                    nor += query_rfea[t] * sc
-                denor += sc * sc
-            if denor == 0:
-                rank_fea.append(0)
-            else:
-                rank_fea.append(nor / np.sqrt(denor) / q_denor)
-        return np.array(rank_fea) * 10. + pageranks
+        rank_fea = tag_feature_scores(query_rfea, [search_res.field[i].get(TAG_FLD) for i in search_res.ids],
+                                      skip_query_norm=(PAGERANK_FLD,))
+        return rank_fea * 10. + pageranks
 
     def rerank(self, sres, query, tkweight=0.3,
                vtweight=0.7, cfield="content_ltks",
@@ -583,7 +587,79 @@ class Dealer:
         total = np.sum([c for _, c in res])
         return {t: (c + 1) / (total + S) for t, c in res}
 
-    def tag_content(self, tenant_id: str, kb_ids: list[str], doc, all_tags, topn_tags=3, keywords_topn=30, S=1000):
+    def tag_index(self, tenant_ids: str | list[str], kb_ids: list[str], signature=None, S=1000,
+                  wait=True) -> TagIndex | None:
+        """In-memory TagIndex over the tag KBs.
+
+        Callers pass a `signature` that changes with the tag KBs' content, e.g. their chunk counts.
+        An index is built in the background and, once there, served as is; it is rebuilt in the
+        background when the signature changed and it is older than TAG_INDEX_REBUILD_INTERVAL,
+        or when it is older than TAG_INDEX_TTL. Without an index yet, `wait=False` returns None
+        instead of waiting for the first build.
+        """
+        key = (tuple(sorted(set(kb_ids))), S)
+        cached = self._tag_indexes.get(key)
+        if cached:
+            cached_signature, index, built_at = cached
+            age = time.monotonic() - built_at
+            if age >= TAG_INDEX_TTL or (cached_signature != signature and age >= TAG_INDEX_REBUILD_INTERVAL):
+                self._start_tag_index_build(key, tenant_ids, signature)
+            return index
+        build = self._start_tag_index_build(key, tenant_ids, signature)
+        return build.result() if wait else None
+
+    def _start_tag_index_build(self, key: tuple, tenant_ids: str | list[str], signature) -> Future:
+        with self._tag_index_lock:
+            build = self._tag_index_builds.get(key)
+            if build is None:
+                build = self._tag_index_executor.submit(self._build_tag_index, key, tenant_ids, signature)
+                self._tag_index_builds[key] = build
+            return build
+
+    def _build_tag_index(self, key: tuple, tenant_ids: str | list[str], signature) -> TagIndex:
+        try:
+            kb_ids, S = list(key[0]), key[1]
+            if isinstance(tenant_ids, str):
+                tenant_ids = [tenant_ids]
+            idx_nms = [index_name(tid) for tid in set(tenant_ids)]
+            fields = ["tag_kwd"] + TAG_INDEX_TOKEN_FIELDS
+            # Page each tag file by its row number: offsets over an unsorted result skip or repeat
+            # rows, and a per-file window stays under the doc store's result window for longer.
+            res = self.dataStore.search([], [], {}, [], OrderByExpr(), 0, 0, idx_nms, kb_ids, ["doc_id"])
+            doc_ids = sorted(doc_id for doc_id, _ in self.dataStore.get_aggregation(res, "doc_id"))
+            chunks = []
+            bs = 1000
+            for doc_id in doc_ids:
+                for p in range(0, TAG_INDEX_MAX_CHUNKS - len(chunks), bs):
+                    es_res = self.dataStore.search(fields, [], {"doc_id": doc_id}, [], OrderByExpr().asc("top_int"),
+                                                   p, bs, idx_nms, kb_ids)
+                    dict_chunks = self.dataStore.get_fields(es_res, fields)
+                    chunks.extend(dict_chunks.values())
+                    if len(dict_chunks) < bs:
+                        break
+            index = TagIndex(chunks, S=S)
+            logging.info(f"Built tag index over {len(index)} chunks of tag KBs {kb_ids}")
+            self._tag_indexes.set(key, (signature, index, time.monotonic()))
+            return index
+        except Exception:
+            logging.exception(f"Failed to build tag index of tag KBs {list(key[0])}")
+            raise
+        finally:
+            with self._tag_index_lock:
+                self._tag_index_builds.pop(key, None)
+
+    def tag_content(self, tenant_id: str, kb_ids: list[str], doc, all_tags, topn_tags=3, keywords_topn=30, S=1000,
+                    tag_index: TagIndex | None = None):
+        if tag_index is not None:
+            tks_w = self.qryr.tw.weights((doc["title_tks"] + " " + doc["content_ltks"]).split(), preprocess=False)
+            tokens = [tk for tk, _ in sorted(tks_w, key=lambda x: x[1] * -1)[:keywords_topn]]
+            for kwd in doc.get("important_kwd", []):
+                tokens.extend(rag_tokenizer.tokenize(kwd).split())
+            tag_fea = tag_index.score(tokens, topn_tags, min_should_match=max(1, int(min(3, len(tokens) / 10))))
+            if not tag_fea:
+                return False
+            doc[TAG_FLD] = {a.replace(".", "_"): c for a, c in tag_fea if c > 0}
+            return True
         idx_nm = index_name(tenant_id)
         match_txt = self.qryr.paragraph(doc["title_tks"] + " " + doc["content_ltks"], doc.get("important_kwd", []),
                                         keywords_topn)
@@ -597,7 +673,15 @@ class Dealer:
         doc[TAG_FLD] = {a.replace(".", "_"): c for a, c in tag_fea if c > 0}
         return True
 
-    def tag_query(self, question: str, tenant_ids: str | list[str], kb_ids: list[str], all_tags, topn_tags=3, S=1000):
+    def tag_query(self, question: str, tenant_ids: str | list[str], kb_ids: list[str], all_tags, topn_tags=3, S=1000,
+                  tag_index: TagIndex | None = None):
+        if tag_index is not None:
+            _, keywords = self.qryr.question(question, min_match=0.0)
+            tokens = []
+            for kwd in keywords:
+                tokens.extend(rag_tokenizer.tokenize(kwd).split())
+            tag_fea = tag_index.score(tokens, topn_tags)
+            return {a.replace(".", "_"): max(1, c) for a, c in tag_fea}
         if isinstance(tenant_ids, str):
             idx_nms = index_name(tenant_ids)
         else:
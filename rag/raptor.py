@@ -15,7 +15,11 @@
 #
 import asyncio
 import logging
+import multiprocessing
+import os
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import umap
@@ -29,9 +33,27 @@ from graphrag.utils import (
     chat_limiter,
     get_embed_cache,
     get_llm_cache,
+    get_reduced_embed_cache,
     set_embed_cache,
     set_llm_cache,
+    set_reduced_embed_cache,
 )
+from rag.utils.raptor_utils import gmm_bic, search_optimal_clusters
+
+RAPTOR_BIC_WORKERS = int(os.environ.get("RAPTOR_BIC_WORKERS", min(4, os.cpu_count() or 1)))
+_bic_pool = None
+_bic_pool_lock = threading.Lock()
+
+
+def _get_bic_pool():
+    global _bic_pool
+    if RAPTOR_BIC_WORKERS <= 1:
+        return None
+    with _bic_pool_lock:
+        if _bic_pool is None:
+            # spawn: the task executor is multi-threaded and BLAS is not fork-safe.
+            _bic_pool = ProcessPoolExecutor(max_workers=RAPTOR_BIC_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _bic_pool
 
 
 class RecursiveAbstractiveProcessing4TreeOrganizedRetrieval:
@@ -91,19 +113,54 @@ class RecursiveAbstractiveProcessing4TreeOrganizedRetrieval:
 
     def _get_optimal_clusters(self, embeddings: np.ndarray, random_state: int, task_id: str = ""):
         max_clusters = min(self._max_cluster, len(embeddings))
-        n_clusters = np.arange(1, max_clusters)
-        bics = []
-        for n in n_clusters:
-            if task_id:
-                if has_canceled(task_id):
-                    logging.info(f"Task {task_id} cancelled during get optimal clusters.")
-                    raise TaskCanceledException(f"Task {task_id} was cancelled")
+        pool = _get_bic_pool()
+
+        def check_canceled():
+            if task_id and has_canceled(task_id):
+                logging.info(f"Task {task_id} cancelled during get optimal clusters.")
+                raise TaskCanceledException(f"Task {task_id} was cancelled")
+
+        def evaluate(ns):
+            if pool is None:
+                return [gmm_bic(embeddings, n, random_state) for n in ns]
+            futures = [pool.submit(gmm_bic, embeddings, n, random_state) for n in ns]
+            return [f.result() for f in futures]
 
-            gm = GaussianMixture(n_components=n, random_state=random_state)
-            gm.fit(embeddings)
-            bics.append(gm.bic(embeddings))
-        optimal_clusters = n_clusters[np.argmin(bics)]
-        return optimal_clusters
+        return search_optimal_clusters(
+            range(1, max_clusters),
+            evaluate,
+            batch_size=RAPTOR_BIC_WORKERS,
+            on_batch=check_canceled,
+        )
+
+    def _reduce_embeddings(self, embeddings):
+        n_neighbors = max(2, int((len(embeddings) - 1) ** 0.8))
+        n_components = min(12, len(embeddings) - 2)
+        try:
+            reduced = get_reduced_embed_cache(embeddings, n_neighbors, n_components)
+        except Exception as e:
+            logging.warning(f"RAPTOR reduced embedding cache lookup failed: {e}")
+            reduced = None
+        if reduced is not None and len(reduced) == len(embeddings):
+            return reduced
+
+        reduced = umap.UMAP(
+            n_neighbors=n_neighbors,
+            n_components=n_components,
+            metric="cosine",
+        ).fit_transform(embeddings)
+        try:
+            set_reduced_embed_cache(embeddings, n_neighbors, n_components, reduced)
+        except Exception as e:
+            logging.warning(f"RAPTOR reduced embedding cache store failed: {e}")
+        return reduced
+
+    def _assign_clusters(self, embeddings, n_clusters, random_state):
+        gm = GaussianMixture(n_components=n_clusters, random_state=random_state)
+        gm.fit(embeddings)
+        probs = gm.predict_proba(embeddings)
+        lbls = [np.where(prob > self._threshold)[0] for prob in probs]
+        return [lbl[0] if isinstance(lbl, np.ndarray) else lbl for lbl in lbls]
 
     async def __call__(self, chunks, random_state, callback=None, task_id: str = ""):
         if len(chunks) <= 1:
@@ -147,12 +204,13 @@ class RecursiveAbstractiveProcessing4TreeOrganizedRetrieval:
                     )
                     logging.debug(f"SUM: {cnt}")
 
-                    if task_id and has_canceled(task_id):
-                        logging.info(f"Task {task_id} cancelled before RAPTOR embedding.")
-                        raise TaskCanceledException(f"Task {task_id} was cancelled")
+                # Embedding runs outside the chat limiter so it does not hold an LLM slot.
+                if task_id and has_canceled(task_id):
+                    logging.info(f"Task {task_id} cancelled before RAPTOR embedding.")
+                    raise TaskCanceledException(f"Task {task_id} was cancelled")
 
-                    embds = await self._embedding_encode(cnt)
-                    chunks.append((cnt, embds))
+                embds = await self._embedding_encode(cnt)
+                chunks.append((cnt, embds))
             except TaskCanceledException:
                 raise
             except Exception as exc:
@@ -182,21 +240,12 @@ class RecursiveAbstractiveProcessing4TreeOrganizedRetrieval:
                 end = len(chunks)
                 continue
 
-            n_neighbors = int((len(embeddings) - 1) ** 0.8)
-            reduced_embeddings = umap.UMAP(
-                n_neighbors=max(2, n_neighbors),
-                n_components=min(12, len(embeddings) - 2),
-                metric="cosine",
-            ).fit_transform(embeddings)
-            n_clusters = self._get_optimal_clusters(reduced_embeddings, random_state, task_id=task_id)
+            reduced_embeddings = await asyncio.to_thread(self._reduce_embeddings, np.array(embeddings))
+            n_clusters = await asyncio.to_thread(self._get_optimal_clusters, reduced_embeddings, random_state, task_id)
             if n_clusters == 1:
                 lbls = [0 for _ in range(len(reduced_embeddings))]
             else:
-                gm = GaussianMixture(n_components=n_clusters, random_state=random_state)
-                gm.fit(reduced_embeddings)
-                probs = gm.predict_proba(reduced_embeddings)
-                lbls = [np.where(prob > self._threshold)[0] for prob in probs]
-                lbls = [lbl[0] if isinstance(lbl, np.ndarray) else lbl for lbl in lbls]
+                lbls = await asyncio.to_thread(self._assign_clusters, reduced_embeddings, n_clusters, random_state)
 
             tasks = []
             for c in range(n_clusters):
@@ -32,12 +32,12 @@ from api.db.services.pipeline_operation_log_service import PipelineOperationLogS
 from api.db.joint_services.memory_message_service import handle_save_to_memory_task
 from common.connection_utils import timeout
 from common.metadata_utils import update_metadata_to, metadata_schema
-from rag.utils.base64_image import image2id
+from rag.utils.base64_image import upload_images
 from rag.utils.raptor_utils import should_skip_raptor, get_skip_reason
 from common.log_utils import init_root_logger
 from common.config_utils import show_configs
 from graphrag.general.index import run_graphrag_for_kb
-from graphrag.utils import get_llm_cache, set_llm_cache, get_tags_from_cache, set_tags_to_cache
+from graphrag.utils import get_llm_cache, set_llm_cache
 from rag.prompts.generator import keyword_extraction, question_proposal, content_tagging, run_toc_from_text, \
     gen_metadata
 import logging
@@ -122,6 +122,9 @@ task_limiter = asyncio.Semaphore(MAX_CONCURRENT_TASKS)
 chunk_limiter = asyncio.Semaphore(MAX_CONCURRENT_CHUNK_BUILDERS)
 embed_limiter = asyncio.Semaphore(MAX_CONCURRENT_CHUNK_BUILDERS)
 minio_limiter = asyncio.Semaphore(MAX_CONCURRENT_MINIO)
+# Encoded chunk images of one task waiting on storage.
+MINIO_UPLOAD_MAX_BYTES = int(os.environ.get('MINIO_UPLOAD_MAX_BYTES', str(64 * 1024 * 1024)))
+MINIO_UPLOAD_RETRIES = int(os.environ.get('MINIO_UPLOAD_RETRIES', '3'))
 kg_limiter = asyncio.Semaphore(2)
 WORKER_HEARTBEAT_TIMEOUT = int(os.environ.get('WORKER_HEARTBEAT_TIMEOUT', '120'))
 stop_event = threading.Event()
@@ -235,7 +238,8 @@ async def get_storage_binary(bucket, name):
 
 
 @timeout(60 * 80, 1)
-async def build_chunks(task, progress_callback):
+async def build_chunks(task, progress_callback, timings=None):
+    timings = {} if timings is None else timings
     if task["size"] > settings.DOC_MAXIMUM_SIZE:
         set_progress(task["id"], prog=-1, msg="File size exceeds( <= %dMb )" %
                                               (int(settings.DOC_MAXIMUM_SIZE / 1024 / 1024)))
@@ -246,7 +250,8 @@ async def build_chunks(task, progress_callback):
         st = timer()
         bucket, name = File2DocumentService.get_storage_address(doc_id=task["doc_id"])
         binary = await get_storage_binary(bucket, name)
-        logging.info("From minio({}) {}/{}".format(timer() - st, task["location"], task["name"]))
+        timings["fetch"] = timer() - st
+        logging.info("From minio({}) {}/{}".format(timings["fetch"], task["location"], task["name"]))
     except TimeoutError:
         progress_callback(-1, "Internal server error: Fetch file from minio timeout. Could you try it again.")
         logging.exception(
@@ -261,6 +266,7 @@ async def build_chunks(task, progress_callback):
         raise
 
     try:
+        parse_st = timer()
         async with chunk_limiter:
             cks = await asyncio.to_thread(
                 chunker.chunk,
@@ -274,6 +280,7 @@ async def build_chunks(task, progress_callback):
                 parser_config=task["parser_config"],
                 tenant_id=task["tenant_id"],
             )
+        timings["parse"] = timer() - parse_st
         logging.info("Chunking({}) {}/{} done".format(timer() - st, task["location"], task["name"]))
     except TaskCanceledException:
         raise
@@ -291,45 +298,30 @@ async def build_chunks(task, progress_callback):
         doc[PAGERANK_FLD] = int(task["pagerank"])
     st = timer()
 
-    @timeout(60)
-    async def upload_to_minio(document, chunk):
-        try:
-            d = copy.deepcopy(document)
-            d.update(chunk)
-            d["id"] = xxhash.xxh64(
-                (chunk["content_with_weight"] + str(d["doc_id"])).encode("utf-8", "surrogatepass")).hexdigest()
-            d["create_time"] = str(datetime.now()).replace("T", " ")[:19]
-            d["create_timestamp_flt"] = datetime.now().timestamp()
-
-            if d.get("img_id"):
-                docs.append(d)
-                return
-
-            if not d.get("image"):
-                _ = d.pop("image", None)
-                d["img_id"] = ""
-                docs.append(d)
-                return
-            await image2id(d, partial(settings.STORAGE_IMPL.put, tenant_id=task["tenant_id"]), d["id"], task["kb_id"])
-            docs.append(d)
-        except Exception:
-            logging.exception(
-                "Saving image of chunk {}/{}/{} got exception".format(task["location"], task["name"], d["id"]))
-            raise
-
-    tasks = []
     for ck in cks:
-        tasks.append(asyncio.create_task(upload_to_minio(doc, ck)))
+        # `doc` only holds scalars, so a shallow copy is enough.
+        d = dict(doc)
+        d.update(ck)
+        d["id"] = xxhash.xxh64(
+            (ck["content_with_weight"] + str(d["doc_id"])).encode("utf-8", "surrogatepass")).hexdigest()
+        d["create_time"] = str(datetime.now()).replace("T", " ")[:19]
+        d["create_timestamp_flt"] = datetime.now().timestamp()
+        if d.get("img_id"):
+            d.pop("image", None)
+        elif not d.get("image"):
+            d.pop("image", None)
+            d["img_id"] = ""
+        docs.append(d)
+
     try:
-        await asyncio.gather(*tasks, return_exceptions=False)
+        await upload_images(docs, partial(settings.STORAGE_IMPL.put, tenant_id=task["tenant_id"]), task["kb_id"],
+                            workers=MAX_CONCURRENT_MINIO, max_bytes=MINIO_UPLOAD_MAX_BYTES, retries=MINIO_UPLOAD_RETRIES)
     except Exception as e:
-        logging.error(f"MINIO PUT({task['name']}) got exception: {e}")
-        for t in tasks:
-            t.cancel()
-        await asyncio.gather(*tasks, return_exceptions=True)
+        logging.exception(f"MINIO PUT({task['location']}/{task['name']}) got exception: {e}")
         raise
 
     el = timer() - st
+    timings["images"] = el
     logging.info("MINIO PUT({}) cost {:.3f} s".format(task["name"], el))
 
     if task["parser_config"].get("auto_keywords", 0):
@@ -363,7 +355,8 @@ async def build_chunks(task, progress_callback):
                 t.cancel()
             await asyncio.gather(*tasks, return_exceptions=True)
             raise
-        progress_callback(msg="Keywords generation {} chunks completed in {:.2f}s".format(len(docs), timer() - st))
+        timings["keywords"] = timer() - st
+        progress_callback(msg="Keywords generation {} chunks completed in {:.2f}s".format(len(docs), timings["keywords"]))
 
     if task["parser_config"].get("auto_questions", 0):
         st = timer()
@@ -395,7 +388,8 @@ async def build_chunks(task, progress_callback):
                 t.cancel()
             await asyncio.gather(*tasks, return_exceptions=True)
             raise
-        progress_callback(msg="Question generation {} chunks completed in {:.2f}s".format(len(docs), timer() - st))
+        timings["questions"] = timer() - st
+        progress_callback(msg="Question generation {} chunks completed in {:.2f}s".format(len(docs), timings["questions"]))
 
     if task["parser_config"].get("enable_metadata", False) and task["parser_config"].get("metadata"):
         st = timer()
@@ -440,7 +434,8 @@ async def build_chunks(task, progress_callback):
                     doc.meta_fields = json.loads(doc.meta_fields)
                 metadata = update_metadata_to(metadata, doc.meta_fields)
                 DocumentService.update_by_id(task["doc_id"], {"meta_fields": metadata})
-        progress_callback(msg="Question generation {} chunks completed in {:.2f}s".format(len(docs), timer() - st))
+        timings["metadata"] = timer() - st
+        progress_callback(msg="Question generation {} chunks completed in {:.2f}s".format(len(docs), timings["metadata"]))
 
     if task["kb_parser_config"].get("tag_kb_ids", []):
         progress_callback(msg="Start to tag for every chunk ...")
@@ -450,12 +445,10 @@ async def build_chunks(task, progress_callback):
         S = 1000
         st = timer()
         examples = []
-        all_tags = get_tags_from_cache(kb_ids)
-        if not all_tags:
-            all_tags = settings.retriever.all_tags_in_portion(tenant_id, kb_ids, S)
-            set_tags_to_cache(kb_ids, all_tags)
-        else:
-            all_tags = json.loads(all_tags)
+        signature = KnowledgebaseService.get_content_signature(kb_ids)
+        tag_index = await asyncio.to_thread(settings.retriever.tag_index, [r[1] for r in signature] or tenant_id,
+                                            kb_ids, signature, S)
+        all_tags = tag_index.priors
 
         chat_mdl = LLMBundle(task["tenant_id"], LLMType.CHAT, llm_name=task["llm_id"], lang=task["language"])
 
@@ -465,8 +458,8 @@ async def build_chunks(task, progress_callback):
             if task_canceled:
                 progress_callback(-1, msg="Task has been canceled.")
                 return None
-            if settings.retriever.tag_content(tenant_id, kb_ids, d, all_tags, topn_tags=topn_tags, S=S) and len(
-                    d[TAG_FLD]) > 0:
+            if settings.retriever.tag_content(tenant_id, kb_ids, d, all_tags, topn_tags=topn_tags, S=S,
+                                              tag_index=tag_index) and len(d[TAG_FLD]) > 0:
                 examples.append({"content": d["content_with_weight"], TAG_FLD: d[TAG_FLD]})
             else:
                 docs_to_tag.append(d)
@@ -505,7 +498,8 @@ async def build_chunks(task, progress_callback):
                 t.cancel()
             await asyncio.gather(*tasks, return_exceptions=True)
             raise
-        progress_callback(msg="Tagging {} chunks completed in {:.2f}s".format(len(docs), timer() - st))
+        timings["tagging"] = timer() - st
+        progress_callback(msg="Tagging {} chunks completed in {:.2f}s".format(len(docs), timings["tagging"]))
 
     return docs
 
@@ -901,6 +895,13 @@ async def insert_es(task_id, task_tenant_id, task_dataset_id, chunks, progress_c
     return True
 
 
+def format_stage_timings(timings: dict, tokenize_stats=None) -> str:
+    parts = ["{} {:.2f}s".format(name, sec) for name, sec in timings.items()]
+    if tokenize_stats is not None and tokenize_stats.calls:
+        parts.append(str(tokenize_stats))
+    return "Stage timings: " + ", ".join(parts)
+
+
 @timeout(60 * 60 * 3, 1)
 async def do_handle_task(task):
     task_type = task.get("task_type", "")
@@ -926,6 +927,8 @@ async def do_handle_task(task):
     task_document_name = task["name"]
     task_parser_config = task["parser_config"]
     task_start_ts = timer()
+    stage_timings = {}
+    tokenize_stats = None
     toc_thread = None
     executor = concurrent.futures.ThreadPoolExecutor()
 
@@ -1068,7 +1071,8 @@ async def do_handle_task(task):
     else:
         # Standard chunking methods
         start_ts = timer()
-        chunks = await build_chunks(task, progress_callback)
+        with rag_tokenizer.track_stats() as tokenize_stats:
+            chunks = await build_chunks(task, progress_callback, stage_timings)
         logging.info("Build document {}: {:.2f}s".format(task_document_name, timer() - start_ts))
         if not chunks:
             progress_callback(1., msg=f"No chunk built from {task_document_name}")
@@ -1083,7 +1087,8 @@ async def do_handle_task(task):
             logging.exception(error_message)
             token_count = 0
             raise
-        progress_message = "Embedding chunks ({:.2f}s)".format(timer() - start_ts)
+        stage_timings["embedding"] = timer() - start_ts
+        progress_message = "Embedding chunks ({:.2f}s)".format(stage_timings["embedding"])
         logging.info(progress_message)
         progress_callback(msg=progress_message)
         if task["parser_id"].lower() == "naive" and task["parser_config"].get("toc_extraction", False):
@@ -1110,7 +1115,8 @@ async def do_handle_task(task):
 
         DocumentService.increment_chunk_num(task_doc_id, task_dataset_id, token_count, chunk_count, 0)
 
-        progress_callback(msg="Indexing done ({:.2f}s).".format(timer() - start_ts))
+        stage_timings["indexing"] = timer() - start_ts
+        progress_callback(msg="Indexing done ({:.2f}s).".format(stage_timings["indexing"]))
 
         if toc_thread:
             d = toc_thread.result()
@@ -1124,6 +1130,7 @@ async def do_handle_task(task):
             return
 
         task_time_cost = timer() - task_start_ts
+        progress_callback(msg=format_stage_timings(stage_timings, tokenize_stats))
         progress_callback(prog=1.0, msg="Task done ({:.2f}s)".format(task_time_cost))
         logging.info(
             "Chunk doc({}), page({}-{}), chunks({}), token({}), elapsed:{:.2f}".format(
@@ -20,15 +20,29 @@ import logging
 from functools import partial
 from io import BytesIO
 
+import xxhash
 from PIL import Image
 
 test_image_base64 = "iVBORw0KGgoAAAANSUhEUgAAAGQAAABkCAIAAAD/gAIDAAAA6ElEQVR4nO3QwQ3AIBDAsIP9d25XIC+EZE8QZc18w5l9O+AlZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBWYFZgVmBT+IYAHHLHkdEgAAAABJRU5ErkJggg=="
 test_image = base64.b64decode(test_image_base64)
 
 
+def image_to_jpeg(img) -> bytes | None:
+    """JPEG bytes of a PIL image (bytes pass through), or None if it can't be saved."""
+    if isinstance(img, bytes):
+        return img
+    if img.mode in ("RGBA", "P"):
+        img = img.convert("RGB")
+    with BytesIO() as buf:
+        try:
+            img.save(buf, format="JPEG")
+        except OSError as e:
+            logging.warning(f"Saving image exception: {e}")
+            return None
+        return buf.getvalue()
+
+
 async def image2id(d: dict, storage_put_func: partial, objname: str, bucket: str = "imagetemps"):
-    import logging
-    from io import BytesIO
     from rag.svr.task_executor import minio_limiter
 
     if "image" not in d:
@@ -37,28 +51,7 @@ async def image2id(d: dict, storage_put_func: partial, objname: str, bucket: str
         del d["image"]
         return
 
-    def encode_image():
-        with BytesIO() as buf:
-            img = d["image"]
-
-            if isinstance(img, bytes):
-                buf.write(img)
-                buf.seek(0)
-                return buf.getvalue()
-
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-
-            try:
-                img.save(buf, format="JPEG")
-            except OSError as e:
-                logging.warning(f"Saving image exception: {e}")
-                return None
-
-            buf.seek(0)
-            return buf.getvalue()
-
-    jpeg_binary = await asyncio.to_thread(encode_image)
+    jpeg_binary = await asyncio.to_thread(image_to_jpeg, d["image"])
     if jpeg_binary is None:
         del d["image"]
         return
@@ -75,6 +68,106 @@ async def image2id(d: dict, storage_put_func: partial, objname: str, bucket: str
     del d["image"]
 
 
+class ByteBudget:
+    """Bounds the bytes of encoded images waiting on storage; a single image larger than the limit still passes alone."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self, n: int):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.used == 0 or self.used + n <= self.limit)
+            self.used += n
+
+    async def release(self, n: int):
+        async with self._cond:
+            self.used -= n
+            self._cond.notify_all()
+
+
+async def upload_images(docs: list[dict], storage_put_func: partial, bucket: str, workers: int, max_bytes: int,
+                        retries: int = 3, put_timeout: float = 60):
+    """
+    Upload the images of `docs` to `bucket` under each doc's id and replace them with `img_id`, in place.
+
+    At most `workers` images are encoded or stored at once, and at most about
+    `max_bytes` of encoded images wait on storage. Failed puts are retried with
+    backoff; a put slower than `put_timeout` is logged and waited on, not retried. A doc whose id and image bytes equal an earlier one's reuses that
+    upload. Docs keep their order; the first error cancels the remaining uploads.
+    """
+    from rag.svr.task_executor import minio_limiter
+
+    budget = ByteBudget(max_bytes)
+    stored: dict[tuple[str, str], asyncio.Future] = {}
+    queue = asyncio.Queue()
+    for d in docs:
+        if "image" in d:
+            queue.put_nowait(d)
+
+    async def put(objname: str, binary: bytes):
+        for attempt in range(retries + 1):
+            try:
+                async with minio_limiter:
+                    call = asyncio.ensure_future(
+                        asyncio.to_thread(storage_put_func, bucket=bucket, fnm=objname, binary=binary))
+                    try:
+                        return await asyncio.wait_for(asyncio.shield(call), put_timeout)
+                    except asyncio.TimeoutError:
+                        # The thread cannot be cancelled: wait for it so the slot and its bytes stay
+                        # held and a retry never overlaps a put of the same object still in flight.
+                        logging.warning(f"Storing image {bucket}/{objname} is taking over {put_timeout}s, waiting on it")
+                        return await call
+            except Exception as e:
+                if attempt == retries:
+                    raise
+                logging.warning(f"Storing image {bucket}/{objname} failed ({e}), retry {attempt + 1}/{retries}")
+                await asyncio.sleep(min(0.5 * 2 ** attempt, 8))
+
+    async def upload(d: dict):
+        img = d.pop("image")
+        if not img:
+            return
+        jpeg_binary = await asyncio.to_thread(image_to_jpeg, img)
+        if not isinstance(img, bytes):
+            img.close()
+        if jpeg_binary is None:
+            return
+
+        key = (d["id"], xxhash.xxh64(jpeg_binary).hexdigest())
+        done = stored.get(key)
+        if done is None:
+            stored[key] = done = asyncio.get_running_loop().create_future()
+            try:
+                await budget.acquire(len(jpeg_binary))
+                try:
+                    await put(d["id"], jpeg_binary)
+                finally:
+                    await budget.release(len(jpeg_binary))
+            except BaseException as e:
+                done.set_exception(e)
+                done.exception()
+                raise
+            done.set_result(None)
+        else:
+            await done
+        d["img_id"] = f"{bucket}-{d['id']}"
+
+    async def worker():
+        while not queue.empty():
+            await upload(queue.get_nowait())
+
+    tasks = [asyncio.create_task(worker()) for _ in range(max(1, min(workers, queue.qsize())))]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
 def id2image(image_id: str | None, storage_get_func: partial):
     if not image_id:
         return
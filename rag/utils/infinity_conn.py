@@ -23,7 +23,7 @@ from common.decorator import singleton
 import pandas as pd
 from common.constants import PAGERANK_FLD, TAG_FLD
 from common.doc_store.doc_store_base import MatchExpr, MatchTextExpr, MatchDenseExpr, FusionExpr, OrderByExpr
-from common.doc_store.infinity_conn_base import InfinityConnectionBase
+from common.doc_store.infinity_conn_base import InfinityConnectionBase, merge_top_k
 
 
 @singleton
@@ -106,10 +106,7 @@ class InfinityConnection(InfinityConnectionBase):
         if isinstance(index_names, str):
             index_names = index_names.split(",")
         assert isinstance(index_names, list) and len(index_names) > 0
-        inf_conn = self.connPool.get_conn()
-        db_instance = inf_conn.get_database(self.dbName)
         df_list = list()
-        table_list = list()
         output = select_fields.copy()
         output = self.convert_select_fields(output)
         if agg_fields is None:
@@ -147,13 +144,13 @@ class InfinityConnection(InfinityConnectionBase):
             table_found = False
             for indexName in index_names:
                 for kb_id in knowledgebase_ids:
-                    table_name = f"{indexName}_{kb_id}"
                     try:
-                        filter_cond = self.equivalent_condition_to_str(condition, db_instance.get_table(table_name))
+                        filter_cond = self.table_scatter.run(f"{indexName}_{kb_id}", lambda table_instance, _: self.equivalent_condition_to_str(condition, table_instance))
+                    except Exception:
+                        continue
+                    if filter_cond is not None:
                         table_found = True
                         break
-                    except Exception:
-                        pass
                 if table_found:
                     break
             if not table_found:
@@ -215,55 +212,56 @@ class InfinityConnection(InfinityConnectionBase):
                 else:
                     order_by_expr_list.append((order_field[0], SortType.Desc))
 
+        def query_table(table_instance, table_name):
+            builder = table_instance.output(output)
+            if len(match_expressions) > 0:
+                for matchExpr in match_expressions:
+                    if isinstance(matchExpr, MatchTextExpr):
+                        fields = ",".join(matchExpr.fields)
+                        builder = builder.match_text(
+                            fields,
+                            matchExpr.matching_text,
+                            matchExpr.topn,
+                            matchExpr.extra_options.copy(),
+                        )
+                    elif isinstance(matchExpr, MatchDenseExpr):
+                        builder = builder.match_dense(
+                            matchExpr.vector_column_name,
+                            matchExpr.embedding_data,
+                            matchExpr.embedding_data_type,
+                            matchExpr.distance_type,
+                            matchExpr.topn,
+                            matchExpr.extra_options.copy(),
+                        )
+                    elif isinstance(matchExpr, FusionExpr):
+                        builder = builder.fusion(matchExpr.method, matchExpr.topn, matchExpr.fusion_params)
+            else:
+                if filter_cond and len(filter_cond) > 0:
+                    builder.filter(filter_cond)
+            if order_by.fields:
+                builder.sort(order_by_expr_list)
+            builder.offset(offset).limit(limit)
+            kb_res, extra_result = builder.option({"total_hits_count": True}).to_df()
+            self.logger.debug(f"INFINITY search table: {str(table_name)}, result: {str(kb_res)}")
+            return kb_res, extra_result
+
         total_hits_count = 0
         # Scatter search tables and gather the results
-        for indexName in index_names:
-            for knowledgebaseId in knowledgebase_ids:
-                table_name = f"{indexName}_{knowledgebaseId}"
-                try:
-                    table_instance = db_instance.get_table(table_name)
-                except Exception:
-                    continue
-                table_list.append(table_name)
-                builder = table_instance.output(output)
-                if len(match_expressions) > 0:
-                    for matchExpr in match_expressions:
-                        if isinstance(matchExpr, MatchTextExpr):
-                            fields = ",".join(matchExpr.fields)
-                            builder = builder.match_text(
-                                fields,
-                                matchExpr.matching_text,
-                                matchExpr.topn,
-                                matchExpr.extra_options.copy(),
-                            )
-                        elif isinstance(matchExpr, MatchDenseExpr):
-                            builder = builder.match_dense(
-                                matchExpr.vector_column_name,
-                                matchExpr.embedding_data,
-                                matchExpr.embedding_data_type,
-                                matchExpr.distance_type,
-                                matchExpr.topn,
-                                matchExpr.extra_options.copy(),
-                            )
-                        elif isinstance(matchExpr, FusionExpr):
-                            builder = builder.fusion(matchExpr.method, matchExpr.topn, matchExpr.fusion_params)
-                else:
-                    if filter_cond and len(filter_cond) > 0:
-                        builder.filter(filter_cond)
-                if order_by.fields:
-                    builder.sort(order_by_expr_list)
-                builder.offset(offset).limit(limit)
-                kb_res, extra_result = builder.option({"total_hits_count": True}).to_df()
-                if extra_result:
-                    total_hits_count += int(extra_result["total_hits_count"])
-                self.logger.debug(f"INFINITY search table: {str(table_name)}, result: {str(kb_res)}")
-                df_list.append(kb_res)
-        self.connPool.release_conn(inf_conn)
+        table_names = [f"{indexName}_{knowledgebaseId}" for indexName in index_names for knowledgebaseId in knowledgebase_ids]
+        for kb_res, extra_result in filter(None, self.table_scatter.map(table_names, query_table)):
+            if extra_result:
+                total_hits_count += int(extra_result["total_hits_count"])
+            df_list.append(kb_res)
         res = self.concat_dataframes(df_list, output)
         if match_expressions:
-            res["_score"] = res[score_column] + res[PAGERANK_FLD]
-            res = res.sort_values(by="_score", ascending=False).reset_index(drop=True)
-            res = res.head(limit)
+            df_list = [df for df in df_list if not df.empty]
+            if df_list:
+                scores = [(df[score_column] + df[PAGERANK_FLD]).to_numpy(dtype=float) for df in df_list]
+                positions, top_scores = merge_top_k(df_list, scores, limit)
+                res = res.iloc[positions].reset_index(drop=True)
+                res["_score"] = top_scores
+            else:
+                res["_score"] = res[score_column] + res[PAGERANK_FLD]
         self.logger.debug(f"INFINITY search final result: {str(res)}")
         return res, total_hits_count
 
@@ -518,7 +516,34 @@ class InfinityConnection(InfinityConnectionBase):
     Helper functions for search result
     """
 
+    def _field_decoder(self, field_name: str):
+        k = field_name.lower()
+        if self.field_keyword(k):
+            return lambda v: [kwd for kwd in v.split("###") if kwd]
+        if re.search(r"_feas$", k):
+            return lambda v: json.loads(v) if v else {}
+        if k == "position_int":
+            def to_position_int(v):
+                if v:
+                    arr = [int(hex_val, 16) for hex_val in v.split("_")]
+                    v = [arr[i: i + 5] for i in range(0, len(arr), 5)]
+                else:
+                    v = []
+                return v
+
+            return to_position_int
+        if k in ["page_num_int", "top_int"]:
+            return lambda v: [int(hex_val, 16) for hex_val in v.split("_")] if v else []
+        return None
+
     def get_fields(self, res: tuple[pd.DataFrame, int] | pd.DataFrame, fields: list[str]) -> dict[str, dict]:
+        """
+        Decode the requested fields of a search result into {chunk id: {field: value}}.
+
+        Works column by column on plain lists: only the requested columns are pulled out of
+        the frame and decoded, duplicate ids keep their first row, and no intermediate
+        DataFrame is built.
+        """
         if isinstance(res, tuple):
             res = res[0]
         if not fields:
@@ -526,18 +551,19 @@ class InfinityConnection(InfinityConnectionBase):
         fields_all = fields.copy()
         fields_all.append("id")
         fields_all = set(fields_all)
+        # Alias columns under their doc-store field names; callers may read them from `res` afterwards.
         if "docnm" in res.columns:
             for field in ["docnm_kwd", "title_tks", "title_sm_tks"]:
                 if field in fields_all:
                     res[field] = res["docnm"]
         if "important_keywords" in res.columns:
             if "important_kwd" in fields_all:
-                res["important_kwd"] = res["important_keywords"].apply(lambda v: v.split())
+                res["important_kwd"] = [v.split() for v in res["important_keywords"].tolist()]
             if "important_tks" in fields_all:
                 res["important_tks"] = res["important_keywords"]
         if "questions" in res.columns:
             if "question_kwd" in fields_all:
-                res["question_kwd"] = res["questions"].apply(lambda v: v.splitlines())
+                res["question_kwd"] = [v.splitlines() for v in res["questions"].tolist()]
             if "question_tks" in fields_all:
                 res["question_tks"] = res["questions"]
         if "content" in res.columns:
@@ -553,34 +579,29 @@ class InfinityConnection(InfinityConnectionBase):
         matched_columns = {column_map[col.lower()]: col for col in fields_all if col.lower() in column_map}
         none_columns = [col for col in fields_all if col.lower() not in column_map]
 
-        res2 = res[matched_columns.keys()]
-        res2 = res2.rename(columns=matched_columns)
-        res2.drop_duplicates(subset=["id"], inplace=True)
+        ids = res[column_map["id"]].tolist()
+        first_rows = {}
+        for i, chunk_id in enumerate(ids):
+            first_rows.setdefault(chunk_id, i)
+        if not first_rows:
+            return {}
+        rows = list(first_rows.values()) if len(first_rows) < len(ids) else None
 
-        for column in list(res2.columns):
-            k = column.lower()
-            if self.field_keyword(k):
-                res2[column] = res2[column].apply(lambda v: [kwd for kwd in v.split("###") if kwd])
-            elif re.search(r"_feas$", k):
-                res2[column] = res2[column].apply(lambda v: json.loads(v) if v else {})
-            elif k == "position_int":
-                def to_position_int(v):
-                    if v:
-                        arr = [int(hex_val, 16) for hex_val in v.split("_")]
-                        v = [arr[i: i + 5] for i in range(0, len(arr), 5)]
-                    else:
-                        v = []
-                    return v
+        columns = []
+        for src, dst in matched_columns.items():
+            if dst == "id" or dst in ["docnm", "important_keywords", "questions", "content", "authors"]:
+                continue
+            values = res[src].tolist()
+            if rows is not None:
+                values = [values[i] for i in rows]
+            decoder = self._field_decoder(dst)
+            if decoder is not None:
+                values = [decoder(v) for v in values]
+            columns.append((dst, values))
+        columns.extend((col, None) for col in none_columns if col != "id")
 
-                res2[column] = res2[column].apply(to_position_int)
-            elif k in ["page_num_int", "top_int"]:
-                res2[column] = res2[column].apply(lambda v: [int(hex_val, 16) for hex_val in v.split("_")] if v else [])
-            else:
-                pass
-        for column in ["docnm", "important_keywords", "questions", "content", "authors"]:
-            if column in res2:
-                del res2[column]
-        for column in none_columns:
-            res2[column] = None
-
-        return res2.set_index("id").to_dict(orient="index")
+        unique_ids = ids if rows is None else [ids[i] for i in rows]
+        return {
+            chunk_id: {name: (values[i] if values is not None else None) for name, values in columns}
+            for i, chunk_id in enumerate(unique_ids)
+        }
@@ -26,6 +26,7 @@ from opensearchpy import UpdateByQuery, Q, Search, Index
 from opensearchpy import ConnectionTimeout
 from common.decorator import singleton
 from common.file_utils import get_project_base_directory
+from common.string_utils import KeywordHighlighter
 from common.doc_store.doc_store_base import DocStoreConnection, MatchExpr, OrderByExpr, MatchTextExpr, MatchDenseExpr, \
     FusionExpr
 from rag.nlp import is_english, rag_tokenizer
@@ -492,6 +493,7 @@ class OSConnection(DocStoreConnection):
 
     def get_highlight(self, res, keywords: list[str], fieldnm: str):
         ans = {}
+        highlighter = KeywordHighlighter(keywords)
         for d in res["hits"]["hits"]:
             hlts = d.get("highlight")
             if not hlts:
@@ -501,16 +503,7 @@ class OSConnection(DocStoreConnection):
                 ans[d["_id"]] = txt
                 continue
 
-            txt = d["_source"][fieldnm]
-            txt = re.sub(r"[\r\n]", " ", txt, flags=re.IGNORECASE | re.MULTILINE)
-            txts = []
-            for t in re.split(r"[.?!;\n]", txt):
-                for w in keywords:
-                    t = re.sub(r"(^|[ .?/'\"\(\)!,:;-])(%s)([ .?/'\"\(\)!,:;-])" % re.escape(w), r"\1<em>\2</em>\3", t,
-                               flags=re.IGNORECASE | re.MULTILINE)
-                if not re.search(r"<em>[^<>]+</em>", t, flags=re.IGNORECASE | re.MULTILINE):
-                    continue
-                txts.append(t)
+            txts = highlighter.highlight(d["_source"][fieldnm])
             ans[d["_id"]] = "...".join(txts) if txts else "...".join([a for a in list(hlts.items())[0][1]])
 
         return ans
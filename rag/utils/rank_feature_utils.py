@@ -0,0 +1,101 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+"""
+Sparse tag-feature decoding and scoring for retrieval rank features.
+
+Tag features come back from the doc stores either as dicts or as their
+string form (JSON, or the Python repr produced by `str(dict)`). Each distinct
+string is decoded once into its tags and a weight array, and a batch of chunks
+is scored against the query tags with vectorized sums over all their tags.
+There is no shared tag vocabulary, so memory and per-query cost depend on the
+candidates only, not on every tag seen by the process.
+"""
+
+import ast
+import json
+import logging
+from functools import lru_cache
+
+import numpy as np
+
+TAG_FEATURE_CACHE_SIZE = 65536
+
+_EMPTY = ((), np.empty(0, dtype=np.float64))
+
+
+def _to_sparse(features: dict) -> tuple[tuple, np.ndarray]:
+    if not features:
+        return _EMPTY
+    values = np.fromiter((float(v) for v in features.values()), dtype=np.float64, count=len(features))
+    return tuple(features.keys()), values
+
+
+@lru_cache(maxsize=TAG_FEATURE_CACHE_SIZE)
+def _decode_str(raw: str) -> tuple[tuple, np.ndarray]:
+    try:
+        features = json.loads(raw)
+    except ValueError:
+        try:
+            features = ast.literal_eval(raw)
+        except (ValueError, SyntaxError):
+            logging.warning(f"Can't decode tag features: {raw[:128]}")
+            return _EMPTY
+    if not isinstance(features, dict):
+        return _EMPTY
+    return _to_sparse(features)
+
+
+def decode_tag_features(raw) -> tuple[tuple, np.ndarray]:
+    """Decode a chunk's tag features into (tags, weights)."""
+    if not raw:
+        return _EMPTY
+    if isinstance(raw, dict):
+        return _to_sparse(raw)
+    return _decode_str(str(raw))
+
+
+def tag_feature_scores(query_features: dict, raw_features: list, skip_query_norm: tuple = ()) -> np.ndarray:
+    """Cosine between the query tags and each chunk's tags, for all chunks at once.
+
+    Args:
+        query_features: Tag -> weight of the query.
+        raw_features: Tag features of each chunk, as stored (dict or string); empty means no tags.
+        skip_query_norm: Query keys left out of the query norm, e.g. the pagerank field.
+
+    Returns:
+        Array of scores, 0 for chunks without tags.
+    """
+    n = len(raw_features)
+    if n == 0:
+        return np.zeros(0, dtype=np.float64)
+    decoded = [decode_tag_features(r) for r in raw_features]
+    lengths = np.fromiter((len(d[0]) for d in decoded), dtype=np.int64, count=n)
+    if not lengths.any():
+        return np.zeros(n, dtype=np.float64)
+    rows = np.repeat(np.arange(n), lengths)
+    vals = np.concatenate([d[1] for d in decoded])
+    total = int(lengths.sum())
+    query = np.fromiter((query_features.get(t, 0) for d in decoded for t in d[0]), dtype=np.float64, count=total)
+    q_denor = np.sqrt(np.sum([s * s for t, s in query_features.items() if t not in skip_query_norm]))
+
+    nor = np.bincount(rows, weights=vals * query, minlength=n)
+    denor = np.bincount(rows, weights=vals * vals, minlength=n)
+    scores = np.zeros(n, dtype=np.float64)
+    mask = denor != 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores[mask] = nor[mask] / np.sqrt(denor[mask]) / q_denor
+    return scores
@@ -19,7 +19,7 @@ Utility functions for Raptor processing decisions.
 """
 
 import logging
-from typing import Optional
+from typing import Callable, Optional
 
 # File extensions for structured data types
 EXCEL_EXTENSIONS = {".xls", ".xlsx", ".xlsm", ".xlsb"}
@@ -142,3 +142,96 @@ def get_skip_reason(
             return f"Tabular PDF (parser={parser_id}) - Raptor auto-disabled"
 
     return ""
+
+
+def gmm_bic(embeddings, n_components: int, random_state: int) -> float:
+    """
+    Fit a Gaussian mixture and return its BIC score.
+
+    Kept at module level with lazy imports so it can be shipped to a
+    process pool without pulling in the rest of the RAPTOR stack.
+
+    Args:
+        embeddings: 2-D array of (reduced) embeddings
+        n_components: Number of mixture components
+        random_state: Seed for the mixture model
+
+    Returns:
+        BIC of the fitted model (lower is better)
+    """
+    from sklearn.mixture import GaussianMixture
+
+    gm = GaussianMixture(n_components=n_components, random_state=random_state)
+    gm.fit(embeddings)
+    return float(gm.bic(embeddings))
+
+
+def search_optimal_clusters(
+        candidates,
+        evaluate: Callable[[list[int]], list[float]],
+        batch_size: int = 1,
+        exhaustive_limit: int = 16,
+        patience: int = 2,
+        on_batch: Optional[Callable[[], None]] = None,
+) -> int:
+    """
+    Find the cluster count with the lowest BIC without fitting every candidate.
+
+    Small candidate sets are scanned exhaustively. Larger ones are searched
+    coarse-to-fine: a strided sweep in ascending order that stops once
+    `patience` consecutive batches fail to improve the best score, followed
+    by a full scan of the neighbourhood around the coarse optimum.
+
+    Args:
+        candidates: Cluster counts to consider
+        evaluate: Scores a batch of cluster counts, returning one BIC per count
+        batch_size: Number of counts handed to `evaluate` at once
+        exhaustive_limit: Scan every candidate when there are at most this many
+        patience: Non-improving coarse batches tolerated before stopping
+        on_batch: Called before each batch, e.g. to check for cancellation
+
+    Returns:
+        The candidate with the lowest BIC (smallest count on ties)
+    """
+    candidates = sorted(set(int(n) for n in candidates))
+    if not candidates:
+        raise ValueError("No cluster candidates to search")
+    batch_size = max(1, batch_size)
+    scores = {}
+
+    def run(ns):
+        ns = [n for n in ns if n not in scores]
+        for i in range(0, len(ns), batch_size):
+            if on_batch:
+                on_batch()
+            batch = ns[i:i + batch_size]
+            for n, score in zip(batch, evaluate(batch)):
+                scores[n] = score
+
+    def best():
+        return min(scores, key=lambda n: (scores[n], n))
+
+    if len(candidates) <= exhaustive_limit:
+        run(candidates)
+        return best()
+
+    step = max(2, int(len(candidates) ** 0.5))
+    coarse = candidates[::step]
+    if coarse[-1] != candidates[-1]:
+        coarse.append(candidates[-1])
+
+    best_score, stale = float("inf"), 0
+    for i in range(0, len(coarse), batch_size):
+        batch = coarse[i:i + batch_size]
+        run(batch)
+        batch_best = min(scores[n] for n in batch)
+        if batch_best < best_score:
+            best_score, stale = batch_best, 0
+        else:
+            stale += 1
+            if stale >= patience:
+                break
+
+    idx = candidates.index(best())
+    run(candidates[max(0, idx - step + 1): idx + step])
+    return best()
@@ -0,0 +1,91 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+"""
+In-memory index over the chunks of tag knowledge bases.
+
+Holds the tag vocabulary with its priors and an inverted index from tokens
+to tag-KB chunks, so chunk and question tags can be scored locally instead
+of running one doc-store aggregation per chunk or question. Scores follow
+the formula of the aggregation based `Dealer.tag_content` / `tag_query`.
+"""
+
+from collections import Counter, defaultdict
+from typing import Iterable
+
+TAG_INDEX_TOKEN_FIELDS = ["title_tks", "important_tks", "question_tks", "content_ltks", "content_sm_ltks"]
+
+
+class TagIndex:
+    def __init__(self, chunks: Iterable[dict], S: int = 1000):
+        """
+        Args:
+            chunks: Tag-KB chunks with a `tag_kwd` list and the TAG_INDEX_TOKEN_FIELDS token strings.
+            S: Smoothing constant of the tag priors.
+        """
+        self.S = S
+        self._postings = defaultdict(list)
+        self._chunk_tags = []
+        tag_counts = Counter()
+        for ck in chunks:
+            tags = ck.get("tag_kwd") or []
+            if isinstance(tags, str):
+                tags = [tags]
+            tags = tuple(dict.fromkeys(t for t in tags if t))
+            if not tags:
+                continue
+            idx = len(self._chunk_tags)
+            self._chunk_tags.append(tags)
+            tag_counts.update(tags)
+            for tk in set(self.chunk_tokens(ck)):
+                self._postings[tk].append(idx)
+        total = sum(tag_counts.values())
+        self.priors = {t: (c + 1) / (total + S) for t, c in tag_counts.items()}
+
+    @staticmethod
+    def chunk_tokens(ck: dict) -> list[str]:
+        tokens = []
+        for fld in TAG_INDEX_TOKEN_FIELDS:
+            v = ck.get(fld)
+            if isinstance(v, list):
+                v = " ".join(v)
+            if v:
+                tokens.extend(v.lower().split())
+        return tokens
+
+    def __len__(self):
+        return len(self._chunk_tags)
+
+    def aggregate(self, tokens: Iterable[str], min_should_match: int = 1) -> list[tuple[str, int]]:
+        """Count the tags of the chunks sharing at least `min_should_match` distinct tokens with the input."""
+        hits = Counter()
+        for tk in set(t.lower() for t in tokens if t):
+            for idx in self._postings.get(tk, ()):
+                hits[idx] += 1
+        aggs = Counter()
+        for idx, n in hits.items():
+            if n >= min_should_match:
+                aggs.update(self._chunk_tags[idx])
+        return aggs.most_common()
+
+    def score(self, tokens: Iterable[str], topn_tags: int = 3, min_should_match: int = 1) -> list[tuple[str, int]]:
+        """Top tags for the input tokens, as (tag, score) pairs sorted by score."""
+        aggs = self.aggregate(tokens, min_should_match)
+        if not aggs:
+            return []
+        cnt = sum(c for _, c in aggs)
+        tag_fea = [(a, round(0.1 * (c + 1) / (cnt + self.S) / max(1e-6, self.priors.get(a, 0.0001)))) for a, c in aggs]
+        return sorted(tag_fea, key=lambda x: x[1] * -1)[:topn_tags]
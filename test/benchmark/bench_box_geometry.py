@@ -0,0 +1,156 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+"""
+Box geometry passes of the PDF parser, with and without the BoxTable index.
+
+Runs the char-to-box matching of OCR, the table row tagging, layouts_cleanup and
+the text merge on a box dump, checks that both ways give the same result, and
+prints the timings. A dump is a JSON object with the parser's "boxes" (as after
+`_layouts_rec`, page-cumulative tops), the pdfplumber "chars" and the
+"mean_height" per page, e.g. recorded with
+`json.dump({"boxes": p.boxes, "chars": chars, "mean_height": p.mean_height}, f, default=float)`,
+and optionally "layouts" to clean up. Without --dump a synthetic document is generated.
+
+    python test/benchmark/bench_box_geometry.py --dump boxes.json
+    python test/benchmark/bench_box_geometry.py --pages 50
+"""
+
+import argparse
+import copy
+import json
+import random
+import time
+
+from deepdoc.parser.pdf_parser import RAGFlowPdfParser
+from deepdoc.vision import BoxTable, Recognizer
+
+
+def synthetic(pages, seed=0):
+    rnd = random.Random(seed)
+    boxes, chars, layouts = [], [], []
+    for pg in range(1, pages + 1):
+        base = (pg - 1) * 842
+        for line in range(60):
+            top = base + 40 + line * 12.5 + rnd.uniform(-0.5, 0.5)
+            x = 50.0
+            for w in range(rnd.randint(2, 6)):
+                width = rnd.uniform(30, 90)
+                text = "".join(rnd.choice("abcdefgh ,.") for _ in range(int(width // 6)))
+                boxes.append({"x0": x, "x1": x + width, "top": top, "bottom": top + 10, "text": text, "page_number": pg,
+                              "layoutno": f"text-{line // 10}", "layout_type": "table" if line >= 50 else "text"})
+                for i, ch in enumerate(text):
+                    chars.append({"x0": x + i * 6, "x1": x + i * 6 + 5, "top": top + 1, "bottom": top + 9, "text": ch, "page_number": pg})
+                x += width + rnd.uniform(2, 8)
+        for blk in range(6):
+            top = base + 40 + blk * 125
+            layouts.append({"type": "text", "score": 0, "x0": 45.0, "x1": 560.0, "top": top, "bottom": top + 120})
+            layouts.append({"type": "text", "score": 0, "x0": 48.0, "x1": 555.0, "top": top + 2, "bottom": top + 118})
+    return {"boxes": boxes, "chars": chars, "layouts": layouts, "mean_height": [10] * pages}
+
+
+class ScanTable:
+    """Stand-in for BoxTable that yields every box, i.e. the full scans of before."""
+
+    def __init__(self, boxes):
+        self.n = len(boxes)
+
+    def overlapping(self, box, start=0, end=None):
+        return list(range(start, self.n if end is None else end))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    res = fn()
+    return res, time.perf_counter() - start
+
+
+def compare(name, run, *args):
+    """Time run(table_cls, *args) with full scans and with BoxTable; building the table is timed too."""
+    res_a, ta = timed(lambda: run(ScanTable, *args))
+    res_b, tb = timed(lambda: run(BoxTable, *args))
+    assert res_a == res_b, f"{name}: results differ"
+    print(f"{name:<22}{ta * 1000:>10.1f}ms scan{tb * 1000:>10.1f}ms indexed{ta / max(tb, 1e-9):>8.1f}x")
+
+
+def match_chars(table_cls, boxes, chars):
+    table = table_cls(boxes)
+    return [Recognizer.find_overlapped(c, boxes, table=table) for c in chars]
+
+
+def tag_rows(table_cls, boxes, rows):
+    table = table_cls(rows)
+    return [Recognizer.find_overlapped_with_threshold(b, rows, thr=0.3, table=table) for b in boxes]
+
+
+def cleanup(table_cls, boxes, layouts):
+    return [id(lt) for lt in Recognizer.layouts_cleanup(boxes, list(layouts), 5, 0.5, table=table_cls(boxes))]
+
+
+def legacy_text_merge(parser):
+    bxs = parser.boxes
+    i = 0
+    while i < len(bxs) - 1:
+        b, b_ = bxs[i], bxs[i + 1]
+        if b["page_number"] != b_["page_number"] or b.get("col_id") != b_.get("col_id") \
+                or b.get("layoutno", "0") != b_.get("layoutno", "1") or b.get("layout_type", "") in ["table", "figure", "equation"]:
+            i += 1
+            continue
+        if abs(parser._y_dis(b, b_)) < parser.mean_height[b["page_number"] - 1] / 3:
+            b["x1"] = b_["x1"]
+            b["top"] = (b["top"] + b_["top"]) / 2
+            b["bottom"] = (b["bottom"] + b_["bottom"]) / 2
+            b["text"] += b_["text"]
+            bxs.pop(i + 1)
+            continue
+        i += 1
+    return bxs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dump", help="JSON box dump; a synthetic document is used if omitted")
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.dump:
+        with open(args.dump) as f:
+            dump = json.load(f)
+    else:
+        dump = synthetic(args.pages)
+    boxes = Recognizer.sort_Y_firstly(dump["boxes"], 0)
+    chars = dump.get("chars", [])
+    layouts = dump.get("layouts") or [dict(b, type=b.get("layout_type", ""), score=0) for b in boxes[::20]]
+    rows = [b for b in boxes if b.get("layout_type") == "table"]
+    print(f"boxes={len(boxes)} chars={len(chars)} layouts={len(layouts)} table boxes={len(rows)}")
+
+    compare("find_overlapped", match_chars, boxes, chars)
+    compare("overlapped_threshold", tag_rows, boxes, rows)
+    compare("layouts_cleanup", cleanup, boxes, layouts)
+
+    p = RAGFlowPdfParser.__new__(RAGFlowPdfParser)
+    p.mean_height = dump["mean_height"]
+    p.boxes = copy.deepcopy(boxes)
+    merge_input = p._assign_column(p.boxes)
+    p.boxes = copy.deepcopy(merge_input)
+    legacy, ta = timed(lambda: legacy_text_merge(p))
+    p.boxes = copy.deepcopy(merge_input)
+    _, tb = timed(p._text_merge)
+    assert p.boxes == legacy, "_text_merge: results differ"
+    print(f"{'_text_merge':<22}{ta * 1000:>10.1f}ms pop{tb * 1000:>10.1f}ms stream{ta / max(tb, 1e-9):>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
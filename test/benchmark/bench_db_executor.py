@@ -0,0 +1,130 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+"""
+Load test for the async DB facade on a local SQLite file.
+
+Simulates concurrent async request handlers, each doing a few slow queries
+(a SQLite `sleep_ms` function stands in for a slow MySQL round trip) between
+awaits, and a heartbeat task measuring event-loop lag. Runs the handlers
+once calling peewee inline on the loop and once through DBExecutor.
+
+    python test/benchmark/bench_db_executor.py --requests 200 --concurrency 50 --query-ms 5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from peewee import CharField, IntegerField, Model, SqliteDatabase
+
+from api.db.db_executor import DBExecutor
+
+
+def make_db(path):
+    db = SqliteDatabase(path, pragmas={"journal_mode": "wal"}, check_same_thread=False)
+
+    @db.func("sleep_ms")
+    def sleep_ms(ms):
+        time.sleep(ms / 1000.0)
+        return ms
+
+    return db
+
+
+def make_model(db):
+    class Dialog(Model):
+        id = CharField(primary_key=True)
+        tenant_id = CharField(index=True)
+        status = IntegerField(default=1)
+
+        class Meta:
+            database = db
+
+    return Dialog
+
+
+def slow_query(model, db, dialog_id, query_ms):
+    db.execute_sql("SELECT sleep_ms(?)", (query_ms,))
+    return list(model.select().where(model.id == dialog_id))
+
+
+async def heartbeat(stop, lags, interval=0.005):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run(mode, model, db, executor, args):
+    sem = asyncio.Semaphore(args.concurrency)
+    latencies, lags = [], []
+    stop = asyncio.Event()
+
+    async def handler(i):
+        async with sem:
+            start = time.perf_counter()
+            for _ in range(args.queries):
+                dialog_id = f"d{i % args.rows}"
+                if mode == "inline":
+                    with db.connection_context():
+                        slow_query(model, db, dialog_id, args.query_ms)
+                else:
+                    await executor.run(slow_query, model, db, dialog_id, args.query_ms)
+                await asyncio.sleep(0)  # e.g. streaming a token back to the client
+            latencies.append(time.perf_counter() - start)
+
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*[handler(i) for i in range(args.requests)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    latencies.sort()
+    print(f"{mode:<10}{elapsed:>9.2f}s{args.requests / elapsed:>10.1f} req/s"
+          f"{statistics.median(latencies) * 1000:>10.1f}ms p50{latencies[int(len(latencies) * 0.95) - 1] * 1000:>10.1f}ms p95"
+          f"{max(lags or [0]) * 1000:>10.1f}ms max loop lag")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=3, help="queries per request")
+    parser.add_argument("--query-ms", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_db(os.path.join(tmp, "bench.db"))
+        model = make_model(db)
+        with db.connection_context():
+            db.create_tables([model])
+            model.insert_many([{"id": f"d{i}", "tenant_id": "t"} for i in range(args.rows)]).execute()
+
+        executor = DBExecutor(max_workers=args.workers, db=db)
+        print(f"requests={args.requests} concurrency={args.concurrency} queries={args.queries} query_ms={args.query_ms} workers={args.workers}")
+        asyncio.run(run("inline", model, db, executor, args))
+        asyncio.run(run("executor", model, db, executor, args))
+        print(executor.metrics())
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
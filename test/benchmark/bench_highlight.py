@@ -0,0 +1,93 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+"""
+CPU benchmark for English keyword highlighting.
+
+Compares the per-keyword re.sub loop of the doc-store `get_highlight` with
+KeywordHighlighter on a page of long English chunks.
+
+    python test/benchmark/bench_highlight.py --hits 64 --keywords 32 --sentences 60 --rounds 10
+"""
+
+import argparse
+import random
+import re
+import time
+
+from common.string_utils import KeywordHighlighter
+
+WORDS = ("the of and to in is that for it as with was on be by this are from or have an which not at but "
+         "retrieval augmented generation model document chunk index vector search query embedding token "
+         "database latency throughput cache memory storage network server client request response").split()
+
+
+def legacy(chunks, keywords):
+    out = []
+    for txt in chunks:
+        txt = re.sub(r"[\r\n]", " ", txt, flags=re.IGNORECASE | re.MULTILINE)
+        txt_list = []
+        for t in re.split(r"[.?!;\n]", txt):
+            for w in keywords:
+                t = re.sub(r"(^|[ .?/'\"\(\)!,:;-])(%s)([ .?/'\"\(\)!,:;-])" % re.escape(w), r"\1<em>\2</em>\3", t,
+                           flags=re.IGNORECASE | re.MULTILINE)
+            if not re.search(r"<em>[^<>]+</em>", t, flags=re.IGNORECASE | re.MULTILINE):
+                continue
+            txt_list.append(t)
+        out.append(txt_list)
+    return out
+
+
+def batched(chunks, keywords):
+    highlighter = KeywordHighlighter(keywords)
+    return [highlighter.highlight(txt) for txt in chunks]
+
+
+def timed(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        res = fn()
+    return (time.perf_counter() - start) / rounds * 1000, res
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hits", type=int, default=64)
+    parser.add_argument("--keywords", type=int, default=32)
+    parser.add_argument("--sentences", type=int, default=60, help="sentences per chunk")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    keywords = [f"{w}s" if rng.random() < 0.2 else w for w in rng.sample(WORDS[25:], min(args.keywords, len(WORDS) - 25))]
+    keywords += [f"kw{i}" for i in range(args.keywords - len(keywords))]
+    chunks = []
+    for _ in range(args.hits):
+        sentences = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 25))).capitalize() for _ in range(args.sentences)]
+        chunks.append(". ".join(sentences) + ".")
+
+    legacy_ms, expected = timed(lambda: legacy(chunks, keywords), args.rounds)
+    batched_ms, got = timed(lambda: batched(chunks, keywords), args.rounds)
+    assert got == expected
+
+    print(f"hits={args.hits} keywords={len(keywords)} sentences/chunk={args.sentences} "
+          f"chars/chunk={sum(map(len, chunks)) // len(chunks)}")
+    print(f"{'per-keyword re.sub':<24}{legacy_ms:>10.2f} ms")
+    print(f"{'KeywordHighlighter':<24}{batched_ms:>10.2f} ms  {legacy_ms / batched_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+"""
+Per-call latency of the HTTP helpers against a local keep-alive server.
+
+Compares a fresh httpx client per call (the old helper behaviour) with the
+shared clients of HTTP_CLIENTS, for sync calls and for concurrent async calls.
+
+    python test/benchmark/bench_http_client.py --calls 500 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from common.http_client import HTTP_CLIENTS, async_request, sync_request
+
+BODY = b'{"ok": true}'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def report(name, latencies, elapsed):
+    latencies.sort()
+    print(f"{name:<16}{statistics.median(latencies) * 1000:>9.3f}ms p50"
+          f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:>9.3f}ms p95"
+          f"{len(latencies) / elapsed:>10.1f} req/s")
+
+
+def bench_sync(name, call, calls):
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(calls):
+        t = time.perf_counter()
+        call().raise_for_status()
+        latencies.append(time.perf_counter() - t)
+    report(name, latencies, time.perf_counter() - start)
+
+
+async def bench_async(name, call, calls, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with sem:
+            t = time.perf_counter()
+            (await call()).raise_for_status()
+            latencies.append(time.perf_counter() - t)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(calls)])
+    report(name, latencies, time.perf_counter() - start)
+    await HTTP_CLIENTS.aclose()
+
+
+def fresh_sync(url):
+    with httpx.Client() as client:
+        return client.get(url)
+
+
+async def fresh_async(url):
+    async with httpx.AsyncClient() as client:
+        return await client.get(url)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+
+    print(f"calls={args.calls} concurrency={args.concurrency}")
+    bench_sync("sync fresh", lambda: fresh_sync(url), args.calls)
+    bench_sync("sync shared", lambda: sync_request("GET", url), args.calls)
+    asyncio.run(bench_async("async fresh", lambda: fresh_async(url), args.calls, args.concurrency))
+    asyncio.run(bench_async("async shared", lambda: async_request("GET", url), args.calls, args.concurrency))
+    print(HTTP_CLIENTS.stats())
+    HTTP_CLIENTS.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
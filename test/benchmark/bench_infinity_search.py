@@ -0,0 +1,149 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+"""
+Latency benchmark for multi-table Infinity search against a stubbed client.
+
+Every stubbed RPC sleeps: `get_database` / `get_table` for --rpc-ms and the
+query itself for --query-ms. Compares the sequential per-table loop with
+concat-and-sort against InfinityTableScatter with the top-k heap merge.
+
+    python test/benchmark/bench_infinity_search.py --tables 16 --rows 64 --query-ms 20 --rpc-ms 1
+"""
+
+import argparse
+import random
+import statistics
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from common.doc_store.infinity_conn_base import InfinityTableScatter, merge_top_k
+
+
+class StubTable:
+    def __init__(self, name, rows, query_ms, seed):
+        rng = random.Random(seed)
+        self.name = name
+        self.query_ms = query_ms
+        self.df = pd.DataFrame({
+            "id": [f"{name}_{i}" for i in range(rows)],
+            "SCORE": sorted((rng.random() for _ in range(rows)), reverse=True),
+            "pagerank_fea": [rng.randint(0, 3) for _ in range(rows)],
+        })
+
+    def query(self):
+        time.sleep(self.query_ms / 1000)
+        return self.df.copy(), {"total_hits_count": len(self.df)}
+
+
+class StubDatabase:
+    def __init__(self, tables, rpc_ms):
+        self.tables = tables
+        self.rpc_ms = rpc_ms
+
+    def get_table(self, name):
+        time.sleep(self.rpc_ms / 1000)
+        return self.tables[name]
+
+
+class StubConnection:
+    def __init__(self, tables, rpc_ms):
+        self.tables = tables
+        self.rpc_ms = rpc_ms
+
+    def get_database(self, name):
+        time.sleep(self.rpc_ms / 1000)
+        return StubDatabase(self.tables, self.rpc_ms)
+
+
+class StubPool:
+    def __init__(self, tables, rpc_ms):
+        self.free = []
+        self.lock = threading.Lock()
+        self.tables = tables
+        self.rpc_ms = rpc_ms
+
+    def get_conn(self):
+        with self.lock:
+            return self.free.pop() if self.free else StubConnection(self.tables, self.rpc_ms)
+
+    def release_conn(self, conn):
+        with self.lock:
+            self.free.append(conn)
+
+
+def sequential(pool, table_names, limit):
+    conn = pool.get_conn()
+    db = conn.get_database("default_db")
+    df_list = []
+    for name in table_names:
+        df, _ = db.get_table(name).query()
+        df_list.append(df)
+    pool.release_conn(conn)
+    res = pd.concat(df_list, axis=0).reset_index(drop=True)
+    res["_score"] = res["SCORE"] + res["pagerank_fea"]
+    return res.sort_values(by="_score", ascending=False).reset_index(drop=True).head(limit)
+
+
+def scattered(scatter, table_names, limit):
+    df_list = [df for df, _ in filter(None, scatter.map(table_names, lambda table, _: table.query()))]
+    res = pd.concat(df_list, axis=0).reset_index(drop=True)
+    scores = [(df["SCORE"] + df["pagerank_fea"]).to_numpy(dtype=float) for df in df_list]
+    positions, top_scores = merge_top_k(df_list, scores, limit)
+    res = res.iloc[positions].reset_index(drop=True)
+    res["_score"] = top_scores
+    return res
+
+
+def measure(fn, rounds):
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        res = fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies), max(latencies), res
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tables", type=int, default=16)
+    parser.add_argument("--rows", type=int, default=64, help="rows returned per table")
+    parser.add_argument("--limit", type=int, default=64)
+    parser.add_argument("--query-ms", type=float, default=20.0)
+    parser.add_argument("--rpc-ms", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    tables = {f"ragflow_t_kb{i}": StubTable(f"ragflow_t_kb{i}", args.rows, args.query_ms, i) for i in range(args.tables)}
+    table_names = list(tables.keys())
+    pool = StubPool(tables, args.rpc_ms)
+    scatter = InfinityTableScatter(pool, "default_db", workers=args.workers)
+
+    seq_p50, seq_max, expected = measure(lambda: sequential(pool, table_names, args.limit), args.rounds)
+    par_p50, par_max, got = measure(lambda: scattered(scatter, table_names, args.limit), args.rounds)
+    assert np.allclose(np.sort(got["_score"].to_numpy()), np.sort(expected["_score"].to_numpy()))
+
+    print(f"tables={args.tables} rows/table={args.rows} limit={args.limit} query_ms={args.query_ms} "
+          f"rpc_ms={args.rpc_ms} workers={args.workers}")
+    print(f"{'sequential':<24}{seq_p50:>10.1f} ms p50{seq_max:>10.1f} ms max")
+    print(f"{'scatter-gather':<24}{par_p50:>10.1f} ms p50{par_max:>10.1f} ms max  {seq_p50 / par_p50:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+"""
+CPU benchmark for tag rank-feature scoring.
+
+Compares the per-chunk eval() loop with the sparse scorer, first on freshly
+seen tag strings and then on strings already decoded by earlier queries.
+
+    python test/benchmark/bench_rank_features.py --chunks 1024 --tags 300 --rounds 20
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from rag.utils.rank_feature_utils import tag_feature_scores
+
+PAGERANK_FLD = "pagerank_fea"
+
+
+def legacy(query_rfea, raw_features):
+    rank_fea = []
+    q_denor = np.sqrt(np.sum([s * s for t, s in query_rfea.items() if t != PAGERANK_FLD]))
+    for raw in raw_features:
+        nor, denor = 0, 0
+        if not raw:
+            rank_fea.append(0)
+            continue
+        for t, sc in eval(raw).items():
+            if t in query_rfea:
+                nor += query_rfea[t] * sc
+            denor += sc * sc
+        rank_fea.append(0 if denor == 0 else nor / np.sqrt(denor) / q_denor)
+    return np.array(rank_fea)
+
+
+def timed(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        res = fn()
+    return (time.perf_counter() - start) / rounds * 1000, res
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=1024)
+    parser.add_argument("--tags", type=int, default=300)
+    parser.add_argument("--tags-per-chunk", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocab = [f"tag_{i}" for i in range(args.tags)]
+    query = {t: rng.randint(1, 10) for t in rng.sample(vocab, 3)}
+    raw = [str({t: rng.randint(1, 5) for t in rng.sample(vocab, args.tags_per_chunk)}) for _ in range(args.chunks)]
+
+    legacy_ms, expected = timed(lambda: legacy(query, raw), args.rounds)
+    start = time.perf_counter()
+    got = tag_feature_scores(query, raw, skip_query_norm=(PAGERANK_FLD,))
+    cold_ms = (time.perf_counter() - start) * 1000
+    warm_ms, got = timed(lambda: tag_feature_scores(query, raw, skip_query_norm=(PAGERANK_FLD,)), args.rounds)
+    assert np.allclose(got, expected)
+
+    print(f"chunks={args.chunks} tags={args.tags} tags/chunk={args.tags_per_chunk}")
+    print(f"{'eval loop':<24}{legacy_ms:>10.2f} ms")
+    print(f"{'sparse (cold decode)':<24}{cold_ms:>10.2f} ms")
+    print(f"{'sparse (cached decode)':<24}{warm_ms:>10.2f} ms  {legacy_ms / warm_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
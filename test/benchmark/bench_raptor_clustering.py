@@ -0,0 +1,87 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+"""
+CPU benchmark for the RAPTOR BIC sweep on synthetic reduced embeddings.
+
+Compares the original sequential scan over every cluster count with the
+coarse-to-fine search fanned out over a process pool.
+
+    python test/benchmark/bench_raptor_clustering.py --points 5000 --max-cluster 64
+"""
+
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from rag.utils.raptor_utils import gmm_bic, search_optimal_clusters
+
+
+def synthetic_embeddings(points: int, dim: int, centers: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    means = rng.normal(scale=8.0, size=(centers, dim))
+    labels = rng.integers(0, centers, size=points)
+    return means[labels] + rng.normal(size=(points, dim))
+
+
+def sequential(embeddings, max_cluster, seed):
+    bics = [gmm_bic(embeddings, n, seed) for n in range(1, max_cluster)]
+    return int(np.argmin(bics)) + 1, len(bics)
+
+
+def pooled(embeddings, max_cluster, seed, workers):
+    fits = 0
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        def evaluate(ns):
+            nonlocal fits
+            fits += len(ns)
+            futures = [pool.submit(gmm_bic, embeddings, n, seed) for n in ns]
+            return [f.result() for f in futures]
+
+        best = search_optimal_clusters(range(1, max_cluster), evaluate, batch_size=workers)
+    return best, fits
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=3000)
+    parser.add_argument("--dim", type=int, default=12)
+    parser.add_argument("--centers", type=int, default=9)
+    parser.add_argument("--max-cluster", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=224)
+    args = parser.parse_args()
+
+    embeddings = synthetic_embeddings(args.points, args.dim, args.centers, args.seed)
+
+    st = time.perf_counter()
+    best_seq, fits_seq = sequential(embeddings, args.max_cluster, args.seed)
+    t_seq = time.perf_counter() - st
+
+    st = time.perf_counter()
+    best_par, fits_par = pooled(embeddings, args.max_cluster, args.seed, args.workers)
+    t_par = time.perf_counter() - st
+
+    print(f"points={args.points} dim={args.dim} centers={args.centers} max_cluster={args.max_cluster}")
+    print(f"sequential: best={best_seq} fits={fits_seq} time={t_seq:.2f}s")
+    print(f"pooled:     best={best_par} fits={fits_par} time={t_par:.2f}s workers={args.workers}")
+    print(f"speedup:    {t_seq / t_par:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+"""
+Benchmark for the document progress sync pass against the configured database.
+
+Seeds pending documents with a few tasks each under a throw-away knowledge
+base id, then times the original per-document loop against the grouped
+DocumentService._sync_progress, cold and with no task changes. Queue lengths
+are pinned so that only database work is measured. Rows are removed on exit.
+
+    python test/benchmark/bench_sync_progress.py --docs 10000 --tasks 3
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime
+
+from api.db.db_models import DB, Document, Task
+from api.db.services import document_service
+from api.db.services.document_service import DocumentService
+from api.db.services.task_service import TaskService
+from common.constants import TaskStatus
+from common.misc_utils import get_uuid
+from common.time_utils import current_timestamp
+
+
+def seed(kb_id, docs, tasks, seed):
+    rng = random.Random(seed)
+    now = current_timestamp()
+    doc_rows, task_rows = [], []
+    for _ in range(docs):
+        doc_id = get_uuid()
+        doc_rows.append({"id": doc_id, "kb_id": kb_id, "parser_id": "naive", "type": "pdf", "created_by": "bench",
+                         "suffix": "pdf", "run": TaskStatus.RUNNING.value, "progress": 0, "process_begin_at": datetime.now(),
+                         "create_time": now, "update_time": now})
+        for _ in range(tasks):
+            progress = rng.choice([0, 0.3, 0.8, 1, 1, -1])
+            task_rows.append({"id": get_uuid(), "doc_id": doc_id, "progress": progress,
+                              "progress_msg": "%s Page(1~12): progress %.1f" % (datetime.now().strftime("%H:%M:%S"), progress),
+                              "create_time": now, "update_time": now})
+    with DB.atomic():
+        for i in range(0, len(doc_rows), 500):
+            Document.insert_many(doc_rows[i:i + 500]).execute()
+        for i in range(0, len(task_rows), 500):
+            Task.insert_many(task_rows[i:i + 500]).execute()
+    return [{"id": d["id"], "process_begin_at": d["process_begin_at"]} for d in doc_rows]
+
+
+def legacy_sync(docs):
+    for d in docs:
+        tsks = TaskService.query(doc_id=d["id"], order_by=Task.create_time)
+        if not tsks:
+            continue
+        e, doc = DocumentService.get_by_id(d["id"])
+        status = doc.run
+        prg, finished, bad, msg = 0, True, 0, []
+        for t in tsks:
+            if 0 <= t.progress < 1:
+                finished = False
+            if t.progress == -1:
+                bad += 1
+            prg += t.progress if t.progress >= 0 else 0
+            if (t.progress_msg or "").strip():
+                msg.append(t.progress_msg)
+        prg /= len(tsks)
+        if finished and bad:
+            prg, status = -1, TaskStatus.FAIL.value
+        elif finished:
+            prg, status = 1, TaskStatus.DONE.value
+        info = {"process_duration": max(datetime.timestamp(datetime.now()) - d["process_begin_at"].timestamp(), 0), "run": status,
+                "progress_msg": "\n".join(sorted(msg)) or "%d tasks are ahead in the queue..." % document_service.get_queue_length(0)}
+        if prg != 0:
+            info["progress"] = prg
+        DocumentService.update_by_id(d["id"], info)
+
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{elapsed:>10.3f}s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--tasks", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    document_service.get_queue_length = lambda priority: 0
+    kb_id = "bench_" + get_uuid()
+    with DB.connection_context():
+        docs = seed(kb_id, args.docs, args.tasks, args.seed)
+        try:
+            print(f"docs={args.docs} tasks/doc={args.tasks} db={type(DB).__name__}")
+            legacy = timed("per-document loop", legacy_sync, docs)
+            DocumentService._progress_fingerprints.clear()
+            grouped = timed("grouped (cold)", DocumentService._sync_progress, docs)
+            steady = timed("grouped (no changes)", DocumentService._sync_progress, docs)
+            print(f"speedup cold {legacy / grouped:.1f}x, steady {legacy / max(steady, 1e-9):.1f}x")
+        finally:
+            ids = [d["id"] for d in docs]
+            with DB.atomic():
+                for i in range(0, len(ids), 500):
+                    Task.delete().where(Task.doc_id.in_(ids[i:i + 500])).execute()
+                Document.delete().where(Document.kb_id == kb_id).execute()
+
+
+if __name__ == "__main__":
+    main()
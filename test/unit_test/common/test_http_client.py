@@ -0,0 +1,85 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+"""
+Unit tests for the shared HTTP clients, against a local server.
+"""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from common.http_client import HTTP_CLIENTS, async_request, sync_request  # noqa: E402
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    cookies_seen = []
+
+    def do_GET(self):
+        self.cookies_seen.append(self.headers.get("Cookie"))
+        self.send_response(200)
+        self.send_header("Set-Cookie", "session=first-user; Path=/")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    Handler.cookies_seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+class TestSharedClients:
+    """Test that the shared clients don't carry state between callers"""
+
+    def test_sync_client_drops_cookies(self, server_url):
+        """Test that a cookie set by one response isn't sent on the next request"""
+        for _ in range(2):
+            sync_request("GET", server_url).raise_for_status()
+        assert Handler.cookies_seen == [None, None]
+        assert len(HTTP_CLIENTS.get_sync(server_url).cookies) == 0
+
+    def test_async_client_drops_cookies(self, server_url):
+        """Test that the async clients don't replay cookies either"""
+
+        async def run():
+            for _ in range(2):
+                (await async_request("GET", server_url)).raise_for_status()
+            await HTTP_CLIENTS.aclose()
+
+        asyncio.run(run())
+        assert Handler.cookies_seen == [None, None]
+
+    def test_explicit_cookie_header_is_sent(self, server_url):
+        """Test that callers can still send their own Cookie header"""
+        sync_request("GET", server_url, headers={"Cookie": "token=abc"}).raise_for_status()
+        assert Handler.cookies_seen == ["token=abc"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,138 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+"""
+Unit tests for the pooled MCP sessions, against a local SSE MCP server stub.
+"""
+
+import asyncio
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("mcp.client.session")
+fastmcp = pytest.importorskip("mcp.server.fastmcp")
+uvicorn = pytest.importorskip("uvicorn")
+
+from common.constants import MCPServerType  # noqa: E402
+from common.mcp_tool_call_conn import MCPSessionPool, close_multiple_mcp_toolcall_sessions  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def sse_url():
+    stub = fastmcp.FastMCP("stub")
+
+    @stub.tool()
+    async def echo(text: str) -> str:
+        return text
+
+    @stub.tool()
+    async def slow(seconds: float) -> str:
+        await asyncio.sleep(seconds)
+        return "done"
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(stub.sse_app(), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started and time.monotonic() < deadline:
+        time.sleep(0.05)
+    yield f"http://127.0.0.1:{port}/sse"
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def mcp_server(sse_url):
+    return SimpleNamespace(id="stub", url=sse_url, headers={}, server_type=MCPServerType.SSE, variables={})
+
+
+@pytest.fixture
+def pool():
+    pool = MCPSessionPool(idle_ttl=300, tools_cache_ttl=60, check_interval=30)
+    yield pool
+    pool.close()
+
+
+class TestMCPSessionPool:
+    """Test session reuse, multiplexing and eviction"""
+
+    def test_reuses_session(self, pool, mcp_server):
+        """Test that one server configuration maps to one warm session"""
+        session = pool.get(mcp_server, {})
+        assert session.tool_call("echo", {"text": "hi"}) == "hi"
+        assert pool.get(mcp_server, {"tools": {"echo": {"enabled": False}}}) is session
+        assert pool.stats() == {"sessions": 1, "healthy": 1}
+
+    def test_new_session_per_variables(self, pool, mcp_server):
+        """Test that different header variables get their own session"""
+        assert pool.get(mcp_server, {"token": "a"}) is not pool.get(mcp_server, {"token": "b"})
+
+    def test_caches_tool_list(self, pool, mcp_server):
+        """Test that get_tools reuses the listed tools within the TTL"""
+        session = pool.get(mcp_server)
+        tools = session.get_tools()
+        assert sorted(t.name for t in tools) == ["echo", "slow"]
+        assert session.get_tools() is tools
+
+    def test_multiplexes_tool_calls(self, pool, mcp_server):
+        """Test that concurrent calls on one session overlap instead of queueing"""
+        session = pool.get(mcp_server)
+        session.get_tools()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: session.tool_call("slow", {"seconds": 0.5}), range(4)))
+        assert results == ["done"] * 4
+        assert time.perf_counter() - start < 1.5
+
+    def test_evicts_idle_sessions(self, mcp_server):
+        """Test that the health check closes idle sessions and get reconnects"""
+        pool = MCPSessionPool(idle_ttl=0.2, tools_cache_ttl=0, check_interval=0.1)
+        try:
+            session = pool.get(mcp_server)
+            assert session.tool_call("echo", {"text": "x"}) == "x"
+            deadline = time.monotonic() + 5
+            while pool.stats()["sessions"] and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert pool.stats()["sessions"] == 0
+            assert not session.healthy
+            fresh = pool.get(mcp_server)
+            assert fresh is not session
+            assert fresh.tool_call("echo", {"text": "y"}) == "y"
+        finally:
+            pool.close()
+
+    def test_close_multiple_skips_pooled(self, pool, mcp_server):
+        """Test that callers closing their sessions don't close pooled ones"""
+        session = pool.get(mcp_server)
+        close_multiple_mcp_toolcall_sessions([session])
+        assert session.healthy
+        assert session.tool_call("echo", {"text": "still"}) == "still"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -15,7 +15,7 @@
 #
 import uuid
 import hashlib
-from common.misc_utils import get_uuid, download_img, hash_str2int, convert_bytes
+from common.misc_utils import get_uuid, download_img, hash_str2int, convert_bytes, TTLCache
 
 
 class TestGetUuid:
@@ -353,3 +353,50 @@ class TestConvertBytes:
         # Ensure we don't exceed available units
         huge_value = 100 * 1125899906842624  # 100 PB (still within PB range)
         assert "PB" in convert_bytes(huge_value)
+
+
+class TestTTLCache:
+    """Test cases for TTLCache"""
+
+    def test_get_set(self):
+        """Test that stored values are returned and misses give the default"""
+        cache = TTLCache(maxsize=4, ttl=60)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("b", 0) == 0
+
+    def test_expiry(self, monkeypatch):
+        """Test that entries vanish once their ttl has passed"""
+        now = [100.0]
+        monkeypatch.setattr("common.misc_utils.time.monotonic", lambda: now[0])
+        cache = TTLCache(maxsize=4, ttl=10)
+        cache.set("a", 1)
+        now[0] = 109.0
+        assert cache.get("a") == 1
+        now[0] = 110.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_invalidation(self):
+        """Test pop and pop_where"""
+        cache = TTLCache(maxsize=8, ttl=60)
+        for i in range(4):
+            cache.set(i, {"id": i % 2})
+        assert cache.pop(0) == {"id": 0}
+        assert cache.pop(0) is None
+        assert cache.pop_where(lambda _, v: v["id"] == 1) == 2
+        assert len(cache) == 1
+        cache.clear()
+        assert len(cache) == 0
@@ -0,0 +1,192 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+"""
+Unit tests for the keyed SQL connection pool and capped fetching, on SQLite.
+PostgreSQL cases run when EXESQL_TEST_POSTGRES_DSN points at a server.
+"""
+
+import os
+import sqlite3
+
+import pytest
+
+from common.sql_conn_pool import SQLConnectionPool, fetch_capped, pool_key
+
+
+class Connector:
+    """Opens SQLite connections to one database file and counts them."""
+
+    def __init__(self, path):
+        self.path = path
+        self.opened = []
+
+    def __call__(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.opened.append(conn)
+        return conn
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "test.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (id INTEGER, name TEXT)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", [(i, f"name_{i}") for i in range(1000)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+KEY = pool_key("sqlite", "localhost", 0, "test", "user", "secret")
+
+
+class TestSQLConnectionPool:
+    """Test leasing, reuse and eviction of pooled connections"""
+
+    def test_reuses_connection(self, db_path):
+        """Test that a released connection is handed out again"""
+        pool, connect = SQLConnectionPool(), Connector(db_path)
+        for _ in range(3):
+            with pool.connection(KEY, connect) as lease:
+                assert lease.conn.execute("SELECT count(*) FROM t").fetchone() == (1000,)
+        assert len(connect.opened) == 1
+        assert pool.stats() == {"keys": 1, "idle": 1}
+
+    def test_keys_are_separate(self, db_path):
+        """Test that another user or password never gets the pooled connection"""
+        pool, connect = SQLConnectionPool(), Connector(db_path)
+        with pool.connection(KEY, connect):
+            pass
+        with pool.connection(pool_key("sqlite", "localhost", 0, "test", "user", "other"), connect):
+            pass
+        assert len(connect.opened) == 2
+        assert KEY[-1] != "secret"
+
+    def test_error_discards_connection(self, db_path):
+        """Test that a connection that raised is closed, not pooled"""
+        pool, connect = SQLConnectionPool(), Connector(db_path)
+        with pytest.raises(sqlite3.OperationalError):
+            with pool.connection(KEY, connect) as lease:
+                lease.conn.execute("SELECT * FROM missing")
+        assert pool.stats()["idle"] == 0
+
+    def test_discard(self, db_path):
+        """Test that a discarded lease closes its connection"""
+        pool, connect = SQLConnectionPool(), Connector(db_path)
+        with pool.connection(KEY, connect) as lease:
+            lease.discard()
+        assert pool.stats()["idle"] == 0
+        with pytest.raises(sqlite3.ProgrammingError):
+            connect.opened[0].execute("SELECT 1")
+
+    def test_dead_connection_replaced(self, db_path):
+        """Test that a connection failing its liveness check is replaced"""
+        pool, connect = SQLConnectionPool(check_after=0), Connector(db_path)
+        with pool.connection(KEY, connect):
+            pass
+        connect.opened[0].close()
+        with pool.connection(KEY, connect) as lease:
+            assert lease.conn is connect.opened[1]
+            assert lease.conn.execute("SELECT 1").fetchone() == (1,)
+
+    def test_idle_ttl(self, db_path):
+        """Test that connections idle past the TTL are closed"""
+        pool, connect = SQLConnectionPool(idle_ttl=0), Connector(db_path)
+        with pool.connection(KEY, connect):
+            pass
+        with pool.connection(KEY, connect):
+            pass
+        assert len(connect.opened) == 2
+
+    def test_max_idle_per_key(self, db_path):
+        """Test that extra connections beyond the idle limit are closed on release"""
+        pool, connect = SQLConnectionPool(max_idle_per_key=1), Connector(db_path)
+        with pool.connection(KEY, connect):
+            with pool.connection(KEY, connect):
+                pass
+        assert len(connect.opened) == 2
+        assert pool.stats()["idle"] == 1
+
+    def test_rollback_on_release(self, db_path):
+        """Test that uncommitted writes don't leak into the next lease"""
+        pool, connect = SQLConnectionPool(), Connector(db_path)
+        with pool.connection(KEY, connect) as lease:
+            lease.conn.execute("DELETE FROM t")
+        with pool.connection(KEY, connect) as lease:
+            assert lease.conn.execute("SELECT count(*) FROM t").fetchone() == (1000,)
+
+
+class TestFetchCapped:
+    """Test batched fetching with row and byte caps"""
+
+    def cursor(self, db_path):
+        conn = sqlite3.connect(db_path)
+        return conn.execute("SELECT id, name FROM t ORDER BY id")
+
+    def test_complete(self, db_path):
+        """Test reading a result shorter than the row cap"""
+        res = fetch_capped(self.cursor(db_path).fetchmany, 5000, 1 << 30, batch_size=64)
+        assert len(res.rows) == 1000 and res.complete and not res.over_bytes
+
+    def test_row_cap(self, db_path):
+        """Test stopping at the row cap without reading further"""
+        cursor = self.cursor(db_path)
+        res = fetch_capped(cursor.fetchmany, 100, 1 << 30, batch_size=64)
+        assert [r[0] for r in res.rows] == list(range(100))
+        assert not res.complete and not res.over_bytes
+        assert cursor.fetchone() == (100, "name_100")
+
+    def test_byte_cap(self, db_path):
+        """Test stopping once the held values exceed the byte cap"""
+        res = fetch_capped(self.cursor(db_path).fetchmany, 1000, 200, batch_size=64)
+        assert res.over_bytes and not res.complete
+        assert 0 < len(res.rows) < 20
+
+    def test_keeps_one_row(self, db_path):
+        """Test that one oversized row is still returned"""
+        res = fetch_capped(self.cursor(db_path).fetchmany, 1000, 1)
+        assert len(res.rows) == 1 and res.over_bytes
+
+    def test_canceled(self, db_path):
+        """Test that cancellation stops fetching"""
+        res = fetch_capped(self.cursor(db_path).fetchmany, 1000, 1 << 30, batch_size=10, canceled=lambda: True)
+        assert res.canceled and res.rows == []
+
+
+@pytest.mark.skipif(not os.environ.get("EXESQL_TEST_POSTGRES_DSN"), reason="EXESQL_TEST_POSTGRES_DSN not set")
+class TestPostgres:
+    """Test pooling and server-side cursor fetching on PostgreSQL"""
+
+    def test_named_cursor(self):
+        """Test that a server-side cursor stops at the cap and the connection stays usable"""
+        psycopg2 = pytest.importorskip("psycopg2")
+        dsn = os.environ["EXESQL_TEST_POSTGRES_DSN"]
+        pool = SQLConnectionPool(check_after=0)
+        key = pool_key("postgres", dsn, 0, "", "", "")
+        for _ in range(2):
+            with pool.connection(key, lambda: psycopg2.connect(dsn)) as lease:
+                cursor = lease.conn.cursor(name="exesql_test")
+                cursor.execute("SELECT g, repeat('x', 100) FROM generate_series(1, 1000000) g")
+                res = fetch_capped(cursor.fetchmany, 1000, 10_000)
+                assert res.over_bytes and len(res.rows) < 1000
+                cursor.close()
+        assert pool.stats()["idle"] == 1
+        pool.close_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -14,8 +14,11 @@
 #  limitations under the License.
 #
 
+import random
+import re
+
 import pytest
-from common.string_utils import remove_redundant_spaces, clean_markdown_block
+from common.string_utils import remove_redundant_spaces, clean_markdown_block, KeywordHighlighter
 
 
 class TestRemoveRedundantSpaces:
@@ -357,3 +360,47 @@ class TestCleanMarkdownBlock:
         expected = "First line\n```\n```markdown\nSecond line"
         assert clean_markdown_block(input_text) == expected
 
+
+def legacy_highlight(txt, keywords):
+    """The per-keyword re.sub loop that KeywordHighlighter replaces."""
+    txt = re.sub(r"[\r\n]", " ", txt, flags=re.IGNORECASE | re.MULTILINE)
+    txt_list = []
+    for t in re.split(r"[.?!;\n]", txt):
+        for w in keywords:
+            t = re.sub(r"(^|[ .?/'\"\(\)!,:;-])(%s)([ .?/'\"\(\)!,:;-])" % re.escape(w), r"\1<em>\2</em>\3", t,
+                       flags=re.IGNORECASE | re.MULTILINE)
+        if not re.search(r"<em>[^<>]+</em>", t, flags=re.IGNORECASE | re.MULTILINE):
+            continue
+        txt_list.append(t)
+    return txt_list
+
+
+class TestKeywordHighlighter:
+    """Test that KeywordHighlighter matches the per-keyword highlighter"""
+
+    @pytest.mark.parametrize("txt, keywords", [
+        ("The quick brown fox. Jumps over the lazy dog!", ["fox", "dog"]),
+        ("RAGFlow is a RAG engine; rag (retrieval) works.", ["rag", "RAGFlow", "retrieval"]),
+        ("new york city is in new york state", ["new york", "york", "new"]),
+        ("em dash - em - and <em>kept</em> as is", ["em", "/em", "kept"]),
+        ("nothing to see here. really", ["absent"]),
+        ("no keywords at all", []),
+        ("empty keyword here, with tail", ["", "here"]),
+        ("already <em>marked</em> text", ["", "missing"]),
+        ("Stra\u00dfe und STRASSE, \u017fo sch\u00f6n.", ["stra\u00dfe", "strasse", "so", "sch\u00f6n"]),
+    ])
+    def test_cases(self, txt, keywords):
+        """Test handpicked overlaps, boundaries, empty and non-ASCII keywords"""
+        assert KeywordHighlighter(keywords).highlight(txt) == legacy_highlight(txt, keywords)
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_random_text(self, seed):
+        """Test equivalence on random English-like chunks"""
+        rng = random.Random(seed)
+        vocab = ["data", "Data", "base", "database", "index", "vector", "search", "rag", "flow", "a", "e", "m"]
+        punct = [" ", " ", " ", ". ", ", ", "; ", "? ", "! ", " (", ") ", "-", "/", "'", "\n"]
+        txt = "".join(rng.choice(vocab) + rng.choice(punct) for _ in range(400))
+        keywords = rng.sample(vocab, 6) + ["data base"]
+        highlighter = KeywordHighlighter(keywords)
+        assert highlighter.highlight(txt) == legacy_highlight(txt, keywords)
+
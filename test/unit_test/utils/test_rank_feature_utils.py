@@ -0,0 +1,113 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+"""
+Unit tests for sparse tag-feature scoring.
+"""
+
+import json
+import random
+
+import numpy as np
+import pytest
+
+from rag.utils.rank_feature_utils import decode_tag_features, tag_feature_scores
+
+PAGERANK_FLD = "pagerank_fea"
+
+
+def legacy_scores(query_rfea, raw_features):
+    """The per-chunk eval() loop that tag_feature_scores replaces."""
+    rank_fea = []
+    q_denor = np.sqrt(np.sum([s * s for t, s in query_rfea.items() if t != PAGERANK_FLD]))
+    for raw in raw_features:
+        nor, denor = 0, 0
+        if not raw:
+            rank_fea.append(0)
+            continue
+        for t, sc in eval(raw).items():
+            if t in query_rfea:
+                nor += query_rfea[t] * sc
+            denor += sc * sc
+        if denor == 0:
+            rank_fea.append(0)
+        else:
+            rank_fea.append(nor / np.sqrt(denor) / q_denor)
+    return np.array(rank_fea)
+
+
+def random_case(rng, chunks, tags):
+    vocab = [f"tag_{i}" for i in range(tags)]
+    query = {t: rng.randint(1, 10) for t in rng.sample(vocab, 5)}
+    query[PAGERANK_FLD] = 10
+    raw = []
+    for _ in range(chunks):
+        if rng.random() < 0.2:
+            raw.append(None)
+            continue
+        raw.append(str({t: rng.randint(0, 5) for t in rng.sample(vocab, rng.randint(1, 6))}))
+    return query, raw
+
+
+class TestDecodeTagFeatures:
+    """Test decoding of stored tag features"""
+
+    @pytest.mark.parametrize("raw", [
+        {"a": 1, "b": 2.5},
+        "{'a': 1, 'b': 2.5}",
+        json.dumps({"a": 1, "b": 2.5}),
+    ])
+    def test_formats(self, raw):
+        """Test that dicts, Python reprs and JSON decode alike"""
+        tags, values = decode_tag_features(raw)
+        assert tags == ("a", "b")
+        assert list(values) == [1.0, 2.5]
+
+    @pytest.mark.parametrize("raw", [None, "", "{}", "not a dict", "__import__('os')", "[1, 2]"])
+    def test_empty_or_invalid(self, raw):
+        """Test that empty, malformed and non-literal input decodes to no features"""
+        tags, values = decode_tag_features(raw)
+        assert len(tags) == 0 and len(values) == 0
+
+
+class TestTagFeatureScores:
+    """Test that sparse scoring matches the legacy per-chunk loop"""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_legacy(self, seed):
+        """Test equivalence on random tag sets"""
+        query, raw = random_case(random.Random(seed), chunks=200, tags=50)
+        expected = legacy_scores(query, raw)
+        got = tag_feature_scores(query, raw, skip_query_norm=(PAGERANK_FLD,))
+        np.testing.assert_allclose(got, expected, rtol=1e-12, atol=0)
+
+    def test_no_tags(self):
+        """Test that chunks without tags score zero"""
+        got = tag_feature_scores({"a": 1}, [None, "", "{}"])
+        assert list(got) == [0.0, 0.0, 0.0]
+
+    def test_zero_weights(self):
+        """Test that all-zero chunk weights score zero instead of dividing by zero"""
+        got = tag_feature_scores({"a": 1}, ["{'a': 0}", "{'a': 2}"])
+        assert list(got) == [0.0, 1.0]
+
+    def test_empty_batch(self):
+        """Test an empty candidate list"""
+        assert len(tag_feature_scores({"a": 1}, [])) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -24,6 +24,7 @@ from rag.utils.raptor_utils import (
     is_tabular_pdf,
     should_skip_raptor,
     get_skip_reason,
+    search_optimal_clusters,
     EXCEL_EXTENSIONS,
     CSV_EXTENSIONS,
     STRUCTURED_EXTENSIONS
@@ -283,5 +284,62 @@ class TestIntegrationScenarios:
         assert should_skip_raptor(file_type, raptor_config=raptor_config) is False
 
 
+class TestSearchOptimalClusters:
+    """Test the coarse-to-fine BIC search"""
+
+    @staticmethod
+    def _recorder(bic):
+        calls = []
+
+        def evaluate(ns):
+            calls.extend(ns)
+            return [bic(n) for n in ns]
+        return evaluate, calls
+
+    def test_small_range_is_exhaustive(self):
+        """Test that small candidate sets are fully scanned"""
+        evaluate, calls = self._recorder(lambda n: (n - 5) ** 2)
+        assert search_optimal_clusters(range(1, 10), evaluate) == 5
+        assert sorted(calls) == list(range(1, 10))
+
+    @pytest.mark.parametrize("optimum", [1, 7, 23, 40, 63])
+    def test_large_range_finds_convex_minimum(self, optimum):
+        """Test that the coarse-to-fine search finds the minimum of a convex curve"""
+        evaluate, calls = self._recorder(lambda n: (n - optimum) ** 2)
+        assert search_optimal_clusters(range(1, 64), evaluate, batch_size=4) == optimum
+        assert len(calls) < 63
+
+    def test_early_stop_skips_tail(self):
+        """Test that the coarse sweep stops once BIC keeps increasing"""
+        evaluate, calls = self._recorder(lambda n: abs(n - 3))
+        assert search_optimal_clusters(range(1, 200), evaluate) == 3
+        assert max(calls) < 100
+
+    def test_ties_prefer_fewer_clusters(self):
+        """Test that ties resolve to the smallest cluster count"""
+        evaluate, _ = self._recorder(lambda n: 0.0)
+        assert search_optimal_clusters(range(1, 50), evaluate) == 1
+
+    def test_no_candidate_evaluated_twice(self):
+        """Test that the refinement pass reuses coarse scores"""
+        evaluate, calls = self._recorder(lambda n: (n - 30) ** 2)
+        search_optimal_clusters(range(1, 64), evaluate, batch_size=3)
+        assert len(calls) == len(set(calls))
+
+    def test_on_batch_hook_can_abort(self):
+        """Test that the per-batch hook can abort the search"""
+        def abort():
+            raise RuntimeError("canceled")
+
+        evaluate, _ = self._recorder(lambda n: n)
+        with pytest.raises(RuntimeError):
+            search_optimal_clusters(range(1, 10), evaluate, on_batch=abort)
+
+    def test_empty_candidates(self):
+        """Test that an empty candidate set is rejected"""
+        with pytest.raises(ValueError):
+            search_optimal_clusters([], lambda ns: [])
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,67 @@
+#
+#  Copyright 2025 The InfiniFlow Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+"""
+Unit tests for the in-memory tag KB index.
+"""
+
+import pytest
+
+from rag.utils.tag_index import TagIndex
+
+CHUNKS = [
+    {"content_ltks": "stock market fell sharply", "tag_kwd": ["finance"]},
+    {"content_ltks": "bank raised interest rates", "tag_kwd": ["finance", "economy"]},
+    {"content_ltks": "team won the football match", "title_tks": "sports news", "tag_kwd": ["sports"]},
+    {"content_ltks": "no tags here", "tag_kwd": []},
+]
+
+
+class TestTagIndex:
+    """Test vocabulary priors, matching and scoring"""
+
+    def test_priors(self):
+        """Test that priors follow (count + 1) / (total + S)"""
+        index = TagIndex(CHUNKS, S=10)
+        assert len(index) == 3
+        assert index.priors == {"finance": 3 / 14, "economy": 2 / 14, "sports": 2 / 14}
+
+    def test_aggregate(self):
+        """Test that tags are counted over the chunks sharing a token"""
+        index = TagIndex(CHUNKS)
+        assert dict(index.aggregate(["market", "rates"])) == {"finance": 2, "economy": 1}
+        assert dict(index.aggregate(["SPORTS"])) == {"sports": 1}
+        assert index.aggregate(["unknown"]) == []
+
+    def test_min_should_match(self):
+        """Test that chunks sharing too few tokens are ignored"""
+        index = TagIndex(CHUNKS)
+        assert dict(index.aggregate(["bank", "market"], min_should_match=2)) == {}
+        assert dict(index.aggregate(["bank", "rates"], min_should_match=2)) == {"finance": 1, "economy": 1}
+
+    def test_score(self):
+        """Test the score formula and top-n cut"""
+        S = 1000
+        index = TagIndex(CHUNKS, S=S)
+        top = index.score(["bank", "rates", "market"], topn_tags=1)
+        cnt = 3
+        expected = round(0.1 * (2 + 1) / (cnt + S) / index.priors["finance"])
+        assert top == [("finance", expected)]
+        assert index.score(["unknown"]) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])